@@ -0,0 +1,94 @@
+"""
+Benchmark runner.
+
+Runs the benchmark suite and compares the timings against the checked-in baselines.
+
+Usage:
+    uv run -m back_test.benchmarks [--quick] [--filter GROUP] [--update-baselines]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BASELINES_PATH = Path(__file__).parent / 'baselines.json'
+
+
+def time_case(case, repeat: int) -> float:
+    """
+    Median seconds of one `run` call over `repeat` runs, each on a fresh setup.
+    """
+    timings = []
+    for _ in range(repeat):
+        state = case.setup()
+        start = time.perf_counter()
+        case.run(state)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def load_baselines() -> Dict[str, float]:
+    if not BASELINES_PATH.exists():
+        return {}
+    with open(BASELINES_PATH) as f:
+        return json.load(f)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run the curator benchmark suite.")
+    parser.add_argument('--quick', action='store_true', help="Run a reduced parametrization")
+    parser.add_argument('--filter', default=None, help="Only run cases whose name contains this string")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per case")
+    parser.add_argument('--tolerance', type=float, default=1.5, help="Slowdown ratio reported as a regression")
+    parser.add_argument('--update-baselines', action='store_true', help="Write the timings as new baselines")
+    parser.add_argument('--work-dir', default=None, help="Directory for generated benchmark data")
+    args = parser.parse_args(argv)
+
+    from back_test.benchmarks.suite import QUICK_CONFIG, SuiteConfig, build_suite
+
+    config = QUICK_CONFIG if args.quick else SuiteConfig()
+    work_dir = Path(args.work_dir or config.work_dir).absolute()
+    config.work_dir = str(work_dir)
+    # keep the loader's dump files out of the working directory
+    os.environ['DATA_PATH'] = str(work_dir)
+
+    baselines = load_baselines()
+    results: Dict[str, float] = {}
+    regressions = []
+    print(f"{'case':<55} {'seconds':>10} {'per op':>12} {'baseline':>10} {'ratio':>7}")
+    try:
+        for case in build_suite(config):
+            if args.filter and args.filter not in case.name:
+                continue
+            seconds = time_case(case, args.repeat)
+            results[case.name] = seconds
+            baseline = baselines.get(case.name)
+            ratio = seconds / baseline if baseline else None
+            flag = ''
+            if ratio is not None and ratio > args.tolerance:
+                regressions.append(case.name)
+                flag = ' REGRESSION'
+            print(f"{case.name:<55} {seconds:>10.4f} {seconds / case.operations:>12.6f} "
+                  f"{baseline if baseline else float('nan'):>10.4f} {ratio if ratio else float('nan'):>7.2f}{flag}")
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.update_baselines:
+        baselines.update(results)
+        with open(BASELINES_PATH, 'w') as f:
+            json.dump(dict(sorted(baselines.items())), f, indent=2)
+            f.write('\n')
+        print(f"Baselines written to {BASELINES_PATH}")
+    elif regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.tolerance}x: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Benchmark cases for the backtest hot paths.
+
+Each case is parametrized by the number of vaults and the horizon length, so that running
+the suite gives scaling curves as well as single timings.
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, UTC
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+from fractal.core.base import NamedEntity, Observation
+
+from back_test.constants import META_VAULT_NAME
+from back_test.entities.logarithm_vault import LogarithmVault, LogarithmVaultGlobalState
+from back_test.entities.meta_vault import MetaVault, MetaVaultGlobalState
+
+
+@dataclass
+class BenchmarkCase:
+    """
+    A single parametrized benchmark.
+
+    Attributes:
+        group (str): Benchmarked component
+        params (Dict): Parametrization of the case
+        setup (Callable): Builds the state passed to `run`, not timed
+        run (Callable): Timed function
+        operations (int): Number of operations performed by one `run` call
+    """
+    group: str
+    params: Dict[str, int]
+    setup: Callable[[], Any]
+    run: Callable[[Any], None]
+    operations: int = 1
+
+    @property
+    def name(self) -> str:
+        return f"{self.group}[{','.join(f'{k}={v}' for k, v in self.params.items())}]"
+
+
+@dataclass
+class SuiteConfig:
+    vault_counts: List[int] = field(default_factory=lambda: [2, 8, 32])
+    horizons_days: List[int] = field(default_factory=lambda: [90, 365])
+    predict_steps: List[int] = field(default_factory=lambda: [10, 40])
+    work_dir: str = 'bench_data'
+
+
+QUICK_CONFIG = SuiteConfig(vault_counts=[2, 8], horizons_days=[30], predict_steps=[5])
+
+
+def vault_names(n: int) -> List[str]:
+    return [f"vault{i}" for i in range(n)]
+
+
+def write_vault_data(base_path: Path, names: List[str], days: int, seed: int = 0) -> None:
+    """
+    Write hourly `strategy_backtest_data.csv` files with the columns the loader uses.
+    Existing files are kept, so repeated setups do not rewrite the data.
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range('2024-01-01', periods=days * 24, freq='h')
+    for name in names:
+        path = base_path / name
+        if (path / 'strategy_backtest_data.csv').exists():
+            continue
+        path.mkdir(parents=True, exist_ok=True)
+        net_balance = 1_000_000 * np.exp(np.cumsum(rng.normal(0.00002, 0.001, len(timestamps))))
+        pd.DataFrame({'timestamp': timestamps, 'net_balance': net_balance}).to_csv(
+            path / 'strategy_backtest_data.csv', index=False
+        )
+
+
+def synthetic_observations(names: List[str], steps: int, seed: int = 0) -> List[Observation]:
+    """
+    Daily observations with random walk share prices and small meta vault flows.
+    """
+    rnd = random.Random(seed)
+    share_prices = {name: 1.0 for name in names}
+    observations = []
+    for i in range(steps):
+        states = {}
+        for name in names:
+            share_prices[name] *= 1 + rnd.gauss(0.0005, 0.005)
+            assets = rnd.gauss(0, 500)
+            states[name] = LogarithmVaultGlobalState(
+                share_price=share_prices[name],
+                idle_assets=assets if assets > 0 else 0.0,
+                pending_withdrawals=-assets if assets < 0 else 0.0,
+            )
+        flow = rnd.uniform(-100, 200)
+        states[META_VAULT_NAME] = MetaVaultGlobalState(
+            deposits=flow if flow > 0 else 0.0,
+            withdrawals=-flow if flow < 0 else 0.0,
+        )
+        observations.append(Observation(timestamp=datetime(2024, 1, 1, tzinfo=UTC) + timedelta(days=i), states=states))
+    return observations
+
+
+def _loader_cases(config: SuiteConfig) -> List[BenchmarkCase]:
+    from back_test.build_observations import build_observations
+    from back_test.loader.simulations.vaults_loader import VaultsLoader
+
+    cases = []
+    for n in config.vault_counts:
+        for days in config.horizons_days:
+            base_path = Path(config.work_dir) / f"data_{n}_{days}"
+            names = vault_names(n)
+
+            def setup_loader(base_path=base_path, names=names, days=days):
+                write_vault_data(base_path, names, days)
+                return VaultsLoader(1_000_000, names, META_VAULT_NAME, str(base_path))
+
+            def setup_observations(setup_loader=setup_loader):
+                setup_loader().run()
+
+            cases.append(BenchmarkCase(
+                group='loader.read', params={'vaults': n, 'days': days},
+                setup=setup_loader, run=lambda loader: loader.read(with_run=True),
+            ))
+            cases.append(BenchmarkCase(
+                group='build_observations', params={'vaults': n, 'days': days},
+                setup=setup_observations,
+                run=lambda _, names=names, base_path=base_path: build_observations(
+                    with_run=False, log_vault_names=names, data_base_path=str(base_path)
+                ),
+            ))
+    return cases
+
+
+def _entity_cases(config: SuiteConfig) -> List[BenchmarkCase]:
+    operations = 1000
+
+    def setup_log_vault():
+        vault = LogarithmVault()
+        vault.update_state(LogarithmVaultGlobalState(share_price=1.1, idle_assets=500.0, pending_withdrawals=0.0))
+        return vault
+
+    def run_log_vault(vault: LogarithmVault):
+        for _ in range(operations):
+            vault.preview_deposit(1000.0)
+            vault.action_deposit(1000.0)
+            vault.preview_redeem(100.0)
+            vault.action_redeem(100.0)
+            vault.preview_withdraw(100.0)
+            vault.action_withdraw(100.0)
+
+    cases = [BenchmarkCase(group='logarithm_vault.actions', params={'ops': operations},
+                           setup=setup_log_vault, run=run_log_vault, operations=operations)]
+
+    for n in config.vault_counts:
+        def setup_meta_vault(n=n):
+            targets = []
+            for name in vault_names(n):
+                vault = LogarithmVault()
+                vault.update_state(LogarithmVaultGlobalState(share_price=1.1, idle_assets=0.0, pending_withdrawals=100.0))
+                targets.append(NamedEntity(entity_name=name, entity=vault))
+            meta_vault = MetaVault()
+            meta_vault.action_deposit(1_000_000)
+            return meta_vault, targets
+
+        def run_meta_vault(state, n=n):
+            meta_vault, targets = state
+            for _ in range(10):
+                meta_vault.action_allocate_assets(targets, [meta_vault.idle_assets / n * 0.999] * n)
+                meta_vault.action_withdraw_allocations(targets, [t.entity.balance / 2 for t in targets])
+                meta_vault.action_redeem_allocations(targets, [t.entity.shares for t in targets])
+                _ = meta_vault.total_assets
+
+        cases.append(BenchmarkCase(group='meta_vault.actions', params={'vaults': n},
+                                   setup=setup_meta_vault, run=run_meta_vault, operations=10))
+    return cases
+
+
+def _validation_cases(config: SuiteConfig) -> List[BenchmarkCase]:
+    from curator.utils.validate_actions import (validate_allocation, validate_withdraw,
+                                                validate_redeem, validate_reallocation)
+    operations = 1000
+    cases = []
+    for n in config.vault_counts:
+        names = vault_names(n)
+        amounts = [1.0] * n
+        balances = {name: 2.0 for name in names}
+        weights = [1 / 2 ** (i + 1) for i in range(n - 1)] + [1 / 2 ** (n - 1)]
+
+        def run_validation(_, names=names, amounts=amounts, balances=balances, weights=weights):
+            for _ in range(operations):
+                validate_allocation(float(len(names)), names, amounts)
+                validate_withdraw(float(len(names)), names, amounts, balances)
+                validate_redeem(names, amounts, balances)
+                validate_reallocation(names, weights)
+
+        cases.append(BenchmarkCase(group='validate_actions', params={'vaults': n},
+                                   setup=lambda: None, run=run_validation, operations=operations))
+    return cases
+
+
+def stub_responder(strategy) -> Callable:
+    """
+    Deterministic agent policy: no reallocation, even allocation and pro-rata withdrawals,
+    also as a combined decision plan.
+    """
+    def allocations() -> Dict[str, List]:
+        names = strategy._params.VAULT_NAMES
+        amount = strategy.get_entity(META_VAULT_NAME).idle_assets / len(names) * (1 - 1e-9)
+        return {'vault_names': names, 'amounts': [amount] * len(names)}
+
+    def withdrawals() -> Dict[str, List]:
+        names = strategy._params.VAULT_NAMES
+        balances = {name: strategy.get_entity(name).balance for name in names if strategy.get_entity(name).balance > 0}
+        total = sum(balances.values())
+        pending = strategy.get_entity(META_VAULT_NAME).pending_withdrawals
+        amounts = [min(balance, pending * balance / total * (1 + 1e-9)) for balance in balances.values()]
+        return {'vault_names': list(balances.keys()), 'amounts': amounts}
+
+    def respond(output_type: str, items) -> Dict[str, Any]:
+        if output_type == 'ReallocationAction':
+            return {
+                'action_needed': False,
+                'actions': {'redeem_vault_names': [], 'redeem_share_amounts': [],
+                            'allocation_vault_names': [], 'allocation_weights': []},
+                'reasoning': 'stub',
+            }
+        if output_type == 'AllocationAction':
+            return {**allocations(), 'reasoning': 'stub'}
+        if output_type == 'WithdrawAction':
+            return {**withdrawals(), 'reasoning': 'stub'}
+        if output_type == 'DecisionPlan':
+            meta_vault: MetaVault = strategy.get_entity(META_VAULT_NAME)
+            withdraw = withdrawals() if meta_vault.pending_withdrawals > 0 else {'vault_names': [], 'amounts': []}
+            allocation = allocations() if meta_vault.idle_assets > 0 else {'vault_names': [], 'amounts': []}
+            return {
+                'redeem_vault_names': [], 'redeem_share_amounts': [],
+                'withdraw_vault_names': withdraw['vault_names'], 'withdraw_amounts': withdraw['amounts'],
+                'allocation_vault_names': allocation['vault_names'], 'allocation_amounts': allocation['amounts'],
+                'reasoning': 'stub',
+            }
+        raise ValueError(f"The stub cannot answer {output_type}")
+    return respond
+
+
+def build_stub_strategy(names: List[str], **params):
+    """
+    CuratorStrategy that decides on every step with the stub model.
+    """
+    from back_test.curator_strategy import CuratorStrategy, CuratorStrategyParams
+    from back_test.benchmarks.stub_model import StubModel, StubModelProvider
+    from back_test.observations.columnar_storage import ColumnarObservationsStorage
+
+    holder = {}
+    model = StubModel(lambda output_type, items: holder['respond'](output_type, items), names)
+    strategy = CuratorStrategy(
+        params=CuratorStrategyParams(**{'WINDOW_SIZE': 0, 'REQUEST_INTERVAL': 0, 'VAULT_NAMES': names, **params}),
+        observations_storage=ColumnarObservationsStorage(),
+        model_provider=StubModelProvider(model),
+    )
+    holder['respond'] = stub_responder(strategy)
+    return strategy
+
+
+def _strategy_cases(config: SuiteConfig) -> List[BenchmarkCase]:
+    from agents import set_tracing_disabled
+    set_tracing_disabled(True)
+
+    cases = []
+    for n in config.vault_counts:
+        for steps in config.predict_steps:
+            names = vault_names(n)
+
+            def setup_strategy(names=names, steps=steps):
+                return build_stub_strategy(names), synthetic_observations(names, steps)
+
+            def run_strategy(state):
+                strategy, observations = state
+                strategy.run(observations)
+
+            cases.append(BenchmarkCase(group='strategy.predict', params={'vaults': n, 'steps': steps},
+                                       setup=setup_strategy, run=run_strategy, operations=steps))
+    return cases
+
+
+def build_suite(config: SuiteConfig) -> List[BenchmarkCase]:
+    return _loader_cases(config) + _entity_cases(config) + _validation_cases(config) + _strategy_cases(config)
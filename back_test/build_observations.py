@@ -5,22 +5,34 @@ import pandas as pd
 from back_test.entities.logarithm_vault import LogarithmVaultGlobalState
 from back_test.entities.meta_vault import MetaVaultGlobalState
 from back_test.constants import LOG_VAULT_NAMES, META_VAULT_NAME
-from back_test.loader.simulations.vaults_loader import VaultsLoader
+from back_test.loader.simulations.vaults_loader import VaultsLoader, DEFAULT_SEED
 
-def build_observations(with_run: bool = True) -> List[Observation]:
+DATA_BASE_PATH = 'back_test/data/hyperliquid'
+
+def build_observations(with_run: bool = True, log_vault_names: List[str] = LOG_VAULT_NAMES,
+                       data_base_path: str = DATA_BASE_PATH, init_balance: float = 1_000_000,
+                       seed: int = DEFAULT_SEED) -> List[Observation]:
     """
     Build observations list from strategy backtest data, grouped by day.
+
+    Args:
+        with_run (bool): Run the loader before reading the simulated data
+        log_vault_names (List[str]): Names of the Logarithm vaults to load
+        data_base_path (str): Base path to the back tested vault data
+        init_balance (float): Initial balance used to derive share prices
+        seed (int): Seed of the loader's Monte Carlo simulation of the vault flows
     
     Returns:
         List[Observation]: List of observations containing vault states for each day
     """
     observations: List[Observation] = []
-    vault_data = VaultsLoader(1_000_000, LOG_VAULT_NAMES, META_VAULT_NAME, 'back_test/data/hyperliquid').read(with_run=with_run)
+    vault_data = VaultsLoader(init_balance, log_vault_names, META_VAULT_NAME, data_base_path,
+                              seed=seed).read(with_run=with_run)
     min_length = min(len(df) for df in vault_data.values())
     for i in range(min_length):
         states = {}
         timestamp = None
-        for vault_name in LOG_VAULT_NAMES:
+        for vault_name in log_vault_names:
             df = vault_data[vault_name]
             timestamp = pd.to_datetime(df.index[i]).to_pydatetime().astimezone(UTC)
             states[vault_name] = LogarithmVaultGlobalState(
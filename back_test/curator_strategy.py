@@ -4,26 +4,54 @@ Curator Strategy Module
 This module implements a strategy for managing asset allocation across multiple logarithm vaults
 using an AI agent to make allocation decisions.
 """
+import asyncio
+import csv
+import json
+import logging
 import math
 import time
-from dataclasses import dataclass
-from agents import function_tool, Runner, Agent, trace, TResponseInputItem
-from typing import List, Dict, Tuple
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from datetime import datetime, UTC
+from pathlib import Path
+from agents import function_tool, Runner, RunResult, Agent, trace, TResponseInputItem, RunConfig, ModelProvider
+from typing import Callable, List, Dict, Tuple, Optional
 from fractal.core.base import (
     BaseStrategy, Action, BaseStrategyParams,
     ActionToTake, NamedEntity)
-from fractal.core.base.observations import ObservationsStorage, SQLiteObservationsStorage
+from fractal.core.base.observations import Observation, ObservationsStorage
 from back_test.entities.logarithm_vault import LogarithmVault, LogarithmVaultGlobalState
 from back_test.entities.meta_vault import MetaVault, MetaVaultGlobalState
+from back_test.entities.snapshot import EntitySnapshot
 from curator.agents.allocation_agent import allocation_agent, AllocationAction
 from curator.agents.withdraw_agent import withdraw_agent, WithdrawAction
 from curator.agents.reallocation_agent import reallocation_agent, ReallocationAction
 from curator.agents.analysis_agent import analysis_agent, summary_extractor
-from curator.utils.validate_actions import validate_allocation, validate_withdraw, validate_redeem, validate_reallocation
+from curator.agents.decision_agent import decision_agent, DecisionPlan
+from curator.utils.validate_actions import (validate_allocation, validate_withdraw, validate_redeem,
+                                            validate_reallocation, validate_decision)
 from back_test.constants import LOG_VAULT_NAMES, META_VAULT_NAME
 from back_test.build_observations import build_observations
+from back_test.run_store import RunStore
+from back_test.online_metrics import OnlineMetrics
+from back_test.observations.columnar_storage import ColumnarObservationsStorage
+from curator.utils.price_encoding import encode_share_price_history
+from curator.utils.shared_cache import VersionedCache
+from curator.utils.action_batching import batch_actions
+from curator.utils.feature_store import FeatureStore
+from curator.utils.cost_quotes import CostQuote, format_cost_quotes
+from curator.utils.policies import allocation_policy, withdraw_policy
+from curator.utils.triggers import (TriggerEngine, TriggerSnapshot, FlowThresholdDetector,
+                                     TrendBreakDetector, DrawdownDetector)
+from back_test.profiling import PhaseProfiler, ProfiledModelProvider, PROFILE_MODES, profile_run, timed_tool
+from back_test.model_routing import BudgetGovernor, GovernedModelProvider, ModelRouter
+from back_test.trace_export import TRACE_FORMATS, local_tracing
+
+logger = logging.getLogger(__name__)
 
 DUST = 0.000001
+DECISION_MODES = ('sequential', 'speculative', 'unified')
+TRACING_MODES = ('hosted', 'local', 'off')
 @dataclass
 class CuratorStrategyParams(BaseStrategyParams):
     """
@@ -32,9 +60,86 @@ class CuratorStrategyParams(BaseStrategyParams):
     Attributes:
         INIT_BALANCE (float): Initial balance to start with (default: 100,000)
         WINDOW_SIZE (int): Size of the observation window (default: 7)
+        VAULT_NAMES (List[str]): Names of the Logarithm vaults to manage (default: LOG_VAULT_NAMES)
+        REQUEST_INTERVAL (float): Seconds to sleep after each decision step to avoid rate limits (default: 1)
+        PROFILE (str | None): Profiling mode, one of 'phases', 'cprofile' or 'sampling'.
+            Every mode times the phases of `predict`, 'cprofile' and 'sampling' also profile the whole run (default: None)
+        PROFILE_DIR (str): Output directory of the profiles when the strategy has no logger (default: 'profiles')
+        TRACING (str): 'hosted' to send the agent traces to the OpenAI tracing backend, 'local' to write them
+            in batches to `traces.jsonl` or `traces.parquet` in the run's artifacts directory, 'off' to disable them (default: 'hosted')
+        TRACE_FORMAT (str): Format of the local traces, 'jsonl' or 'parquet' (default: 'jsonl')
+        TRACE_SAMPLE_RATE (float): Fraction of the traces written locally (default: 1.0)
+        TRACE_DIR (str): Output directory of the local traces when the strategy has no logger (default: 'traces')
+        DECISION_MODE (str): 'sequential' to run the reallocation agent before the allocation or withdraw agent,
+            'speculative' to run them concurrently and drop the allocation or withdraw result when a reallocation
+            is taken, 'unified' to let a single decision agent return a combined plan (default: 'sequential')
+        COST_QUOTES (bool): Add precomputed prices and entry/exit costs of every vault to the first
+            message of each agent run (default: True)
+        PRICE_HISTORY_ENCODING (str): 'raw' to return the share price history as (timestamp, price) pairs,
+            'compact' to return the start, step and returns in basis points (default: 'raw')
+        PRICE_HISTORY_MAX_POINTS (int): Maximum points of a compact share price history (default: 60)
+        PRICE_HISTORY_STATS (bool): Add summary statistics to a compact share price history (default: True)
+        AGENT_MODELS (Dict[str, str]): Model of each agent by agent name, e.g. {'AnalysisAgent': 'gpt-4o-mini'},
+            agents not listed keep their own model (default: {})
+        ESCALATION_MODEL (str | None): Model of the retries after a prediction failed validation,
+            None retries with the agent's model (default: None)
+        FALLBACK_MODEL (str | None): Cheaper model used once a budget is exhausted, None lets the deterministic
+            policies decide instead (default: None)
+        RUN_TOKEN_BUDGET (int | None): Total tokens of all model calls of a run (default: None)
+        STEP_TOKEN_BUDGET (int | None): Total tokens of the model calls of a decision step (default: None)
+        RUN_LATENCY_BUDGET (float | None): Seconds spent waiting for model responses in a run (default: None)
+        STEP_LATENCY_BUDGET (float | None): Seconds spent waiting for model responses in a decision step (default: None)
+        DECISION_TRIGGER (str): 'window' to consult the agents every WINDOW_SIZE + 1 observations,
+            'event' to consult them when a trigger fires (default: 'window')
+        MIN_DECISION_INTERVAL (int): Minimum observations between two triggered decisions (default: 1)
+        MAX_DECISION_INTERVAL (int | None): Observations after which a decision is taken even without a trigger,
+            None uses WINDOW_SIZE + 1 (default: None)
+        FLOW_THRESHOLD (float): Idle assets or pending withdrawals, as a fraction of the meta vault's
+            total assets, that trigger a decision (default: 0.01)
+        TREND_WINDOW (int): Number of trailing share price returns of the trend break detector, at least 2.
+            With event triggers, it is added to the feature windows the strategy updates (default: 14)
+        TREND_BREAK_Z (float): Standard deviations of a return that count as a trend break (default: 3.0)
+        DRAWDOWN_THRESHOLD (float): Drawdown of a held vault that triggers a decision (default: 0.05)
+        BATCH_ACTIONS (bool): Net opposing flows on the same vault and drop dust operations before the actions
+            are executed, with one meta vault action per operation (default: False)
+        FEATURE_WINDOWS (List[int]): Window lengths, in observations, of the rolling vault features updated on
+            every observation and served to the analysis agent by `get_vault_features`, empty to disable them (default: [])
+        ENTRY_COST_RATE (float): Entry cost rate of the Logarithm vaults, at most 0.01 (default: 0.0035)
+        EXIT_COST_RATE (float): Exit cost rate of the Logarithm vaults, at most 0.01 (default: 0.0035)
     """
     INIT_BALANCE: float = 100_000
     WINDOW_SIZE: int = 7
+    VAULT_NAMES: List[str] = field(default_factory=lambda: list(LOG_VAULT_NAMES))
+    REQUEST_INTERVAL: float = 1
+    PROFILE: Optional[str] = None
+    PROFILE_DIR: str = 'profiles'
+    TRACING: str = 'hosted'
+    TRACE_FORMAT: str = 'jsonl'
+    TRACE_SAMPLE_RATE: float = 1.0
+    TRACE_DIR: str = 'traces'
+    DECISION_MODE: str = 'sequential'
+    COST_QUOTES: bool = True
+    PRICE_HISTORY_ENCODING: str = 'raw'
+    PRICE_HISTORY_MAX_POINTS: int = 60
+    PRICE_HISTORY_STATS: bool = True
+    AGENT_MODELS: Dict[str, str] = field(default_factory=dict)
+    ESCALATION_MODEL: Optional[str] = None
+    FALLBACK_MODEL: Optional[str] = None
+    RUN_TOKEN_BUDGET: Optional[int] = None
+    STEP_TOKEN_BUDGET: Optional[int] = None
+    RUN_LATENCY_BUDGET: Optional[float] = None
+    STEP_LATENCY_BUDGET: Optional[float] = None
+    DECISION_TRIGGER: str = 'window'
+    MIN_DECISION_INTERVAL: int = 1
+    MAX_DECISION_INTERVAL: Optional[int] = None
+    FLOW_THRESHOLD: float = 0.01
+    TREND_WINDOW: int = 14
+    TREND_BREAK_Z: float = 3.0
+    DRAWDOWN_THRESHOLD: float = 0.05
+    BATCH_ACTIONS: bool = False
+    FEATURE_WINDOWS: List[int] = field(default_factory=list)
+    ENTRY_COST_RATE: float = 0.0035
+    EXIT_COST_RATE: float = 0.0035
 
 class CuratorStrategy(BaseStrategy):
     """
@@ -42,7 +147,9 @@ class CuratorStrategy(BaseStrategy):
     across multiple logarithm vaults.
     """
     def __init__(self, debug: bool = False, params: CuratorStrategyParams | None = None,
-                 observations_storage: ObservationsStorage | None = None):
+                 observations_storage: ObservationsStorage | None = None,
+                 model_provider: ModelProvider | None = None, analysis_cache: VersionedCache | None = None,
+                 feature_store: FeatureStore | None = None):
         """
         Initialize the CuratorStrategy.
 
@@ -50,14 +157,62 @@ class CuratorStrategy(BaseStrategy):
             debug (bool): Enable debug mode
             params (CuratorStrategyParams | None): Strategy parameters
             observations_storage (ObservationsStorage | None): Storage for observations
+            model_provider (ModelProvider | None): Provider resolving the agents' model names,
+                defaults to the OpenAI provider
+            analysis_cache (VersionedCache | None): Cache of the trend analyses shared by strategies that read
+                the same observations storage, e.g. the tenants of a scheduler
+            feature_store (FeatureStore | None): Vault features shared with other strategies, which the owner
+                updates, instead of a store of `FEATURE_WINDOWS` updated by the strategy. With event triggers,
+                it must keep the `TREND_WINDOW` window
         """
         self._params: CuratorStrategyParams = None  # set for type hinting
         super().__init__(params=params, debug=debug, observations_storage=observations_storage)
+        if params.DECISION_MODE not in DECISION_MODES:
+            raise ValueError(f"Unknown decision mode {params.DECISION_MODE}, expected one of {DECISION_MODES}")
+        if params.PROFILE is not None and params.PROFILE not in PROFILE_MODES:
+            raise ValueError(f"Unknown profiling mode {params.PROFILE}, expected one of {PROFILE_MODES}")
+        if params.TRACING not in TRACING_MODES:
+            raise ValueError(f"Unknown tracing mode {params.TRACING}, expected one of {TRACING_MODES}")
+        if params.TRACE_FORMAT not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format {params.TRACE_FORMAT}, expected one of {TRACE_FORMATS}")
+        self._profiler = PhaseProfiler(enabled=params.PROFILE is not None)
+        self._governor = BudgetGovernor(
+            run_tokens=params.RUN_TOKEN_BUDGET, step_tokens=params.STEP_TOKEN_BUDGET,
+            run_seconds=params.RUN_LATENCY_BUDGET, step_seconds=params.STEP_LATENCY_BUDGET
+        )
+        self._router = ModelRouter(self._governor, params.ESCALATION_MODEL, params.FALLBACK_MODEL)
+        if self._governor.enabled:
+            # account the model calls, with the OpenAI provider when no provider is given
+            model_provider = GovernedModelProvider(self._governor, model_provider, params.FALLBACK_MODEL)
+        analysis_model_provider = model_provider
+        if self._profiler.enabled:
+            # time the model calls, the analysis agent's apart since they run inside the analysis tool
+            analysis_model_provider = ProfiledModelProvider(self._profiler, model_provider, phase='analysis_model')
+            model_provider = ProfiledModelProvider(self._profiler, model_provider)
+        self._run_config = RunConfig(model_provider=model_provider) if model_provider is not None else None
+        self._analysis_run_config = RunConfig(model_provider=analysis_model_provider) if analysis_model_provider is not None else None
+        self._analysis_cache = analysis_cache
+        self._features = feature_store
+        feature_windows = list(params.FEATURE_WINDOWS)
+        if params.DECISION_TRIGGER == 'event':
+            # the trend break detector reads its returns from the store
+            feature_windows.append(params.TREND_WINDOW)
+        self._owns_features = feature_store is None and bool(feature_windows)
+        if self._owns_features:
+            self._features = FeatureStore(feature_windows)
+        # the analysis agent gets the features only when they are asked for
+        self._serves_features = feature_store is not None or bool(params.FEATURE_WINDOWS)
+        self._metrics = OnlineMetrics()
         agents = self.__create_agent()
         self._allocation_agent = agents['allocation_agent']
         self._reallocation_agent = agents['reallocation_agent']
         self._withdraw_agent = agents['withdraw_agent']
+        self._analysis_agent = agents['analysis_agent']
+        self._decision_agent = agents['decision_agent']
         self._window_size = params.WINDOW_SIZE
+        self._trigger_engine = self.__create_trigger_engine()
+        self._result_file = None
+        self._result_writer: csv.DictWriter | None = None
 
     def __create_agent(self) -> Dict[str, Agent]:
         """
@@ -106,6 +261,32 @@ class CuratorStrategy(BaseStrategy):
             
             return vault_infos
 
+        def share_price_window(vault_name: str, length: int) -> Tuple[List[datetime], List[float]]:
+            """
+            Timestamps and share prices of the most recent `length` observations of a vault.
+            """
+            if isinstance(self.observations_storage, ColumnarObservationsStorage):
+                # read the recent columns directly instead of rebuilding all observations
+                timestamps = self.observations_storage.window(vault_name, 'timestamp', length)
+                share_prices = self.observations_storage.window(vault_name, 'share_price', length)
+                return (
+                    [timestamp.replace(tzinfo=UTC) for timestamp in timestamps.astype('datetime64[us]').tolist()],
+                    share_prices.tolist()
+                )
+
+            observations = self.observations_storage.read()
+            
+            # Get only the last 2 * WINDOW_SIZE of observations
+            recent_observations = observations[-length:] if len(observations) > length else observations
+            # Filter out observations that do not contain the vault name
+            recent_observations = [observation for observation in recent_observations if vault_name in observation.states]
+            # Sort observations by timestamp in ascending order
+            recent_observations.sort(key=lambda x: x.timestamp, reverse=False)
+            return (
+                [observation.timestamp for observation in recent_observations],
+                [float(observation.states[vault_name].share_price) for observation in recent_observations]
+            )
+
         @function_tool
         def get_share_price_history(vault_name: str, length: int) -> List[Tuple[str, float]]:
             """Use to get the historical daily share price for a given Logarithm vault.
@@ -120,19 +301,64 @@ class CuratorStrategy(BaseStrategy):
                     - share_price: Share price of the vault as float
                         
             """
-            observations = self.observations_storage.read()
-            
-            # Get only the last 2 * WINDOW_SIZE of observations
-            recent_observations = observations[-length:] if len(observations) > length else observations
-            # Filter out observations that do not contain the vault name
-            recent_observations = [observation for observation in recent_observations if vault_name in observation.states]
-            # Sort observations by timestamp in ascending order
-            recent_observations.sort(key=lambda x: x.timestamp, reverse=False)
             # Get the share price history for the vault
-            return [
-                (observation.timestamp.isoformat(), float(observation.states[vault_name].share_price))
-                for observation in recent_observations
-            ]
+            timestamps, share_prices = share_price_window(vault_name, length)
+            return [(timestamp.isoformat(), share_price) for timestamp, share_price in zip(timestamps, share_prices)]
+
+        @function_tool(name_override="get_share_price_history")
+        def get_compact_share_price_history(vault_name: str, length: int) -> str:
+            """Use to get the historical daily share price for a given Logarithm vault in a compact form.
+
+            Input:
+                vault_name (str): Logarithm vault name
+                length: Number of the most recent data points
+
+            Returns:
+                str: JSON object containing:
+                    - start: Timestamp of the first point as ISO format string
+                    - step: Interval between consecutive points as ISO 8601 duration
+                    - points: Number of points
+                    - start_price: Share price at the first point
+                    - returns_bps: Return of each following point relative to the previous one, in basis points
+                    - stats: Statistics of the full history, returns in basis points per observation:
+                      mean_return_bps, volatility_bps, slope_bps (linear fit slope relative to the mean price),
+                      r_squared, max_drawdown_bps and total_return_bps
+            """
+            timestamps, share_prices = share_price_window(vault_name, length)
+            return encode_share_price_history(
+                timestamps, share_prices,
+                max_points=self._params.PRICE_HISTORY_MAX_POINTS,
+                with_stats=self._params.PRICE_HISTORY_STATS
+            )
+
+        @function_tool
+        def get_vault_features(vault_names: List[str]) -> str:
+            """Use to get rolling share price features of Logarithm vaults as of the latest observation.
+
+            Input:
+                vault_names (List[str]): Logarithm vault names
+
+            Returns:
+                str: JSON object by vault name, with the share_price, the last return, the drawdown from the
+                    all-time peak and the number of observations, and for each window length W in observations:
+                    slope_W (linear fit slope per observation relative to the mean price), r_squared_W, mean_return_W,
+                    ewma_return_W, volatility_W (of the simple returns) and drawdown_W (from the window's peak)
+            """
+            features = {}
+            for vault_name in vault_names:
+                latest = self._features.latest(vault_name.lower())
+                if latest is not None:
+                    latest["timestamp"] = latest["timestamp"].isoformat()
+                    # features of too short histories are NaN, which is no valid JSON
+                    latest = {name: value if isinstance(value, str) else None if math.isnan(value) else float(f"{value:.6g}")
+                              for name, value in latest.items()}
+                features[vault_name] = latest
+            return json.dumps(features)
+
+        if self._params.PRICE_HISTORY_ENCODING == 'compact':
+            get_share_price_history = get_compact_share_price_history
+        elif self._params.PRICE_HISTORY_ENCODING != 'raw':
+            raise ValueError(f"Unknown price history encoding {self._params.PRICE_HISTORY_ENCODING}, expected 'raw' or 'compact'")
         
         # @function_tool
         # def allocate_action_validation(vault_names: list[str], amounts: list[float]) -> str:
@@ -144,23 +370,105 @@ class CuratorStrategy(BaseStrategy):
         #     """
         #     return "Validation successful"
         
-        analysis_agent_with_tools = analysis_agent.clone(tools=[get_share_price_history])
-        analysis_tool = analysis_agent_with_tools.as_tool(
-            tool_name="share_price_trend_analysis",
-            tool_description="Use to get performance trends of given logarithm vaults which are separated by commas.",
-            custom_output_extractor=summary_extractor
+        get_logarithm_vault_infos = timed_tool(get_logarithm_vault_infos, self._profiler)
+        get_share_price_history = timed_tool(get_share_price_history, self._profiler)
+
+        agent_models = self._params.AGENT_MODELS
+        unknown_agents = set(agent_models) - {agent.name for agent in (
+            allocation_agent, withdraw_agent, reallocation_agent, analysis_agent, decision_agent)}
+        if unknown_agents:
+            raise ValueError(f"Unknown agents {sorted(unknown_agents)} in AGENT_MODELS")
+
+        analysis_tools = [get_share_price_history]
+        if self._serves_features:
+            analysis_tools.append(timed_tool(get_vault_features, self._profiler))
+        analysis_agent_with_tools = analysis_agent.clone(
+            tools=analysis_tools, model=agent_models.get(analysis_agent.name, analysis_agent.model))
+
+        @function_tool(
+            name_override="share_price_trend_analysis",
+            description_override="Use to get performance trends of given logarithm vaults which are separated by commas."
         )
+        async def analysis_tool(input: str) -> str:
+            async def analyze() -> str:
+                # like `Agent.as_tool`, but the analysis agent runs with the strategy's model provider
+                output = await Runner.run(analysis_agent_with_tools, input, run_config=self._analysis_run_config)
+                return await summary_extractor(output)
+
+            if self._analysis_cache is None:
+                return await analyze()
+            # the analysis only depends on the shared share prices, so equal requests share one result
+            key = (
+                'share_price_trend_analysis',
+                tuple(sorted({vault_name.strip().lower() for vault_name in input.split(',') if vault_name.strip()})),
+                str(analysis_agent_with_tools.model), self._params.PRICE_HISTORY_ENCODING,
+                self._params.PRICE_HISTORY_MAX_POINTS, self._params.PRICE_HISTORY_STATS,
+            )
+            return await self._analysis_cache.get_or_compute(key, analyze)
+
+        analysis_tool = timed_tool(analysis_tool, self._profiler)
 
-        allocation_agent_with_tools = allocation_agent.clone(tools=[get_logarithm_vault_infos, analysis_tool])
-        withdraw_agent_with_tools = withdraw_agent.clone(tools=[get_logarithm_vault_infos, analysis_tool])
-        reallocation_agent_with_tools = reallocation_agent.clone(tools=[get_logarithm_vault_infos, analysis_tool])
+        def with_tools(agent: Agent) -> Agent:
+            return agent.clone(tools=[get_logarithm_vault_infos, analysis_tool],
+                               model=agent_models.get(agent.name, agent.model))
+
+        allocation_agent_with_tools = with_tools(allocation_agent)
+        withdraw_agent_with_tools = with_tools(withdraw_agent)
+        reallocation_agent_with_tools = with_tools(reallocation_agent)
+        decision_agent_with_tools = with_tools(decision_agent)
 
         return {
             "allocation_agent": allocation_agent_with_tools,
             "withdraw_agent": withdraw_agent_with_tools,
-            "reallocation_agent": reallocation_agent_with_tools
+            "reallocation_agent": reallocation_agent_with_tools,
+            "analysis_agent": analysis_agent_with_tools,
+            "decision_agent": decision_agent_with_tools
         }
 
+    def __create_trigger_engine(self) -> TriggerEngine | None:
+        """
+        Create the trigger engine of the 'event' decision mode, None in 'window' mode.
+        """
+        if self._params.DECISION_TRIGGER == 'window':
+            return None
+        if self._params.DECISION_TRIGGER != 'event':
+            raise ValueError(f"Unknown decision trigger {self._params.DECISION_TRIGGER}, expected 'window' or 'event'")
+        max_interval = self._params.MAX_DECISION_INTERVAL
+        return TriggerEngine(
+            detectors=[
+                FlowThresholdDetector(threshold=self._params.FLOW_THRESHOLD, min_amount=DUST),
+                TrendBreakDetector(features=self._features, window=self._params.TREND_WINDOW,
+                                   z_score=self._params.TREND_BREAK_Z),
+                DrawdownDetector(threshold=self._params.DRAWDOWN_THRESHOLD),
+            ],
+            min_interval=self._params.MIN_DECISION_INTERVAL,
+            max_interval=max_interval if max_interval is not None else self._params.WINDOW_SIZE + 1,
+        )
+
+    @property
+    def agent_models(self) -> Dict[str, str]:
+        """
+        Model name used by each agent.
+        """
+        agents = [self._allocation_agent, self._withdraw_agent, self._reallocation_agent, self._analysis_agent]
+        if self._params.DECISION_MODE == 'unified':
+            agents = [self._decision_agent, self._analysis_agent]
+        return {agent.name: str(agent.model) for agent in agents}
+
+    @property
+    def governor(self) -> BudgetGovernor:
+        """
+        Token and latency accounting of the model calls, empty unless a budget is set.
+        """
+        return self._governor
+
+    @property
+    def profiler(self) -> PhaseProfiler:
+        """
+        Phase timings of `predict`, empty unless `PROFILE` is set.
+        """
+        return self._profiler
+
     def set_up(self):
         """
         Set up the initial state of the strategy by:
@@ -168,11 +476,159 @@ class CuratorStrategy(BaseStrategy):
         2. Depositing initial balance into the meta vault
         """
         self.register_entity(NamedEntity(entity_name=META_VAULT_NAME, entity=MetaVault()))
-        for vault_name in LOG_VAULT_NAMES:
-            self.register_entity(NamedEntity(entity_name=vault_name, entity=LogarithmVault()))
+        for vault_name in self._params.VAULT_NAMES:
+            self.register_entity(NamedEntity(entity_name=vault_name, entity=LogarithmVault(
+                entry_cost_rate=self._params.ENTRY_COST_RATE, exit_cost_rate=self._params.EXIT_COST_RATE)))
         meta_vault = self.get_entity(META_VAULT_NAME)
         meta_vault.action_deposit(self._params.INIT_BALANCE)
 
+    def run(self, observations: List[Observation]):
+        """
+        Run the strategy and, when `PROFILE` is set, write the profiles to the run's artifacts
+        directory (or `PROFILE_DIR` without a logger):
+        - `phases.json`: count, total, mean and max seconds of each phase of `predict`
+        - `profile.prof`: cProfile stats, for snakeviz or pstats ('cprofile')
+        - `profile.folded`: folded stacks, for flamegraph.pl or speedscope ('sampling')
+        With `TRACING='local'`, the agent traces are written to `traces.jsonl` or `traces.parquet` in the
+        same directory (or `TRACE_DIR`). With a budget set, the model usage of the run is written to the debug log.
+        The result rows of a debug run are written to `result.csv`, closed when the run ends so that the next
+        run starts a new file.
+        """
+        with ExitStack() as stack:
+            stack.callback(self.__close_result_file)
+            if self._params.TRACING == 'local':
+                trace_path = self.__output_dir(self._params.TRACE_DIR) / f"traces.{self._params.TRACE_FORMAT}"
+                trace_processor = stack.enter_context(
+                    local_tracing(trace_path, self._params.TRACE_FORMAT, self._params.TRACE_SAMPLE_RATE))
+            if self._params.PROFILE is not None:
+                stack.enter_context(profile_run(self._params.PROFILE, self.__output_dir(self._params.PROFILE_DIR)))
+            result = super().run(observations)
+
+        if self._params.TRACING == 'local':
+            self._debug(f"Traces: {trace_processor.written} spans written to {trace_path}, {trace_processor.dropped} dropped")
+        if self._params.PROFILE is not None:
+            output_dir = self.__output_dir(self._params.PROFILE_DIR)
+            output_dir.mkdir(parents=True, exist_ok=True)
+            self._profiler.write(output_dir / 'phases.json')
+            self._debug(f"Phase timings:\n{self._profiler.report()}")
+        if self._governor.enabled:
+            self._debug(f"Model usage:\n{self._governor.report()}")
+        return result
+
+    def update_features(self, observation: Observation):
+        """
+        Add the share prices of the observation to the feature store, unless the store is shared and
+        updated by its owner.
+        """
+        if not self._owns_features:
+            return
+        self._features.update(observation.timestamp, {
+            name: state.share_price for name, state in observation.states.items()
+            if isinstance(state, LogarithmVaultGlobalState)
+        })
+
+    @property
+    def features(self) -> FeatureStore | None:
+        return self._features
+
+    def update_metrics(self, timestamp: datetime):
+        """
+        Add the current state of the entities to the online metrics.
+        """
+        entities = self.get_all_available_entities()
+        meta_vault: MetaVault = entities[META_VAULT_NAME]
+        self._metrics.update(
+            timestamp, net_balance=sum(entity.balance for entity in entities.values()),
+            total_supply=meta_vault.total_supply,
+            vaults={name: entity for name, entity in entities.items() if isinstance(entity, LogarithmVault)}
+        )
+
+    @property
+    def metrics(self) -> OnlineMetrics:
+        """
+        Performance metrics of the run so far, updated after every step.
+        """
+        return self._metrics
+
+    def snapshot_entities(self) -> EntitySnapshot:
+        """
+        Copy-on-write snapshot of the entities, to simulate candidate actions on forks of it
+        without changing the strategy's state.
+        """
+        return EntitySnapshot.capture(self.get_all_available_entities())
+
+    def __output_dir(self, default: str) -> Path:
+        """
+        The run's artifacts directory, `default` when the strategy has no logger.
+        """
+        return Path(self.logger.base_artifacts_path if self.logger is not None else default)
+
+    def step(self, observation: Observation):
+        """
+        Take a step in the simulation and, in debug mode, append the resulting state row
+        to `result.csv` in the run's artifacts directory so that the dashboard can follow
+        a backtest while it is still running.
+        """
+        self.update_features(observation)
+        super().step(observation)
+        self.update_metrics(observation.timestamp)
+        if self.logger is not None:
+            self.__append_result_row(observation)
+
+    def __append_result_row(self, observation: Observation):
+        """
+        Append one row in the same layout as `StrategyResult.to_dataframe()`.
+        """
+        entities = self.get_all_available_entities()
+        row = {'timestamp': observation.timestamp}
+        for entity_name, entity in entities.items():
+            for key, value in entity.internal_state.__dict__.items():
+                row[f"{entity_name}_{key}"] = value
+        for entity_name, entity in entities.items():
+            for key, value in entity.global_state.__dict__.items():
+                row[f"{entity_name}_{key}"] = value
+        balances = {f"{entity_name}_balance": entity.balance for entity_name, entity in entities.items()}
+        row.update(balances)
+        row['net_balance'] = sum(balances.values())
+
+        if self._result_writer is None:
+            self._result_file = open(f"{self.logger.base_artifacts_path}/result.csv", 'w', newline='')
+            self._result_writer = csv.DictWriter(self._result_file, fieldnames=list(row.keys()))
+            self._result_writer.writeheader()
+        self._result_writer.writerow(row)
+        self._result_file.flush()
+
+    def __close_result_file(self):
+        if self._result_file is not None:
+            self._result_file.close()
+        self._result_file = None
+        self._result_writer = None
+
+    def should_decide(self) -> bool:
+        """
+        Whether to consult the agents on the current observation, according to `DECISION_TRIGGER`.
+        Call once per observation, since it advances the decision schedule.
+        """
+        if self._trigger_engine is None:
+            if self._window_size == 0:
+                self._window_size = self._params.WINDOW_SIZE
+                return True
+            self._window_size -= 1
+            return False
+
+        meta_vault: MetaVault = self.get_entity(META_VAULT_NAME)
+        vaults: Dict[str, LogarithmVault] = {name: self.get_entity(name) for name in self._params.VAULT_NAMES}
+        reasons = self._trigger_engine.update(TriggerSnapshot(
+            idle_assets=meta_vault.idle_assets,
+            pending_withdrawals=meta_vault.pending_withdrawals,
+            total_assets=meta_vault.total_assets,
+            share_prices={name: vault.global_state.share_price for name, vault in vaults.items()},
+            balances={name: vault.balance for name, vault in vaults.items()},
+        ))
+        if reasons:
+            self._debug(f"Decision triggered: {'; '.join(reasons)}")
+        return bool(reasons)
+
     def predict(self, *args, **kwargs) -> List[ActionToTake]:
         """
         Make predictions about asset allocation actions based on current market conditions.
@@ -182,186 +638,468 @@ class CuratorStrategy(BaseStrategy):
         """
         meta_vault: MetaVault = self.get_entity(META_VAULT_NAME)
         meta_vault_state: MetaVaultGlobalState = meta_vault.global_state
-        if meta_vault_state.deposits > 0:
-            meta_vault.action_deposit(meta_vault_state.deposits)
-        elif meta_vault_state.withdrawals > 0:
-            assets = min(meta_vault_state.withdrawals, meta_vault.total_assets)
-            meta_vault.action_withdraw(assets)
-
-        if self._window_size == 0:
-            # predict actions
-            actions = []
-
-            # reallocation check
-            msg = f"Share holdings for each vault:\n "
-            balances: dict[str, float] = {}
-            for vault_name in LOG_VAULT_NAMES:
-                vault: LogarithmVault = self.get_entity(vault_name)
-                msg += f"- `{vault_name}`: {vault.shares} \n"
-                balances[vault_name] = vault.shares
-                    
-            input_items: list[TResponseInputItem] = [{"content": msg, "role": "user"}]
-
-            with trace("Reallocation with Feedback"):
-                while True:
-                    res = Runner.run_sync(
-                        self._reallocation_agent,
-                        input_items
-                    )
-                    input_items = res.to_input_list()
-                    reallocation_prediction: ReallocationAction = res.final_output
+        with self._profiler.phase('meta_vault_flows'):
+            if meta_vault_state.deposits > 0:
+                meta_vault.action_deposit(meta_vault_state.deposits)
+            elif meta_vault_state.withdrawals > 0:
+                assets = min(meta_vault_state.withdrawals, meta_vault.total_assets)
+                meta_vault.action_withdraw(assets)
 
-                    if not reallocation_prediction.action_needed:
-                        break
+        if not self.should_decide():
+            return []
+
+        # run all agent calls of the step on one event loop, like Runner.run_sync
+        actions = asyncio.get_event_loop().run_until_complete(self.decide())
+        if self._params.BATCH_ACTIONS and actions:
+            actions = batch_actions(actions, self.get_entity, DUST)
+            for action in actions:
+                vault_names = [target.entity_name for target in action.action.args['targets']]
+                self._debug(f"Batched {action.action.action}: vault_names={vault_names} amounts={action.action.args['amounts']}")
+        # sleep to avoid rate limit
+        time.sleep(self._params.REQUEST_INTERVAL)
+        return actions
+
+    def __cost_quotes(self) -> str:
+        """
+        Cost quote block of the agents' first message, computed with the vaults' previews.
+        Empty when `COST_QUOTES` is disabled.
+        """
+        if not self._params.COST_QUOTES:
+            return ""
+        quotes = []
+        for vault_name in self._params.VAULT_NAMES:
+            vault: LogarithmVault = self.get_entity(vault_name)
+            share_price = vault.global_state.share_price
+            holding_value = vault.preview_redeem(vault.shares)
+            # costs of one more asset beyond the cost-free pending withdrawals and idle assets
+            entry_base, exit_base = vault.pending_withdrawals, vault.idle_assets
+            entry_cost_per_unit = 1 - (vault.preview_deposit(entry_base + 1) - vault.preview_deposit(entry_base)) * share_price
+            exit_cost_per_unit = (vault.preview_withdraw(exit_base + 1) - vault.preview_withdraw(exit_base)) * share_price - 1
+            quotes.append(CostQuote(
+                vault_name=vault_name,
+                share_price=share_price,
+                idle_assets=vault.idle_assets,
+                pending_withdrawals=vault.pending_withdrawals,
+                shares=vault.shares,
+                holding_value=holding_value,
+                full_exit_cost=vault.shares * share_price - holding_value,
+                entry_cost_per_unit=entry_cost_per_unit,
+                exit_cost_per_unit=exit_cost_per_unit,
+            ))
+        return "\n\n" + format_cost_quotes(quotes)
+
+    def __asset_balances(self) -> Dict[str, float]:
+        return {vault_name: self.get_entity(vault_name).balance for vault_name in self._params.VAULT_NAMES}
+
+    async def __run_agent(self, agent: Agent, input_items: list[TResponseInputItem], attempt: int,
+                          log: Callable[[str], None]) -> RunResult | None:
+        """
+        Run an agent on the model picked by the router. Returns None when the deterministic
+        policy should decide instead.
+        """
+        model = self._router.route(str(agent.model), attempt)
+        if model is None:
+            log(f"Budget exhausted ({self._governor.exhausted()}), {agent.name} decided by policy")
+            return None
+        if model != agent.model:
+            log(f"Routing {agent.name} to {model}")
+            agent = agent.clone(model=model)
+        return await Runner.run(agent, input_items, run_config=self._run_config)
+
+    async def decide(self) -> List[ActionToTake]:
+        """
+        Consult the agents on the current state of the entities, without the meta vault flows
+        and the decision schedule of `predict`.
+
+        Returns:
+            List[ActionToTake]: Actions on the meta vault, in execution order
+        """
+        self._governor.start_step()
+        return await self.__decide(self.get_entity(META_VAULT_NAME))
+
+    async def __decide(self, meta_vault: MetaVault) -> List[ActionToTake]:
+        """
+        Consult the agents according to `DECISION_MODE`.
+        """
+        if self._params.DECISION_MODE == 'unified':
+            return await self.__unified_actions(meta_vault)
+        if self._params.DECISION_MODE == 'speculative':
+            return await self.__speculative_actions(meta_vault)
 
+        actions = await self.__reallocation_actions(meta_vault)
+        # when no reallocation
+        if len(actions) == 0 and meta_vault.idle_assets > DUST:
+            actions = await self.__allocation_actions(meta_vault)
+        elif len(actions) == 0 and meta_vault.pending_withdrawals > DUST:
+            actions = await self.__withdraw_actions(meta_vault)
+        return actions
+
+    async def __speculative_actions(self, meta_vault: MetaVault) -> List[ActionToTake]:
+        """
+        Run the reallocation agent and the allocation or withdraw agent concurrently. The inputs of the
+        latter are known before the reallocation decision, since a reallocation without actions leaves
+        the meta vault unchanged. Its result is dropped, and its calls cancelled, when a reallocation is taken.
+        """
+        if meta_vault.idle_assets > DUST:
+            fallback, fallback_name = self.__allocation_actions, 'allocation'
+        elif meta_vault.pending_withdrawals > DUST:
+            fallback, fallback_name = self.__withdraw_actions, 'withdraw'
+        else:
+            return await self.__reallocation_actions(meta_vault)
+
+        # hold the debug lines of the speculative run back until its result is used
+        fallback_logs: List[str] = []
+        fallback_task = asyncio.ensure_future(fallback(meta_vault, log=fallback_logs.append))
+        try:
+            actions = await self.__reallocation_actions(meta_vault)
+        except BaseException:
+            fallback_task.cancel()
+            raise
+        if len(actions) > 0:
+            if not fallback_task.done():
+                fallback_task.cancel()
+            try:
+                await fallback_task
+            except (asyncio.CancelledError, Exception):
+                # the dropped run's outcome, including its errors, is irrelevant
+                pass
+            self._debug(f"Dropped speculative {fallback_name}")
+            return actions
+
+        actions = await fallback_task
+        for line in fallback_logs:
+            self._debug(line)
+        return actions
+
+    async def __reallocation_actions(self, meta_vault: MetaVault) -> List[ActionToTake]:
+        """
+        Run the reallocation agent until it needs no action or returns a valid reallocation.
+        """
+        actions = []
+
+        # reallocation check
+        msg = f"Share holdings for each vault:\n "
+        balances: dict[str, float] = {}
+        for vault_name in self._params.VAULT_NAMES:
+            vault: LogarithmVault = self.get_entity(vault_name)
+            msg += f"- `{vault_name}`: {vault.shares} \n"
+            balances[vault_name] = vault.shares
+        msg += self.__cost_quotes()
+
+        input_items: list[TResponseInputItem] = [{"content": msg, "role": "user"}]
+
+        with trace("Reallocation with Feedback", disabled=self._params.TRACING == 'off'), self._profiler.phase('reallocation'):
+            attempt = 0
+            while True:
+                res = await self.__run_agent(self._reallocation_agent, input_items, attempt, self._debug)
+                if res is None:
+                    # the policy keeps the current allocations
+                    break
+                input_items = res.to_input_list()
+                reallocation_prediction: ReallocationAction = res.final_output
+
+                if not reallocation_prediction.action_needed:
+                    break
+
+                with self._profiler.phase('validation'):
                     validation_result = validate_redeem(reallocation_prediction.actions.redeem_vault_names, reallocation_prediction.actions.redeem_share_amounts, balances)
                     if validation_result.result == 'pass':
                         validation_result = validate_reallocation(reallocation_prediction.actions.allocation_vault_names, reallocation_prediction.actions.allocation_weights)
-                        if validation_result.result == 'pass':
-                            self._debug(f"Action: reallocation, Prediction: {reallocation_prediction}")
-                            if len(reallocation_prediction.actions.redeem_vault_names) > 0 and sum(reallocation_prediction.actions.redeem_share_amounts) > 0:
-                                assets_to_redeem = [
-                                    self.get_entity(redeem_vault_name.lower()).preview_redeem(redeem_share_amount)
-                                    for (redeem_vault_name, redeem_share_amount) in zip(reallocation_prediction.actions.redeem_vault_names, reallocation_prediction.actions.redeem_share_amounts)
-                                ]
-                                total_idle = sum(assets_to_redeem) + meta_vault.idle_assets- meta_vault.pending_withdrawals
-                                actions.append(
-                                        ActionToTake(
-                                            entity_name=META_VAULT_NAME,
-                                            action=Action(
-                                                action="redeem_allocations",
-                                                args={
-                                                    'targets': [NamedEntity(entity_name=redeem_vault_name, entity=self.get_entity(redeem_vault_name.lower())) for redeem_vault_name in reallocation_prediction.actions.redeem_vault_names],
-                                                    'amounts': reallocation_prediction.actions.redeem_share_amounts
-                                                }
-                                            )
+                if validation_result.result == 'pass':
+                    self._debug(f"Action: reallocation, Prediction: {reallocation_prediction}")
+                    with self._profiler.phase('action_construction'):
+                        if len(reallocation_prediction.actions.redeem_vault_names) > 0 and sum(reallocation_prediction.actions.redeem_share_amounts) > 0:
+                            assets_to_redeem = [
+                                self.get_entity(redeem_vault_name.lower()).preview_redeem(redeem_share_amount)
+                                for (redeem_vault_name, redeem_share_amount) in zip(reallocation_prediction.actions.redeem_vault_names, reallocation_prediction.actions.redeem_share_amounts)
+                            ]
+                            total_idle = sum(assets_to_redeem) + meta_vault.idle_assets- meta_vault.pending_withdrawals
+                            actions.append(
+                                    ActionToTake(
+                                        entity_name=META_VAULT_NAME,
+                                        action=Action(
+                                            action="redeem_allocations",
+                                            args={
+                                                'targets': [NamedEntity(entity_name=redeem_vault_name, entity=self.get_entity(redeem_vault_name.lower())) for redeem_vault_name in reallocation_prediction.actions.redeem_vault_names],
+                                                'amounts': reallocation_prediction.actions.redeem_share_amounts
+                                            }
                                         )
                                     )
+                                )
 
-                                # debug the vault names and assets amounts that are going to be withdrawn
-                                self._debug(f"Action: redeem_allocations, vault_names: {reallocation_prediction.actions.redeem_vault_names}, amounts: {assets_to_redeem}")
-                                    
+                            # debug the vault names and assets amounts that are going to be withdrawn
+                            self._debug(f"Action: redeem_allocations, vault_names: {reallocation_prediction.actions.redeem_vault_names}, amounts: {assets_to_redeem}")
                                 
-                                if total_idle > 0 and len(reallocation_prediction.actions.allocation_vault_names) > 0:
-                                    assets_to_allocate = [total_idle * weight for weight in reallocation_prediction.actions.allocation_weights[:-1]]
-                                    allocated_sum = sum(assets_to_allocate)
-                                    last_allocation = total_idle - allocated_sum
-                                    assets_to_allocate.append(last_allocation)
-                                    actions.append(
-                                        ActionToTake(
-                                            entity_name=META_VAULT_NAME,
-                                            action=Action(
-                                                action="allocate_assets",
-                                                args={
-                                                    'targets': [NamedEntity(entity_name=allocation_vault_name, entity=self.get_entity(allocation_vault_name.lower())) for allocation_vault_name in reallocation_prediction.actions.allocation_vault_names],
-                                                    'amounts': assets_to_allocate
-                                                }
-                                            )
+                            
+                            if total_idle > 0 and len(reallocation_prediction.actions.allocation_vault_names) > 0:
+                                assets_to_allocate = [total_idle * weight for weight in reallocation_prediction.actions.allocation_weights[:-1]]
+                                allocated_sum = sum(assets_to_allocate)
+                                last_allocation = total_idle - allocated_sum
+                                assets_to_allocate.append(last_allocation)
+                                actions.append(
+                                    ActionToTake(
+                                        entity_name=META_VAULT_NAME,
+                                        action=Action(
+                                            action="allocate_assets",
+                                            args={
+                                                'targets': [NamedEntity(entity_name=allocation_vault_name, entity=self.get_entity(allocation_vault_name.lower())) for allocation_vault_name in reallocation_prediction.actions.allocation_vault_names],
+                                                'amounts': assets_to_allocate
+                                            }
                                         )
                                     )
+                                )
+
+                                # debug the vault names and assets amounts to which to allocate withdrawn assets
+                                self._debug(f"Action: allocate_assets, vault_names: {reallocation_prediction.actions.allocation_vault_names}, amounts: {assets_to_allocate}")
+
+                    break
+                else:
+                    self._debug(f"Action(Failed): reallocation, Prediction: {reallocation_prediction}")
+                    input_items.append({"content": f"Feedback: {validation_result.feedback}", "role": "user"})
+                    attempt += 1
+        return actions
 
-                                    # debug the vault names and assets amounts to which to allocate withdrawn assets
-                                    self._debug(f"Action: allocate_assets, vault_names: {reallocation_prediction.actions.allocation_vault_names}, amounts: {assets_to_allocate}")
-
-                            break
-                        else:
-                            self._debug(f"Action(Failed): reallocation, Prediction: {reallocation_prediction}")
-                            input_items.append({"content": f"Feedback: {validation_result.feedback}", "role": "user"})
-                    else:
-                        self._debug(f"Action(Failed): reallocation, Prediction: {reallocation_prediction}")
-                        input_items.append({"content": f"Feedback: {validation_result.feedback}", "role": "user"})
-
-            # when no reallocation
-            if len(actions) == 0 and meta_vault.idle_assets > DUST:
-                msg = f"Total asset amount to allocate is {meta_vault.idle_assets}.\n"
-                msg += f"The target vaults are {LOG_VAULT_NAMES}.\n"
-                msg += f"Sum of the output amounts must be the same as the total asset amount {meta_vault.idle_assets}"
-                input_items: list[TResponseInputItem] = [{"content": msg, "role": "user"}]
-
-                with trace("Allocation with Feedback"):
-                    while True:
-                        res = Runner.run_sync(
-                            self._allocation_agent,
-                            input_items
+    async def __allocation_actions(self, meta_vault: MetaVault,
+                                        log: Callable[[str], None] | None = None) -> List[ActionToTake]:
+        """
+        Run the allocation agent until it returns a valid allocation of the idle assets.
+        Debug lines go to `log`, by default the strategy's debug log.
+        """
+        log = log or self._debug
+        actions = []
+        msg = f"Total asset amount to allocate is {meta_vault.idle_assets}.\n"
+        msg += f"The target vaults are {self._params.VAULT_NAMES}.\n"
+        msg += f"Sum of the output amounts must be the same as the total asset amount {meta_vault.idle_assets}"
+        msg += self.__cost_quotes()
+        input_items: list[TResponseInputItem] = [{"content": msg, "role": "user"}]
+
+        with trace("Allocation with Feedback", disabled=self._params.TRACING == 'off'), self._profiler.phase('allocation'):
+            attempt = 0
+            while True:
+                res = await self.__run_agent(self._allocation_agent, input_items, attempt, log)
+                if res is None:
+                    vault_names, amounts = allocation_policy(meta_vault.idle_assets, self.__asset_balances())
+                    prediction = AllocationAction(vault_names=vault_names, amounts=amounts,
+                                                  reasoning="Model budget exhausted, decided by the deterministic policy")
+                else:
+                    input_items = res.to_input_list()
+                    prediction: AllocationAction = res.final_output
+                with self._profiler.phase('validation'):
+                    validation_result = validate_allocation(meta_vault.idle_assets, prediction.vault_names, prediction.amounts)
+                if validation_result.result == 'pass':
+                    log(f"Action: allocate_assets, Prediction: {prediction}")
+                    with self._profiler.phase('action_construction'):
+                        actions.append(
+                            ActionToTake(
+                                entity_name=META_VAULT_NAME,
+                                action=Action(
+                                    action="allocate_assets",
+                                    args={
+                                        'targets': [NamedEntity(entity_name=vault_name, entity=self.get_entity(vault_name.lower())) for vault_name in prediction.vault_names],
+                                        'amounts': prediction.amounts
+                                    }
+                                )
+                            )
                         )
-                        input_items = res.to_input_list()
-                        prediction: AllocationAction = res.final_output
-                        validation_result = validate_allocation(meta_vault.idle_assets, prediction.vault_names, prediction.amounts)
-                        if validation_result.result == 'pass':
-                            self._debug(f"Action: allocate_assets, Prediction: {prediction}")
-                            actions.append(
-                                ActionToTake(
-                                    entity_name=META_VAULT_NAME,
-                                    action=Action(
-                                        action="allocate_assets",
-                                        args={
-                                            'targets': [NamedEntity(entity_name=vault_name, entity=self.get_entity(vault_name.lower())) for vault_name in prediction.vault_names],
-                                            'amounts': prediction.amounts
-                                        }
-                                    )
+                    break
+                else:
+                    log(f"Action(Failed): allocate_assets, Prediction: {prediction}")
+                    if res is None:
+                        logger.warning(f"Deterministic allocate_assets policy failed validation, no allocate_assets action taken: "
+                                       f"{validation_result.feedback}")
+                        break
+                    input_items.append({"content": f"Feedback: {validation_result.feedback}", "role": "user"})
+                    attempt += 1
+        return actions
+
+    async def __withdraw_actions(self, meta_vault: MetaVault,
+                                      log: Callable[[str], None] | None = None) -> List[ActionToTake]:
+        """
+        Run the withdraw agent until it returns valid withdrawals covering the pending withdrawals.
+        Debug lines go to `log`, by default the strategy's debug log.
+        """
+        log = log or self._debug
+        actions = []
+        msg = f"Total asset amount to withdraw is {meta_vault.pending_withdrawals}.\n Allocated asset amount for each vault:\n "
+        balances = {}
+        for vault_name in self._params.VAULT_NAMES:
+            vault: LogarithmVault = self.get_entity(vault_name)
+            if vault.balance > 0:
+                msg += f"- `{vault_name}`: {vault.balance} \n"
+                balances[vault_name] = vault.balance
+        msg += f"\nSum of the output amounts must be the same as the total asset amount {meta_vault.pending_withdrawals}."
+        msg += self.__cost_quotes()
+        input_items: list[TResponseInputItem] = [{"content": msg, "role": "user"}]
+
+        with trace("Withdraw with Feedback", disabled=self._params.TRACING == 'off'), self._profiler.phase('withdraw'):
+            attempt = 0
+            while True:
+                res = await self.__run_agent(self._withdraw_agent, input_items, attempt, log)
+                if res is None:
+                    vault_names, amounts = withdraw_policy(meta_vault.pending_withdrawals, balances)
+                    prediction = WithdrawAction(vault_names=vault_names, amounts=amounts,
+                                                reasoning="Model budget exhausted, decided by the deterministic policy")
+                else:
+                    input_items = res.to_input_list()
+                    prediction: WithdrawAction = res.final_output
+                with self._profiler.phase('validation'):
+                    validation_result = validate_withdraw(meta_vault.pending_withdrawals, prediction.vault_names, prediction.amounts, balances)
+                if validation_result.result == 'pass':
+                    log(f"Action: withdraw_allocations, Prediction: {prediction}")
+                    with self._profiler.phase('action_construction'):
+                        actions.append(
+                            ActionToTake(
+                                entity_name=META_VAULT_NAME,
+                                action=Action(
+                                    action="withdraw_allocations",
+                                    args={
+                                        'targets': [NamedEntity(entity_name=vault_name, entity=self.get_entity(vault_name.lower())) for vault_name in prediction.vault_names],
+                                        'amounts': prediction.amounts
+                                    }
                                 )
                             )
-                            break
-                        else:
-                            self._debug(f"Action(Failed): allocate_assets, Prediction: {prediction}")
-                            input_items.append({"content": f"Feedback: {validation_result.feedback}", "role": "user"})
-
-            elif len(actions) == 0 and meta_vault.pending_withdrawals > DUST:
-                msg = f"Total asset amount to withdraw is {meta_vault.pending_withdrawals}.\n Allocated asset amount for each vault:\n "
-                balances = {}
-                for vault_name in LOG_VAULT_NAMES:
-                    vault: LogarithmVault = self.get_entity(vault_name)
-                    if vault.balance > 0:
-                        msg += f"- `{vault_name}`: {vault.balance} \n"
-                        balances[vault_name] = vault.balance
-                msg += f"\nSum of the output amounts must be the same as the total asset amount {meta_vault.pending_withdrawals}."
-                input_items: list[TResponseInputItem] = [{"content": msg, "role": "user"}]
-
-                with trace("Withdraw with Feedback"):
-                    while True:
-                        res = Runner.run_sync(
-                            self._withdraw_agent,
-                            input_items
                         )
-                        input_items = res.to_input_list()
-                        prediction: WithdrawAction = res.final_output
-                        validation_result = validate_withdraw(meta_vault.pending_withdrawals, prediction.vault_names, prediction.amounts, balances)
-                        if validation_result.result == 'pass':
-                            self._debug(f"Action: withdraw_allocations, Prediction: {prediction}")
+                    break
+                else:
+                    log(f"Action(Failed): withdraw_allocations, Prediction: {prediction}")
+                    if res is None:
+                        logger.warning(f"Deterministic withdraw_allocations policy failed validation, no withdraw_allocations action taken: "
+                                       f"{validation_result.feedback}")
+                        break
+                    input_items.append({"content": f"Feedback: {validation_result.feedback}", "role": "user"})
+                    attempt += 1
+        return actions
+
+    async def __unified_actions(self, meta_vault: MetaVault) -> List[ActionToTake]:
+        """
+        Run the decision agent until it returns a valid combined plan, and turn the plan into
+        redeem, withdraw and allocate actions executed in that order.
+        """
+        actions = []
+        share_balances: dict[str, float] = {}
+        asset_balances: dict[str, float] = {}
+        msg = f"Idle assets of the meta vault: {meta_vault.idle_assets}\n"
+        msg += f"Pending withdrawals of the meta vault: {meta_vault.pending_withdrawals}\n"
+        msg += "Share holdings and allocated asset amount for each vault:\n"
+        for vault_name in self._params.VAULT_NAMES:
+            vault: LogarithmVault = self.get_entity(vault_name)
+            share_balances[vault_name] = vault.shares
+            asset_balances[vault_name] = vault.balance
+            msg += f"- `{vault_name}`: shares {vault.shares}, allocated {vault.balance} \n"
+        msg += self.__cost_quotes()
+        input_items: list[TResponseInputItem] = [{"content": msg, "role": "user"}]
+
+        def preview_redeem(vault_name: str, shares: float) -> float:
+            return self.get_entity(vault_name).preview_redeem(shares) if shares > 0 else 0.0
+
+        with trace("Decision with Feedback", disabled=self._params.TRACING == 'off'), self._profiler.phase('decision'):
+            attempt = 0
+            while True:
+                res = await self.__run_agent(self._decision_agent, input_items, attempt, self._debug)
+                if res is None:
+                    # no redemptions, cover the pending withdrawals or allocate the idle assets
+                    withdraw_vault_names, withdraw_amounts = withdraw_policy(meta_vault.pending_withdrawals, asset_balances)
+                    allocation_vault_names, allocation_amounts = allocation_policy(meta_vault.idle_assets, asset_balances)
+                    plan = DecisionPlan(
+                        redeem_vault_names=[], redeem_share_amounts=[],
+                        withdraw_vault_names=withdraw_vault_names, withdraw_amounts=withdraw_amounts,
+                        allocation_vault_names=allocation_vault_names, allocation_amounts=allocation_amounts,
+                        reasoning="Model budget exhausted, decided by the deterministic policy"
+                    )
+                else:
+                    input_items = res.to_input_list()
+                    plan: DecisionPlan = res.final_output
+                with self._profiler.phase('validation'):
+                    validation_result = validate_decision(
+                        meta_vault.idle_assets, meta_vault.pending_withdrawals,
+                        plan.redeem_vault_names, plan.redeem_share_amounts,
+                        plan.withdraw_vault_names, plan.withdraw_amounts,
+                        plan.allocation_vault_names, plan.allocation_amounts,
+                        share_balances, asset_balances, preview_redeem
+                    )
+                if validation_result.result == 'pass':
+                    self._debug(f"Action: decision, Prediction: {plan}")
+                    with self._profiler.phase('action_construction'):
+                        redeemed_assets = sum(map(preview_redeem, plan.redeem_vault_names, plan.redeem_share_amounts))
+                        available = meta_vault.idle_assets + redeemed_assets + sum(plan.withdraw_amounts) - meta_vault.pending_withdrawals
+                        allocation_amounts = plan.allocation_amounts
+                        if sum(allocation_amounts) > available:
+                            # the agent can only estimate the redeemed value, scale down to what is available
+                            allocation_amounts = [amount * max(available, 0) / sum(allocation_amounts) for amount in allocation_amounts]
+                        for action_name, vault_names, amounts in (
+                            ("redeem_allocations", plan.redeem_vault_names, plan.redeem_share_amounts),
+                            ("withdraw_allocations", plan.withdraw_vault_names, plan.withdraw_amounts),
+                            ("allocate_assets", plan.allocation_vault_names, allocation_amounts),
+                        ):
+                            if len(vault_names) == 0 or sum(amounts) <= 0:
+                                continue
                             actions.append(
                                 ActionToTake(
                                     entity_name=META_VAULT_NAME,
                                     action=Action(
-                                        action="withdraw_allocations",
+                                        action=action_name,
                                         args={
-                                            'targets': [NamedEntity(entity_name=vault_name, entity=self.get_entity(vault_name.lower())) for vault_name in prediction.vault_names],
-                                            'amounts': prediction.amounts
+                                            'targets': [NamedEntity(entity_name=vault_name, entity=self.get_entity(vault_name.lower())) for vault_name in vault_names],
+                                            'amounts': list(amounts)
                                         }
                                     )
                                 )
                             )
-                            break
-                        else:
-                            self._debug(f"Action(Failed): withdraw_allocations, Prediction: {prediction}")
-                            input_items.append({"content": f"Feedback: {validation_result.feedback}", "role": "user"})
-            # sleep to avoid rate limit
-            time.sleep(1)
-            self._window_size = self._params.WINDOW_SIZE
-            return actions
-        else:
-            self._window_size -= 1
-            return []
+                            # same layout as the predictions of the separate agents, for the dashboard
+                            self._debug(f"Action: {action_name}, Prediction: vault_names={list(vault_names)} amounts={list(amounts)} reasoning={plan.reasoning!r}")
+                    break
+                else:
+                    self._debug(f"Action(Failed): decision, Prediction: {plan}")
+                    if res is None:
+                        logger.warning(f"Deterministic decision policy failed validation, no decision action taken: "
+                                       f"{validation_result.feedback}")
+                        break
+                    input_items.append({"content": f"Feedback: {validation_result.feedback}", "role": "user"})
+                    attempt += 1
+        return actions
 
-if __name__ == "__main__":
-    # load strategy_backtest_data.csv for each of the logarithm vaults
-    observations = build_observations(False)
+
+def run_backtest(params: CuratorStrategyParams, debug: bool = True, record: bool = True,
+                 result_path: str | None = 'result.csv', name: str | None = None,
+                 observations: List[Observation] | None = None, run_id: str | None = None):
+    """
+    Run the strategy on the back tested vault data.
+
+    Args:
+        params (CuratorStrategyParams): Strategy parameters
+        debug (bool): Enable debug mode, which writes the run's logs and artifacts
+        record (bool): Record the run in the run store
+        result_path (str | None): Path of the result CSV, not written when None
+        name (str | None): Name of the recorded run
+        observations (List[Observation] | None): Observations to run on, built from the back tested
+            vault data when None
+        run_id (str | None): Identifier of the recorded run, replacing a run recorded under it before
+
+    Returns:
+        Tuple[StrategyResult, StrategyMetrics]: Result and default metrics of the run
+    """
+    if observations is None:
+        # load strategy_backtest_data.csv for each of the logarithm vaults
+        observations = build_observations(False, log_vault_names=params.VAULT_NAMES)
     # Run the strategy with an Agent
-    params: CuratorStrategyParams = CuratorStrategyParams()
-    strategy = CuratorStrategy(debug=True, params=params,
-                                    observations_storage=SQLiteObservationsStorage())
+    strategy = CuratorStrategy(debug=debug, params=params,
+                               observations_storage=ColumnarObservationsStorage())
     result = strategy.run(observations)
-    print(result.get_default_metrics())  # show metrics
-    result.to_dataframe().to_csv('result.csv')  # save result to csv
-        
-        
-        
+    # the online metrics need no result frame, which is only built when it is written
+    metrics = strategy.metrics.strategy_metrics()
+    if result_path is None and not record:
+        return result, metrics
+    result_df = result.to_dataframe()
+    if result_path is not None:
+        result_df.to_csv(result_path)  # save result to csv
+    if record:
+        # record the run for comparison with other runs
+        RunStore().record_run(
+            result_df, params=strategy.params, models=strategy.agent_models, metrics=metrics, name=name,
+            log_path=f"{strategy.logger.logs_path}/logs.log" if strategy.logger is not None else None, run_id=run_id
+        )
+    return result, metrics
+
+if __name__ == "__main__":
+    _, metrics = run_backtest(CuratorStrategyParams())
+    print(metrics)  # show metrics
@@ -1,12 +1,22 @@
+import argparse
+import io
 import re
 import textwrap
+from collections import OrderedDict
 from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Hashable, List, Optional
 
 import dash
-from dash import dcc, html
+from dash import dcc, html, Input, Output
 import plotly.graph_objects as go
+import numpy as np
 import pandas as pd
 
+from back_test.run_store import RunStore, DEFAULT_STORE_PATH
+from curator.utils.feature_store import FeatureStore
+
 # TradingView-like style template
 TRADINGVIEW_TEMPLATE = {
     "paper_bgcolor": "#131722",
@@ -16,31 +26,137 @@ TRADINGVIEW_TEMPLATE = {
     "yaxis": {"gridcolor": "#363c4e", "title_font": {"color": "#D5D5D5"}},
 }
 
+# window, in observations, of the rolling trend and volatility charts
+FEATURE_WINDOW = 7
+
+def vault_names_of(df: pd.DataFrame) -> list[str]:
+    """
+    Names of the Logarithm vaults of a result, read from its `<vault>_share_price` columns.
+    """
+    return [column.removesuffix('_share_price') for column in df.columns
+            if column.endswith('_share_price') and column != 'meta_vault_share_price']
+
+def derive_performance_columns(df: pd.DataFrame, start_date: pd.Timestamp, vault_names: list[str]) -> pd.DataFrame:
+    """
+    Derives the share price and APR columns of the rows in `df` relative to `start_date`.
+    Rows are independent of each other, so appended rows can be derived on their own.
+    APR is calculated as: (current_share_price - 1) * (365 days / days_since_start)
+    """
+    df['meta_vault_share_price'] = df['net_balance'] / df['meta_vault_total_supply']
+    df['days_since_start'] = (df['date'] - start_date).dt.total_seconds() / (24 * 60 * 60)
+    df['meta_vault_apr'] = (df['meta_vault_share_price'] - 1) * (365 / df['days_since_start'])
+    for vault_name in vault_names:
+        df[f'{vault_name}_vault_apr'] = (df[f'{vault_name}_share_price'] - 1) * (365 / df['days_since_start'])
+    return df
+
+def derive_feature_columns(df: pd.DataFrame, features: FeatureStore, vault_names: list[str]) -> pd.DataFrame:
+    """
+    Adds the rolling trend (the slope of the share price per observation) and volatility of every vault,
+    read from `features` after adding the share prices of each row. The rows must follow the rows
+    `features` has seen, so appended rows continue the features of the previous ones.
+    """
+    trends = {vault_name: [] for vault_name in vault_names}
+    volatilities = {vault_name: [] for vault_name in vault_names}
+    share_prices = df[[f'{vault_name}_share_price' for vault_name in vault_names]].to_numpy()
+    for date, prices in zip(df['date'], share_prices):
+        features.update(date, {vault_name: price for vault_name, price in zip(vault_names, prices) if price > 0})
+        for vault_name in vault_names:
+            latest = features.at(vault_name, date)
+            trends[vault_name].append(latest[f'slope_{FEATURE_WINDOW}'] if latest is not None else np.nan)
+            volatilities[vault_name].append(latest[f'volatility_{FEATURE_WINDOW}'] if latest is not None else np.nan)
+    for vault_name in vault_names:
+        df[f'{vault_name}_trend'] = trends[vault_name]
+        df[f'{vault_name}_volatility'] = volatilities[vault_name]
+    return df
+
 def load_vaults_performance(result_file_path: str) -> pd.DataFrame:
     """
     Loads the vaults performance from a CSV file.
     And derive the performance APR for each vault based on share price.
-    APR is calculated as: (current_share_price - 1) * (365 days / days_since_start)
     """
     df = pd.read_csv(result_file_path)
     df['date'] = pd.to_datetime(df['timestamp'])
     df.sort_values(by='date', inplace=True)
-    
-    # Calculate share prices relative to start
-    df['meta_vault_share_price'] = df['net_balance'] / df['meta_vault_total_supply']
-    
-    # Calculate days since start for each row
-    df['days_since_start'] = (df['date'] - df['date'].iloc[0]).dt.total_seconds() / (24 * 60 * 60)
-    
-    # Calculate APR for each point in time
-    df['meta_vault_apr'] = (df['meta_vault_share_price'] - 1) * (365 / df['days_since_start'])
-    df['eth_vault_apr'] = (df['eth_share_price'] - 1) * (365 / df['days_since_start'])
-    df['btc_vault_apr'] = (df['btc_share_price'] - 1) * (365 / df['days_since_start'])
-    df['doge_vault_apr'] = (df['doge_share_price'] - 1) * (365 / df['days_since_start'])
-    df['pepe_vault_apr'] = (df['pepe_share_price'] - 1) * (365 / df['days_since_start'])
 
-    
-    return df
+    vault_names = vault_names_of(df)
+    df = derive_performance_columns(df, df['date'].iloc[0], vault_names)
+    return derive_feature_columns(df, FeatureStore([FEATURE_WINDOW]), vault_names)
+
+class FileTail:
+    """
+    Reads only the complete lines appended to a file since the previous read.
+    A trailing partial line is left in place until it is terminated.
+    Starts over from the beginning when the file is replaced or truncated.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.offset = 0
+        self.restarted = False
+        self._inode = None
+
+    def read_new_lines(self) -> list[str]:
+        path = Path(self.file_path)
+        self.restarted = False
+        if not path.exists():
+            return []
+        stat = path.stat()
+        if stat.st_ino != self._inode or stat.st_size < self.offset:
+            self.restarted = self._inode is not None
+            self._inode = stat.st_ino
+            self.offset = 0
+        if stat.st_size == self.offset:
+            return []
+        with open(path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read(stat.st_size - self.offset)
+        end = chunk.rfind(b'\n')
+        if end < 0:
+            return []
+        self.offset += end + 1
+        return chunk[:end + 1].decode('utf-8', errors='replace').splitlines()
+
+class ResultTail:
+    """
+    Incrementally loads a strategy result CSV.
+    Each poll parses only the appended rows and derives their APR, trend and volatility columns once,
+    the derived rows are cached in `perf_df`.
+    """
+
+    def __init__(self, result_file_path: str):
+        self._tail = FileTail(result_file_path)
+        self._header: str | None = None
+        self._start_date: pd.Timestamp | None = None
+        self._features = FeatureStore([FEATURE_WINDOW])
+        self.vault_names: list[str] = []
+        self.perf_df = pd.DataFrame()
+
+    def poll(self) -> pd.DataFrame:
+        """
+        Returns the newly appended rows with derived columns.
+        """
+        lines = self._tail.read_new_lines()
+        if self._tail.restarted:
+            self._header, self._start_date = None, None
+            self._features = FeatureStore([FEATURE_WINDOW])
+            self.vault_names = []
+            self.perf_df = pd.DataFrame()
+        if not lines:
+            return pd.DataFrame()
+        if self._header is None:
+            self._header, lines = lines[0], lines[1:]
+        if not lines:
+            return pd.DataFrame()
+
+        new_rows = pd.read_csv(io.StringIO('\n'.join([self._header] + lines)))
+        new_rows['date'] = pd.to_datetime(new_rows['timestamp'])
+        if self._start_date is None:
+            self._start_date = new_rows['date'].iloc[0]
+            self.vault_names = vault_names_of(new_rows)
+        new_rows = derive_performance_columns(new_rows, self._start_date, self.vault_names)
+        new_rows = derive_feature_columns(new_rows, self._features, self.vault_names)
+        self.perf_df = pd.concat([self.perf_df, new_rows], ignore_index=True)
+        return new_rows
 
 def wrap_text(text: str, width: int = 50) -> str:
     """
@@ -49,115 +165,159 @@ def wrap_text(text: str, width: int = 50) -> str:
     return textwrap.fill(text, width=width).replace("\n", "<br>")
 
 
+class LogActionParser:
+    """
+    Extracts agent actions from strategy log lines.
+    Keeps the parsing context (last observation and reallocation reasoning)
+    between calls so that a log can be fed in increments.
+    """
+
+    def __init__(self):
+        self.last_observation = None
+        self.last_reallocation_reasoning = ""
+
+    def feed(self, line: str) -> list[dict]:
+        new_actions = []
+        # Update last_observation if the line contains an Observation timestamp
+        if "Observation:" in line:
+            obs_match = re.search(
+                r'Observation:\s*(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})', line
+            )
+            if obs_match:
+                try:
+                    self.last_observation = datetime.strptime(
+                        obs_match.group(1), '%Y-%m-%d %H:%M:%S'
+                    )
+                except ValueError:
+                    self.last_observation = None
+        
+        # Extract both actions and reasoning from the same line
+        elif "Action:" in line and "reasoning=" in line:
+            if self.last_observation is not None:
+                # Extract all actions from the line except reallocation
+                match = re.search(
+                    r"Action:\s*(\w+),\s*Prediction:\s*vault_names=\[([^\]]+)\]\s*amounts=\[([^\]]+)\]\s*reasoning=(\"(.*?)\"|'(.*?)')",
+                    line,
+                    re.DOTALL
+                )
+
+                reallocation_math = re.search(
+                    r"Action: reallocation, Prediction: action_needed=True(.*)reasoning=(\"(.*?)\"|'(.*?)')",
+                    line,
+                    re.DOTALL
+                )
+                
+                if match:
+                    action_name = match.group(1)
+                    targets = [t.strip("'\" ") for t in match.group(2).split(',')]
+                    amounts = [float(a.strip()) for a in match.group(3).split(',')]
+                    reasoning = match.group(4).strip()
+
+                    new_actions.append({
+                        "date": self.last_observation,
+                        "action_name": action_name,
+                        "targets": targets,
+                        "amounts": amounts,
+                        "reasoning": f"{reasoning}"
+                    })
+                elif reallocation_math:
+                    self.last_reallocation_reasoning = reallocation_math.group(2).strip()
+
+        elif "Action: redeem_allocations" in line:
+            if self.last_observation is not None and self.last_reallocation_reasoning is not None:
+                match = re.search(
+                    r"Action: redeem_allocations,\s*vault_names:\s*\[([^\]]+)\],\s*amounts:\s*\[([^\]]+)\]",
+                    line,
+                    re.DOTALL
+                )
+                if match:
+                    targets = [t.strip("'\" ") for t in match.group(1).split(',')]
+                    raw_amounts = match.group(2).split(',')
+                    amounts = []
+                    for a in raw_amounts:
+                        # extract the number inside np.float64(...)
+                        num_match = re.search(r'np\.float64\(([^)]+)\)', a)
+                        if num_match:
+                            amounts.append(float(num_match.group(1)))
+                    new_actions.append({
+                        "date": self.last_observation,
+                        "action_name": "redeem_allocations",
+                        "targets": targets,
+                        "amounts": amounts,
+                        "reasoning": self.last_reallocation_reasoning
+                    })
+        elif "Action: allocate_assets" in line and "Prediction:" not in line:
+            if self.last_observation is not None:
+                match = re.search(
+                    r"Action: allocate_assets,\s*vault_names:\s*\[([^\]]+)\],\s*amounts:\s*\[([^\]]+)\]",
+                    line,
+                    re.DOTALL
+                )
+                if match:
+                    targets = [t.strip("'\" ") for t in match.group(1).split(',')]
+                    raw_amounts = match.group(2).split(',')
+                    amounts = []
+                    for a in raw_amounts:
+                        # extract the number inside np.float64(...)
+                        num_match = re.search(r'np\.float64\(([^)]+)\)', a)
+                        if num_match:
+                            amounts.append(float(num_match.group(1)))
+                    new_actions.append({
+                        "date": self.last_observation,
+                        "action_name": "allocate_assets",
+                        "targets": targets,
+                        "amounts": amounts,
+                        "reasoning": self.last_reallocation_reasoning
+                    })
+        return new_actions
+
+def build_actions_df(actions: list[dict]) -> pd.DataFrame:
+    actions_df = pd.DataFrame(actions)
+    if not actions_df.empty:
+        actions_df["date"] = pd.to_datetime(actions_df["date"])
+        actions_df["WrappedReasoning"] = actions_df["reasoning"].apply(lambda x: wrap_text(x, width=50) if x else "")
+   
+    return actions_df
+
 def parse_log_file(log_file_path: str) -> pd.DataFrame:
     actions = []
-    last_observation = None
-    last_reallocation_reasoning = ""
+    parser = LogActionParser()
 
     try:
         with open(log_file_path, 'r') as f:
             for line in f:
-                # Update last_observation if the line contains an Observation timestamp
-                if "Observation:" in line:
-                    obs_match = re.search(
-                        r'Observation:\s*(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})', line
-                    )
-                    if obs_match:
-                        try:
-                            last_observation = datetime.strptime(
-                                obs_match.group(1), '%Y-%m-%d %H:%M:%S'
-                            )
-                        except ValueError:
-                            last_observation = None
-                
-                # Extract both actions and reasoning from the same line
-                elif "Action:" in line and "reasoning=" in line:
-                    if last_observation is not None:
-                        # Extract all actions from the line except reallocation
-                        match = re.search(
-                            r"Action:\s*(\w+),\s*Prediction:\s*vault_names=\[([^\]]+)\]\s*amounts=\[([^\]]+)\]\s*reasoning=(\"(.*?)\"|'(.*?)')",
-                            line,
-                            re.DOTALL
-                        )
-
-                        reallocation_math = re.search(
-                            r"Action: reallocation, Prediction: action_needed=True(.*)reasoning=(\"(.*?)\"|'(.*?)')",
-                            line,
-                            re.DOTALL
-                        )
-                        
-                        if match:
-                            action_name = match.group(1)
-                            targets = [t.strip("'\" ") for t in match.group(2).split(',')]
-                            amounts = [float(a.strip()) for a in match.group(3).split(',')]
-                            reasoning = match.group(4).strip()
-
-                            actions.append({
-                                "date": last_observation,
-                                "action_name": action_name,
-                                "targets": targets,
-                                "amounts": amounts,
-                                "reasoning": f"{reasoning}"
-                            })
-                        elif reallocation_math:
-                            last_reallocation_reasoning = reallocation_math.group(2).strip()
-
-                elif "Action: redeem_allocations" in line:
-                    if last_observation is not None and last_reallocation_reasoning is not None:
-                        match = re.search(
-                            r"Action: redeem_allocations,\s*vault_names:\s*\[([^\]]+)\],\s*amounts:\s*\[([^\]]+)\]",
-                            line,
-                            re.DOTALL
-                        )
-                        if match:
-                            targets = [t.strip("'\" ") for t in match.group(1).split(',')]
-                            raw_amounts = match.group(2).split(',')
-                            amounts = []
-                            for a in raw_amounts:
-                                # extract the number inside np.float64(...)
-                                num_match = re.search(r'np\.float64\(([^)]+)\)', a)
-                                if num_match:
-                                    amounts.append(float(num_match.group(1)))
-                            actions.append({
-                                "date": last_observation,
-                                "action_name": "redeem_allocations",
-                                "targets": targets,
-                                "amounts": amounts,
-                                "reasoning": last_reallocation_reasoning
-                            })
-                elif "Action: allocate_assets" in line and "Prediction:" not in line:
-                    if last_observation is not None:
-                        match = re.search(
-                            r"Action: allocate_assets,\s*vault_names:\s*\[([^\]]+)\],\s*amounts:\s*\[([^\]]+)\]",
-                            line,
-                            re.DOTALL
-                        )
-                        if match:
-                            targets = [t.strip("'\" ") for t in match.group(1).split(',')]
-                            raw_amounts = match.group(2).split(',')
-                            amounts = []
-                            for a in raw_amounts:
-                                # extract the number inside np.float64(...)
-                                num_match = re.search(r'np\.float64\(([^)]+)\)', a)
-                                if num_match:
-                                    amounts.append(float(num_match.group(1)))
-                            actions.append({
-                                "date": last_observation,
-                                "action_name": "allocate_assets",
-                                "targets": targets,
-                                "amounts": amounts,
-                                "reasoning": last_reallocation_reasoning
-                            })
+                actions.extend(parser.feed(line))
 
     except Exception as e:
         print(f"Error reading {log_file_path}: {e}")
 
-    actions_df = pd.DataFrame(actions)
-    if not actions_df.empty:
-        actions_df["date"] = pd.to_datetime(actions_df["date"])
-        actions_df["WrappedReasoning"] = actions_df["reasoning"].apply(lambda x: wrap_text(x, width=50) if x else "")
-   
-    return actions_df
+    return build_actions_df(actions)
+
+class LogTail:
+    """
+    Incrementally parses agent actions from a strategy log.
+    """
+
+    def __init__(self, log_file_path: str):
+        self._tail = FileTail(log_file_path)
+        self._parser = LogActionParser()
+        self.actions: list[dict] = []
+
+    def poll(self) -> int:
+        """
+        Parses the appended lines and returns the number of new actions.
+        """
+        lines = self._tail.read_new_lines()
+        if self._tail.restarted:
+            self._parser = LogActionParser()
+            self.actions = []
+        new_actions = [action for line in lines for action in self._parser.feed(line)]
+        self.actions.extend(new_actions)
+        return len(new_actions)
+
+    @property
+    def actions_df(self) -> pd.DataFrame:
+        return build_actions_df(self.actions)
 
 def get_marker_y(perf_df: pd.DataFrame, date: datetime, action_type: str, vault_name: str) -> float:
     """
@@ -173,49 +333,171 @@ def get_marker_y(perf_df: pd.DataFrame, date: datetime, action_type: str, vault_
             return row.iloc[0][f'{vault_name}_vault_apr'] * 1.1
     return None
 
-def create_performance_chart(perf_df: pd.DataFrame, template: dict) -> go.Figure:
+# maximum number of points per series sent to the browser
+DEFAULT_MAX_POINTS = 2000
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
     """
-    Creates a performance chart comparing APR
-    Add actions to the chart
+    Largest-Triangle-Three-Buckets downsampling.
+    Returns the indices of `n_out` points that preserve the visual shape of the line (x, y).
+    Non-finite values are treated as 0 when choosing points, but keep their original values.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = x.astype(np.float64)
+    y = np.nan_to_num(y.astype(np.float64), nan=0.0, posinf=0.0, neginf=0.0)
+    # bucket edges for the points between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        next_end = max(next_end, next_start + 1)
+        avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+    return indices
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Min/max bucketing: keeps the minimum and the maximum of each of `n_out // 2` buckets,
+    so spikes survive the downsampling. Returns sorted unique indices.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+    y = np.nan_to_num(y.astype(np.float64), nan=0.0, posinf=0.0, neginf=0.0)
+    edges = np.linspace(0, n, n_out // 2 + 1).astype(np.int64)
+    indices = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        indices.append(start + int(np.argmin(y[start:end])))
+        indices.append(start + int(np.argmax(y[start:end])))
+    return np.unique(indices)
+
+def downsample_line(x: pd.Series, y: pd.Series, max_points: int | None) -> tuple[pd.Series, pd.Series]:
+    if max_points is None or len(y) <= max_points:
+        return x, y
+    index = lttb_indices(x.values.astype('datetime64[ns]').astype(np.int64), y.values, max_points)
+    return x.iloc[index], y.iloc[index]
+
+def downsample_stack(x: pd.Series, series: list[pd.Series], max_points: int | None) -> tuple[pd.Series, list[pd.Series]]:
+    """
+    Downsamples stacked bar series with shared indices chosen by min/max of the stack total,
+    so that the bars of all traces stay aligned.
+    """
+    if max_points is None or len(x) <= max_points:
+        return x, series
+    total = sum(s.values for s in series)
+    index = minmax_indices(total, max_points)
+    return x.iloc[index], [s.iloc[index] for s in series]
+
+def slice_visible_range(perf_df: pd.DataFrame, x_range: tuple[str, str] | None) -> pd.DataFrame:
+    """
+    Rows of `perf_df` inside the visible x range, or all rows when the range is None.
+    """
+    if x_range is None:
+        return perf_df
+    start, end = pd.to_datetime(x_range[0]), pd.to_datetime(x_range[1])
+    dates = perf_df['date']
+    if dates.dt.tz is not None:
+        start = start.tz_localize(dates.dt.tz) if start.tzinfo is None else start
+        end = end.tz_localize(dates.dt.tz) if end.tzinfo is None else end
+    return perf_df[(dates >= start) & (dates <= end)]
+
+def parse_relayout_range(relayout_data: dict | None) -> tuple[str, str] | None | bool:
+    """
+    Extracts the x range from Graph `relayoutData`.
+    Returns the range, None when the axis was reset, or False when the x axis did not change.
+    """
+    if not relayout_data:
+        return False
+    if relayout_data.get('xaxis.autorange'):
+        return None
+    if 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+        return relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']
+    if 'xaxis.range' in relayout_data:
+        return tuple(relayout_data['xaxis.range'])
+    return False
+
+class FigureCache:
+    """
+    Least-recently-used cache of computed figures, keyed by run, chart, visible range and resolution.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._figures: OrderedDict[Hashable, go.Figure] = OrderedDict()
+
+    def get_or_build(self, key: Hashable, build: Callable[[], go.Figure]) -> go.Figure:
+        if key in self._figures:
+            self._figures.move_to_end(key)
+            return self._figures[key]
+        figure = build()
+        self._figures[key] = figure
+        if len(self._figures) > self.maxsize:
+            self._figures.popitem(last=False)
+        return figure
+
+def performance_series(perf_df: pd.DataFrame, vault_names: list[str]) -> list[pd.Series]:
+    """
+    APR series in the trace order of the performance chart.
+    """
+    return [perf_df[f'{vault_name}_vault_apr'] for vault_name in vault_names] + [perf_df['meta_vault_apr']]
+
+def share_price_series(perf_df: pd.DataFrame, vault_names: list[str]) -> list[pd.Series]:
+    """
+    Share price series in the trace order of the share price chart.
+    """
+    return [perf_df[f'{vault_name}_share_price'] for vault_name in vault_names] + [perf_df['meta_vault_share_price']]
+
+def allocation_series(perf_df: pd.DataFrame, vault_names: list[str]) -> list[pd.Series]:
+    """
+    Share holding series in the trace order of the allocation chart.
+    """
+    return [perf_df[f'{vault_name}_shares'] for vault_name in vault_names]
+
+def idle_withdrawal_series(perf_df: pd.DataFrame, vault_names: list[str]) -> list[pd.Series]:
+    """
+    Net idle assets series in the trace order of the idle/withdrawal chart.
     """
+    return [
+        perf_df[f'{vault_name}_idle_assets'] - perf_df[f'{vault_name}_pending_withdrawals']
+        for vault_name in vault_names
+    ]
 
-    btc_apr = perf_df['btc_vault_apr']
-    eth_apr = perf_df['eth_vault_apr']
-    doge_apr = perf_df['doge_vault_apr']
-    pepe_apr = perf_df['pepe_vault_apr']
-    meta_vault_apr = perf_df['meta_vault_apr']
+def trend_series(perf_df: pd.DataFrame, vault_names: list[str]) -> list[pd.Series]:
+    """
+    Rolling trend series in the trace order of the trend chart.
+    """
+    return [perf_df[f'{vault_name}_trend'] for vault_name in vault_names]
+
+def volatility_series(perf_df: pd.DataFrame, vault_names: list[str]) -> list[pd.Series]:
+    """
+    Rolling volatility series in the trace order of the volatility chart.
+    """
+    return [perf_df[f'{vault_name}_volatility'] for vault_name in vault_names]
 
+def create_performance_chart(perf_df: pd.DataFrame, vault_names: list[str], template: dict, max_points: int | None = None) -> go.Figure:
+    """
+    Creates a performance chart comparing APR
+    Add actions to the chart
+    Each series is downsampled to `max_points` when given.
+    """
     fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=perf_df['date'],
-        y=btc_apr,
-        mode='lines',
-        name='BTC'
-    ))
-    fig.add_trace(go.Scatter(
-        x=perf_df['date'],
-        y=eth_apr,
-        mode='lines',
-        name='ETH'
-    ))
-    fig.add_trace(go.Scatter(
-        x=perf_df['date'],
-        y=doge_apr,
-        mode='lines',
-        name='DOGE'
-    ))
-    fig.add_trace(go.Scatter(
-        x=perf_df['date'],
-        y=pepe_apr,
-        mode='lines',
-        name='PEPE'
-    ))
-    fig.add_trace(go.Scatter(
-        x=perf_df['date'],
-        y=meta_vault_apr,
-        mode='lines',
-        name='Meta Vault'
-    ))
+    for name, apr in zip([vault_name.upper() for vault_name in vault_names] + ['Meta Vault'], performance_series(perf_df, vault_names)):
+        x, apr = downsample_line(perf_df['date'], apr, max_points)
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=apr,
+            mode='lines',
+            name=name
+        ))
 
     fig.update_layout(
         title='Vaults APR',
@@ -225,44 +507,16 @@ def create_performance_chart(perf_df: pd.DataFrame, template: dict) -> go.Figure
     )
     return fig
 
-def create_share_price_chart(perf_df: pd.DataFrame, template: dict) -> go.Figure:
-    btc_share_price = perf_df['btc_share_price']
-    eth_share_price = perf_df['eth_share_price']
-    doge_share_price = perf_df['doge_share_price']
-    pepe_share_price = perf_df['pepe_share_price']
-    meta_vault_share_price = perf_df['meta_vault_share_price']
-
+def create_share_price_chart(perf_df: pd.DataFrame, vault_names: list[str], template: dict, max_points: int | None = None) -> go.Figure:
     fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=perf_df['date'],
-        y=btc_share_price,
-        mode='lines',
-        name='BTC'
-    ))
-    fig.add_trace(go.Scatter(
-        x=perf_df['date'],
-        y=eth_share_price,
-        mode='lines',
-        name='ETH'
-    ))
-    fig.add_trace(go.Scatter(
-        x=perf_df['date'],
-        y=doge_share_price,
-        mode='lines',
-        name='DOGE'
-    ))
-    fig.add_trace(go.Scatter(
-        x=perf_df['date'],
-        y=pepe_share_price,
-        mode='lines',
-        name='PEPE'
-    ))
-    fig.add_trace(go.Scatter(
-        x=perf_df['date'],
-        y=meta_vault_share_price,
-        mode='lines',
-        name='Meta Vault'
-    ))
+    for name, share_price in zip([vault_name.upper() for vault_name in vault_names] + ['Meta Vault'], share_price_series(perf_df, vault_names)):
+        x, share_price = downsample_line(perf_df['date'], share_price, max_points)
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=share_price,
+            mode='lines',
+            name=name
+        ))
 
     fig.update_layout(
         title='Vault Share Price',
@@ -272,33 +526,15 @@ def create_share_price_chart(perf_df: pd.DataFrame, template: dict) -> go.Figure
     )
     return fig
 
-def create_allocation_chart(perf_df: pd.DataFrame, template: dict) -> go.Figure:
-    btc_shares = perf_df['btc_shares']
-    eth_shares = perf_df['eth_shares']
-    doge_shares = perf_df['doge_shares']
-    pepe_shares = perf_df['pepe_shares']
-
+def create_allocation_chart(perf_df: pd.DataFrame, vault_names: list[str], template: dict, max_points: int | None = None) -> go.Figure:
     fig = go.Figure()
-    fig.add_trace(go.Bar(
-        x=perf_df['date'],
-        y=btc_shares,
-        name='BTC'
-    ))
-    fig.add_trace(go.Bar(
-        x=perf_df['date'],
-        y=eth_shares,
-        name='ETH'
-    ))
-    fig.add_trace(go.Bar(
-        x=perf_df['date'],
-        y=doge_shares,
-        name='DOGE'
-    ))
-    fig.add_trace(go.Bar(
-        x=perf_df['date'],
-        y=pepe_shares,
-        name='PEPE'
-    ))
+    x, series = downsample_stack(perf_df['date'], allocation_series(perf_df, vault_names), max_points)
+    for name, shares in zip([vault_name.upper() for vault_name in vault_names], series):
+        fig.add_trace(go.Bar(
+            x=x,
+            y=shares,
+            name=name
+        ))
 
     fig.update_layout(
         barmode='stack',
@@ -309,37 +545,15 @@ def create_allocation_chart(perf_df: pd.DataFrame, template: dict) -> go.Figure:
     )
     return fig
 
-def create_idle_withdrawal_chart(perf_df: pd.DataFrame, template: dict) -> go.Figure:
-    btc_idle_assets = perf_df['btc_idle_assets']
-    eth_idle_assets = perf_df['eth_idle_assets']
-    doge_idle_assets = perf_df['doge_idle_assets']
-    pepe_idle_assets = perf_df['pepe_idle_assets']
-    btc_pending_withdrawals = perf_df['btc_pending_withdrawals']
-    eth_pending_withdrawals = perf_df['eth_pending_withdrawals']
-    doge_pending_withdrawals = perf_df['doge_pending_withdrawals']
-    pepe_pending_withdrawals = perf_df['pepe_pending_withdrawals']
-
+def create_idle_withdrawal_chart(perf_df: pd.DataFrame, vault_names: list[str], template: dict, max_points: int | None = None) -> go.Figure:
     fig = go.Figure()
-    fig.add_trace(go.Bar(
-        x=perf_df['date'],
-        y=btc_idle_assets - btc_pending_withdrawals,
-        name='BTC'
-    ))
-    fig.add_trace(go.Bar(
-        x=perf_df['date'],
-        y=eth_idle_assets - eth_pending_withdrawals,
-        name='ETH'
-    ))
-    fig.add_trace(go.Bar(
-        x=perf_df['date'],
-        y=doge_idle_assets - doge_pending_withdrawals,
-        name='DOGE'
-    ))
-    fig.add_trace(go.Bar(
-        x=perf_df['date'],
-        y=pepe_idle_assets - pepe_pending_withdrawals,
-        name='PEPE'
-    ))
+    x, series = downsample_stack(perf_df['date'], idle_withdrawal_series(perf_df, vault_names), max_points)
+    for name, net_idle in zip([vault_name.upper() for vault_name in vault_names], series):
+        fig.add_trace(go.Bar(
+            x=x,
+            y=net_idle,
+            name=name
+        ))
 
     fig.update_layout(
         barmode='relative',
@@ -350,6 +564,44 @@ def create_idle_withdrawal_chart(perf_df: pd.DataFrame, template: dict) -> go.Fi
     )
     return fig
 
+def create_feature_chart(series: list[pd.Series], vault_names: list[str], dates: pd.Series, title: str,
+                         yaxis_title: str, template: dict, max_points: int | None = None) -> go.Figure:
+    fig = go.Figure()
+    for name, values in zip([vault_name.upper() for vault_name in vault_names], series):
+        x, values = downsample_line(dates, values, max_points)
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=values,
+            mode='lines',
+            name=name
+        ))
+
+    fig.update_layout(
+        title=title,
+        xaxis_title='Date',
+        yaxis_title=yaxis_title,
+        **template
+    )
+    return fig
+
+def create_trend_chart(perf_df: pd.DataFrame, vault_names: list[str], template: dict, max_points: int | None = None) -> go.Figure:
+    return create_feature_chart(trend_series(perf_df, vault_names), vault_names, perf_df['date'], f'Vault Trend ({FEATURE_WINDOW} observations)',
+                                'Slope per observation', template, max_points)
+
+def create_volatility_chart(perf_df: pd.DataFrame, vault_names: list[str], template: dict, max_points: int | None = None) -> go.Figure:
+    return create_feature_chart(volatility_series(perf_df, vault_names), vault_names, perf_df['date'], f'Vault Volatility ({FEATURE_WINDOW} observations)',
+                                'Volatility of the returns', template, max_points)
+
+# time series charts updated with extend-style updates in live mode: id -> (builder, series in trace order)
+TIME_SERIES_CHARTS = {
+    'share-price-chart': (create_share_price_chart, share_price_series),
+    'performance-chart': (create_performance_chart, performance_series),
+    'trend-chart': (create_trend_chart, trend_series),
+    'volatility-chart': (create_volatility_chart, volatility_series),
+    'idle-withdrawal-chart': (create_idle_withdrawal_chart, idle_withdrawal_series),
+    'allocation-chart': (create_allocation_chart, allocation_series),
+}
+
 def create_action_chart(actions_df: pd.DataFrame, template: dict) -> go.Figure:
     # Flatten the list of targets and amounts into long-form
     records = []
@@ -400,29 +652,235 @@ def create_action_chart(actions_df: pd.DataFrame, template: dict) -> go.Figure:
     )
     return fig
 
-def main():
-    # load strategy results
-    perf_df = load_vaults_performance("result.csv")
+def find_latest_run(runs_dir: str) -> Path | None:
+    """
+    Returns the artifacts directory of the most recently written strategy run,
+    i.e. the `runs/<Strategy>/<id>` directory whose `logs/logs.log` was modified last.
+    """
+    logs = list(Path(runs_dir).glob('*/logs/logs.log'))
+    if not logs:
+        return None
+    return max(logs, key=lambda log: log.stat().st_mtime).parent.parent
 
-    # load agent actions
-    actions_df = parse_log_file("logs.log")
-    # build performance chart
-    fig_allocation = create_allocation_chart(perf_df, TRADINGVIEW_TEMPLATE)
-    fig_idle_withdrawal = create_idle_withdrawal_chart(perf_df, TRADINGVIEW_TEMPLATE)
-    fig_share_price = create_share_price_chart(perf_df, TRADINGVIEW_TEMPLATE)
-    fig_perf = create_performance_chart(perf_df, TRADINGVIEW_TEMPLATE)
-    fig_actions = create_action_chart(actions_df, TRADINGVIEW_TEMPLATE)
+class LiveRun:
+    """
+    Follows the newest run under `runs_dir` and tails its result rows and log.
+    """
+
+    def __init__(self, runs_dir: str):
+        self.runs_dir = runs_dir
+        self.run_dir: Path | None = None
+        self.result_tail: ResultTail | None = None
+        self.log_tail: LogTail | None = None
+
+    def poll(self) -> tuple[bool, pd.DataFrame, int]:
+        """
+        Returns whether a new run has been picked up, the appended result rows and the number of new actions.
+        """
+        run_dir = find_latest_run(self.runs_dir)
+        switched = run_dir is not None and run_dir != self.run_dir
+        if switched:
+            self.run_dir = run_dir
+            self.result_tail = ResultTail(str(run_dir / 'result.csv'))
+            self.log_tail = LogTail(str(run_dir / 'logs' / 'logs.log'))
+        if self.run_dir is None:
+            return False, pd.DataFrame(), 0
+        new_rows = self.result_tail.poll()
+        new_actions = self.log_tail.poll()
+        return switched, new_rows, new_actions
+
+def create_live_app(runs_dir: str, interval_ms: int, max_points: int | None = DEFAULT_MAX_POINTS) -> dash.Dash:
+    live_run = LiveRun(runs_dir)
+    chart_ids = list(TIME_SERIES_CHARTS.keys())
+
+    app = dash.Dash(__name__)
+    app.layout = html.Div(
+        [html.Div(id='run-label'), dcc.Graph(id='action-chart')]
+        + [dcc.Graph(id=chart_id) for chart_id in chart_ids]
+        + [dcc.Interval(id='live-interval', interval=interval_ms)]
+    )
+
+    @app.callback(
+        [Output('run-label', 'children'), Output('action-chart', 'figure')]
+        + [Output(chart_id, 'figure') for chart_id in chart_ids]
+        + [Output(chart_id, 'extendData') for chart_id in chart_ids],
+        Input('live-interval', 'n_intervals'),
+    )
+    def refresh(_):
+        switched, new_rows, new_actions = live_run.poll()
+        no_updates = [dash.no_update] * len(chart_ids)
+        if live_run.run_dir is None:
+            return [f"No runs found in {runs_dir}", dash.no_update] + no_updates + no_updates
+
+        perf_df = live_run.result_tail.perf_df
+        vault_names = live_run.result_tail.vault_names
+        actions_df = live_run.log_tail.actions_df
+        fig_actions = create_action_chart(actions_df, TRADINGVIEW_TEMPLATE) if (switched or new_actions) and not actions_df.empty else dash.no_update
+        run_label = f"Run: {live_run.run_dir}, observations: {len(perf_df)}"
+
+        if switched or (not new_rows.empty and len(new_rows) == len(perf_df)):
+            # a new run or its first rows: build the figures once
+            figures = [build(perf_df, vault_names, TRADINGVIEW_TEMPLATE, max_points) if not perf_df.empty else go.Figure(layout=TRADINGVIEW_TEMPLATE)
+                       for build, _ in TIME_SERIES_CHARTS.values()]
+            return [run_label, fig_actions] + figures + no_updates
+        if new_rows.empty:
+            return [run_label, fig_actions] + no_updates + no_updates
+
+        x = new_rows['date'].tolist()
+        extends = []
+        for _, series in TIME_SERIES_CHARTS.values():
+            values = series(new_rows, vault_names)
+            extends.append((
+                {'x': [x] * len(values), 'y': [value.tolist() for value in values]},
+                list(range(len(values))),
+            ))
+        return [run_label, fig_actions] + no_updates + extends
+
+    return app
+
+def create_app(perf_df: pd.DataFrame, actions_df: pd.DataFrame, run_key: Hashable,
+               max_points: int | None = DEFAULT_MAX_POINTS, cache: FigureCache | None = None) -> dash.Dash:
+    """
+    Dashboard of a finished run. Time series are downsampled on the server
+    and recomputed for the visible range whenever a chart is zoomed or panned.
+    """
+    cache = cache if cache is not None else FigureCache()
+    vault_names = vault_names_of(perf_df)
+
+    def build_figure(chart_id: str, x_range: tuple[str, str] | None) -> go.Figure:
+        def build() -> go.Figure:
+            build_chart, _ = TIME_SERIES_CHARTS[chart_id]
+            fig = build_chart(slice_visible_range(perf_df, x_range), vault_names, TRADINGVIEW_TEMPLATE, max_points)
+            if x_range is not None:
+                fig.update_layout(xaxis_range=list(x_range))
+            # keep the legend state across recomputed figures
+            fig.update_layout(uirevision=chart_id)
+            return fig
+        return cache.get_or_build((run_key, chart_id, x_range, max_points), build)
+
+    app = dash.Dash(__name__)
+    app.layout = html.Div(
+        [dcc.Graph(id='action-chart', figure=create_action_chart(actions_df, TRADINGVIEW_TEMPLATE))]
+        + [dcc.Graph(id=chart_id, figure=build_figure(chart_id, None)) for chart_id in TIME_SERIES_CHARTS]
+    )
+
+    for chart_id in TIME_SERIES_CHARTS:
+        @app.callback(Output(chart_id, 'figure'), Input(chart_id, 'relayoutData'), prevent_initial_call=True)
+        def rescale(relayout_data, chart_id=chart_id):
+            x_range = parse_relayout_range(relayout_data)
+            if x_range is False:
+                return dash.no_update
+            return build_figure(chart_id, x_range)
+
+    return app
+
+def meta_vault_share_price(df: pd.DataFrame) -> pd.Series:
+    return df['net_balance'] / df['meta_vault_total_supply']
+
+def meta_vault_apr(df: pd.DataFrame) -> pd.Series:
+    days_since_start = (df['timestamp'] - df['timestamp'].iloc[0]).dt.total_seconds() / (24 * 60 * 60)
+    return (meta_vault_share_price(df) - 1) * (365 / days_since_start)
+
+# comparable series: key -> (label, required result columns, derivation)
+COMPARE_METRICS = {
+    'meta_vault_share_price': ('Meta Vault Share Price', ['timestamp', 'net_balance', 'meta_vault_total_supply'], meta_vault_share_price),
+    'meta_vault_apr': ('Meta Vault APR', ['timestamp', 'net_balance', 'meta_vault_total_supply'], meta_vault_apr),
+    'net_balance': ('Net Balance', ['timestamp', 'net_balance'], lambda df: df['net_balance']),
+}
+
+def create_compare_app(store: RunStore, max_points: int | None = DEFAULT_MAX_POINTS, max_runs: int = 500) -> dash.Dash:
+    """
+    Dashboard that overlays stored runs. Only the run metadata is listed up front,
+    the result columns a chart needs are read per run when the run is selected.
+    """
+    runs = store.list_runs(limit=max_runs).set_index('run_id', drop=False)
+
+    @lru_cache(maxsize=256)
+    def read_run_columns(run_id: str, columns: tuple[str, ...]) -> pd.DataFrame:
+        return store.read_columns(run_id, list(columns))
+
+    def run_label(run: pd.Series) -> str:
+        apy = f", APY {run['apy']:.2%}" if pd.notna(run['apy']) else ""
+        return f"{run['name'] or run['run_id'][:8]} ({run['created_at'][:19]}{apy})"
 
-    # run dash app
     app = dash.Dash(__name__)
     app.layout = html.Div([
-        dcc.Graph(figure=fig_actions), dcc.Graph(figure=fig_share_price), dcc.Graph(figure=fig_perf), dcc.Graph(figure=fig_idle_withdrawal), dcc.Graph(figure=fig_allocation)
+        dcc.Dropdown(
+            id='compare-runs', multi=True,
+            options=[{'label': run_label(run), 'value': run['run_id']} for _, run in runs.iterrows()],
+            value=runs.index[:2].tolist(),
+        ),
+        dcc.Dropdown(
+            id='compare-metric', clearable=False,
+            options=[{'label': label, 'value': key} for key, (label, _, _) in COMPARE_METRICS.items()],
+            value='meta_vault_share_price',
+        ),
+        dcc.Graph(id='compare-chart'),
+        html.Div(id='compare-summary'),
     ])
-    # app.layout = html.Div([
-    #     dcc.Graph(figure=fig_actions)
-    # ])
-    app.run(debug=True, host="0.0.0.0")
 
+    @app.callback(
+        [Output('compare-chart', 'figure'), Output('compare-summary', 'children')],
+        [Input('compare-runs', 'value'), Input('compare-metric', 'value')],
+    )
+    def compare(run_ids, metric):
+        label, columns, derive = COMPARE_METRICS[metric]
+        selected = runs.loc[run_ids or []]
+        fig = go.Figure()
+        for run_id, run in selected.iterrows():
+            df = read_run_columns(run_id, tuple(columns))
+            if df.empty:
+                continue
+            x, y = downsample_line(df['timestamp'], derive(df), max_points)
+            fig.add_trace(go.Scatter(x=x, y=y, mode='lines', name=run_label(run)))
+        fig.update_layout(title=label, xaxis_title='Date', yaxis_title=label, **TRADINGVIEW_TEMPLATE)
+
+        header = ['Run', 'Params', 'Models', 'Return', 'APY', 'Sharpe', 'Max Drawdown']
+        rows = [
+            html.Tr([
+                html.Td(run['name'] or run_id[:8]), html.Td(run['params']), html.Td(run['models']),
+                *[html.Td(f"{run[metric_name]:.4f}" if pd.notna(run[metric_name]) else "")
+                  for metric_name in ['accumulated_return', 'apy', 'sharpe', 'max_drawdown']]
+            ])
+            for run_id, run in selected.iterrows()
+        ]
+        return fig, html.Table([html.Tr([html.Th(h) for h in header])] + rows)
+
+    return app
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Visualize curator backtest results.")
+    parser.add_argument('--result', default='result.csv', help="Strategy result CSV")
+    parser.add_argument('--log', default='logs.log', help="Strategy log file")
+    parser.add_argument('--live', action='store_true', help="Follow the newest run in --runs-dir while it is running")
+    parser.add_argument('--runs-dir', default='runs/CuratorStrategy', help="Directory with strategy run artifacts")
+    parser.add_argument('--interval', type=int, default=5000, help="Live refresh interval in milliseconds")
+    parser.add_argument('--compare', action='store_true', help="Compare runs recorded in --store")
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH, help="Run store database")
+    parser.add_argument('--max-points', type=int, default=DEFAULT_MAX_POINTS,
+                        help="Maximum points per series sent to the browser, 0 disables downsampling")
+    args = parser.parse_args(argv)
+    max_points = args.max_points or None
+
+    if args.live:
+        app = create_live_app(args.runs_dir, args.interval, max_points)
+        app.run(debug=True, host="0.0.0.0")
+        return
+    if args.compare:
+        app = create_compare_app(RunStore(args.store), max_points)
+        app.run(debug=True, host="0.0.0.0")
+        return
+
+    # load strategy results
+    perf_df = load_vaults_performance(args.result)
+
+    # load agent actions
+    actions_df = parse_log_file(args.log)
+
+    # run dash app
+    run_key = (args.result, Path(args.result).stat().st_mtime_ns)
+    app = create_app(perf_df, actions_df, run_key, max_points)
+    app.run(debug=True, host="0.0.0.0")
 
 if __name__ == "__main__":
     main()
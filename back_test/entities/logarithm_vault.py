@@ -14,6 +14,14 @@ class LogarithmVaultGlobalState(GlobalState):
 @dataclass
 class LogarithmVaultInternalState:
     shares: float = 0.0
+    # cumulative flows and costs of the deposits (entries) and of the redeems and withdrawals (exits)
+    deposited: float = 0.0
+    withdrawn: float = 0.0
+    net_flow: float = 0.0
+    entry_costs: float = 0.0
+    exit_costs: float = 0.0
+    entries: int = 0
+    exits: int = 0
 
 class LogarithmVault(BaseEntity):
     """
@@ -43,6 +51,7 @@ class LogarithmVault(BaseEntity):
         shares_to_mint = self.preview_deposit(assets)
 
         self._internal_state.shares += shares_to_mint
+        self._record_entry(assets, assets - shares_to_mint * self._global_state.share_price)
 
         return shares_to_mint
     
@@ -58,6 +67,7 @@ class LogarithmVault(BaseEntity):
         assets_to_withdraw = self.preview_redeem(shares)
 
         self._internal_state.shares -= shares
+        self._record_exit(assets_to_withdraw, shares * self._global_state.share_price - assets_to_withdraw)
 
         return assets_to_withdraw
     
@@ -72,6 +82,7 @@ class LogarithmVault(BaseEntity):
         if assets == allocated_assets:
             shares_to_burn = self._internal_state.shares
             self._internal_state.shares = 0
+            self._record_exit(assets, shares_to_burn * self._global_state.share_price - assets)
             return shares_to_burn
         elif assets > allocated_assets:
             raise LogarithmVaultEntityException("Not enough allocated assets")
@@ -80,9 +91,28 @@ class LogarithmVault(BaseEntity):
             if shares_to_burn > self._internal_state.shares:
                 raise LogarithmVaultEntityException("Not enough shares available to withdraw the requested assets")
             self._internal_state.shares -= shares_to_burn
+            self._record_exit(assets, shares_to_burn * self._global_state.share_price - assets)
 
             return shares_to_burn
         
+    def _record_entry(self, assets: float, cost: float):
+        if assets == 0:
+            return
+        state = self._internal_state
+        state.deposited += assets
+        state.net_flow += assets
+        state.entry_costs += cost
+        state.entries += 1
+
+    def _record_exit(self, assets: float, cost: float):
+        if assets == 0:
+            return
+        state = self._internal_state
+        state.withdrawn += assets
+        state.net_flow -= assets
+        state.exit_costs += cost
+        state.exits += 1
+
     def update_state(self, state: LogarithmVaultGlobalState):
         if state.share_price <= 0:
             raise LogarithmVaultEntityException("Share price must be greater than 0")
@@ -93,6 +123,13 @@ class LogarithmVault(BaseEntity):
 
         self._global_state = state
 
+    def load_shares(self, shares: float):
+        # replace the held shares, e.g. with the holdings of a live meta vault
+
+        if shares < 0:
+            raise LogarithmVaultEntityException("Shares must be greater than 0")
+        self._internal_state.shares = shares
+
     @property
     def balance(self) -> float:
         # balance is the amount of assets held in the vault entity
@@ -102,6 +139,14 @@ class LogarithmVault(BaseEntity):
     def shares(self) -> float:
         return self._internal_state.shares
     
+    @property
+    def entry_costs(self) -> float:
+        return self._internal_state.entry_costs
+
+    @property
+    def exit_costs(self) -> float:
+        return self._internal_state.exit_costs
+
     @property
     def entry_cost_rate(self) -> float:
         return self._entry_cost_rate
@@ -18,6 +18,18 @@ class MetaVaultGlobalState(GlobalState):
 @dataclass
 class MetaVaultInternalState(InternalState):
     total_supply: float = 0.0
+    # cumulative flows of the depositors
+    deposited: float = 0.0
+    withdrawn: float = 0.0
+    net_flow: float = 0.0
+    # cumulative flows, costs and operations of the allocations to the logarithm vaults
+    allocated: float = 0.0
+    deallocated: float = 0.0
+    net_allocated: float = 0.0
+    entry_costs: float = 0.0
+    exit_costs: float = 0.0
+    allocations: int = 0
+    deallocations: int = 0
 
 DUST = 0.000001
 class MetaVault(BaseEntity):
@@ -42,6 +54,8 @@ class MetaVault(BaseEntity):
         shares_to_mint = assets if self.total_assets == 0 else assets * self.total_supply / self.total_assets
         self._assets += assets
         self._internal_state.total_supply += shares_to_mint
+        self._internal_state.deposited += assets
+        self._internal_state.net_flow += assets
         return shares_to_mint
        
     def action_withdraw(self, assets: float) -> float:
@@ -58,6 +72,8 @@ class MetaVault(BaseEntity):
             self._assets -= idle
             self._cumulative_requested_withdrawals += assets - idle
         self._internal_state.total_supply -= shares_to_burn
+        self._internal_state.withdrawn += assets
+        self._internal_state.net_flow -= assets
         return shares_to_burn
 
     def action_allocate_assets(self, targets: List[NamedEntity], amounts: List[float]) -> None:
@@ -81,9 +97,11 @@ class MetaVault(BaseEntity):
 
         for target, amount in zip(targets, amounts):
             target_vault: LogarithmVault = target.entity
+            entry_costs = target_vault.entry_costs
             target_vault.action_deposit(amount)
             # decrease assets by the amount allocated
             self._assets -= amount
+            self._record_allocation(amount, target_vault.entry_costs - entry_costs)
             # add target to allocated_vaults if it is not already in the List
             if not any(allocated.entity_name == target.entity_name for allocated in self._allocated_vaults):
                 self._allocated_vaults.append(target)
@@ -108,9 +126,11 @@ class MetaVault(BaseEntity):
             
         for target, amount in zip(targets, amounts):
             target_vault: LogarithmVault = target.entity
+            exit_costs = target_vault.exit_costs
             assets = target_vault.action_redeem(amount)
             # increase assets by the amount redeemed
             self._assets += assets
+            self._record_deallocation(assets, target_vault.exit_costs - exit_costs)
             # remove target from allocated_vaults if the shares of target is 0
             internal_state: LogarithmVaultInternalState = target_vault.internal_state
             if internal_state.shares == 0:
@@ -135,14 +155,32 @@ class MetaVault(BaseEntity):
 
         for target, amount in zip(targets, amounts):
             target_vault: LogarithmVault = target.entity
+            exit_costs = target_vault.exit_costs
             target_vault.action_withdraw(amount)
             # increase assets by the amount withdrawn
             self._assets += amount
+            self._record_deallocation(amount, target_vault.exit_costs - exit_costs)
             # remove target from allocated_vaults if the shares of target is 0
             internal_state: LogarithmVaultInternalState = target_vault.internal_state
             if internal_state.shares == 0:
                 self._allocated_vaults = [v for v in self._allocated_vaults if v.entity_name != target.entity_name]
         
+    def _record_allocation(self, assets: float, entry_cost: float):
+        if assets == 0:
+            return
+        self._internal_state.allocated += assets
+        self._internal_state.net_allocated += assets
+        self._internal_state.entry_costs += entry_cost
+        self._internal_state.allocations += 1
+
+    def _record_deallocation(self, assets: float, exit_cost: float):
+        if assets == 0:
+            return
+        self._internal_state.deallocated += assets
+        self._internal_state.net_allocated -= assets
+        self._internal_state.exit_costs += exit_cost
+        self._internal_state.deallocations += 1
+
     def update_state(self, state: MetaVaultGlobalState):
         if state.deposits < 0 or state.withdrawals < 0:
             raise MetaVaultEntityException("Idle assets and pending withdrawals must be greater than 0")
@@ -151,6 +189,17 @@ class MetaVault(BaseEntity):
 
         self._global_state = state
 
+    def load_assets(self, idle_assets: float, pending_withdrawals: float, allocated_vaults: List[NamedEntity]) -> None:
+        # replace the asset state, e.g. with the state of a live meta vault
+        if idle_assets < 0 or pending_withdrawals < 0:
+            raise MetaVaultEntityException("Idle assets and pending withdrawals must be greater than 0")
+        if idle_assets > 0 and pending_withdrawals > 0:
+            raise MetaVaultEntityException("Both idle assets and pending withdrawals cannot be greater than 0")
+
+        self._assets = idle_assets
+        self._cumulative_requested_withdrawals = pending_withdrawals
+        self._allocated_vaults = list(allocated_vaults)
+
     @property
     def balance(self) -> float:
         return self.idle_assets - self.pending_withdrawals
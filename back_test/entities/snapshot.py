@@ -0,0 +1,185 @@
+"""
+Copy-on-write entity snapshots.
+
+`EntitySnapshot.capture` freezes the state of an entity set with one shallow copy and one internal state
+copy per entity. References between entities, like the `NamedEntity` lists of `MetaVault._allocated_vaults`,
+are remapped to the snapshot's own entities. A snapshot is never modified after capture, so any number of
+threads can fork it.
+
+A fork starts empty and copies an entity from its snapshot only when the entity is first written, along
+with the entities it references, so evaluating a candidate plan costs a few small copies instead of a
+deep copy of the entity set. A fork belongs to one thread, and forks of the same snapshot never see each
+other's writes.
+"""
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from fractal.core.base import Action, ActionToTake, NamedEntity
+from fractal.core.base.entity import BaseEntity
+
+
+def _copy(entity: BaseEntity) -> BaseEntity:
+    """
+    Copy of the entity with its own internal state and lists, which the entities modify in place,
+    like the `_allocated_vaults` the meta vault appends to. The global state is shared, since the
+    entities replace it instead of modifying it.
+    """
+    clone = object.__new__(type(entity))
+    clone.__dict__.update({name: list(value) if isinstance(value, list) else value for name, value in vars(entity).items()})
+    clone._internal_state = copy.copy(entity._internal_state)
+    return clone
+
+
+def _remap(entity: BaseEntity, resolve: Callable[[str], BaseEntity]):
+    """
+    Replace the entity's references to other entities, lists of `NamedEntity`, with the entities of `resolve`.
+    """
+    for name, value in vars(entity).items():
+        if isinstance(value, list) and all(isinstance(item, NamedEntity) for item in value):
+            setattr(entity, name, [NamedEntity(entity_name=item.entity_name, entity=resolve(item.entity_name)) for item in value])
+
+
+class EntitySnapshot:
+    """
+    Immutable state of an entity set. Create it with `capture`.
+    """
+
+    def __init__(self, entities: Dict[str, BaseEntity]):
+        self._entities = entities
+
+    @classmethod
+    def capture(cls, entities: Dict[str, BaseEntity]) -> 'EntitySnapshot':
+        """
+        Snapshot of the current state of the entities, which stay independent of it.
+
+        Raises:
+            ValueError: When an entity references an entity outside of `entities`
+        """
+        captured = {name: _copy(entity) for name, entity in entities.items()}
+
+        def resolve(name: str) -> BaseEntity:
+            if name not in captured:
+                raise ValueError(f"Entity {name} is referenced but not part of the snapshot")
+            return captured[name]
+
+        for entity in captured.values():
+            _remap(entity, resolve)
+        return cls(captured)
+
+    @property
+    def entity_names(self) -> List[str]:
+        return list(self._entities)
+
+    def get_entity(self, name: str) -> BaseEntity:
+        """
+        The snapshot's entity, for reading only.
+        """
+        return self._entities[name]
+
+    def fork(self) -> 'EntityFork':
+        return EntityFork(self)
+
+
+class EntityFork:
+    """
+    Writable view of a snapshot. Entities are copied from the snapshot on their first write access.
+    """
+
+    def __init__(self, snapshot: EntitySnapshot):
+        self._snapshot = snapshot
+        self._entities: Dict[str, BaseEntity] = {}
+
+    @property
+    def copied(self) -> int:
+        """
+        Number of entities copied so far.
+        """
+        return len(self._entities)
+
+    def get_entity(self, name: str) -> BaseEntity:
+        """
+        The fork's entity, copied from the snapshot on first access, for reading and writing.
+        """
+        entity = self._entities.get(name)
+        if entity is None:
+            entity = _copy(self._snapshot.get_entity(name))
+            # registered before remapping, so references back to this entity resolve to the copy
+            self._entities[name] = entity
+            _remap(entity, self.get_entity)
+        return entity
+
+    def peek(self, name: str) -> BaseEntity:
+        """
+        The fork's entity without copying it, for reading only.
+        """
+        entity = self._entities.get(name)
+        return entity if entity is not None else self._snapshot.get_entity(name)
+
+    def execute(self, actions: List[ActionToTake]):
+        """
+        Execute the actions in order on the fork's entities. The actions' target entities are replaced by
+        the fork's entities of the same name, so actions built for the live entities can be simulated.
+        """
+        for action in actions:
+            # the entities may modify the argument lists, which belong to the caller's plan
+            args = {name: list(value) if isinstance(value, list) else value for name, value in action.action.args.items()}
+            if 'targets' in args:
+                args['targets'] = [NamedEntity(entity_name=target.entity_name, entity=self.get_entity(target.entity_name))
+                                   for target in args['targets']]
+            self.get_entity(action.entity_name).execute(Action(action.action.action, args))
+
+    def balances(self) -> Dict[str, float]:
+        return {name: self.peek(name).balance for name in self._snapshot.entity_names}
+
+    def net_balance(self) -> float:
+        """
+        Sum of the entities' balances, like the `net_balance` of a strategy result.
+        """
+        return sum(self.balances().values())
+
+    def snapshot(self) -> EntitySnapshot:
+        """
+        Snapshot of the fork's current state, e.g. to fork the outcome of a plan again.
+        """
+        return EntitySnapshot.capture({name: self.peek(name) for name in self._snapshot.entity_names})
+
+
+@dataclass
+class PlanResult:
+    """
+    Outcome of a candidate plan on its own fork.
+    """
+    index: int
+    score: Optional[float]
+    error: Optional[Exception] = None
+
+
+def evaluate_plans(snapshot: EntitySnapshot, plans: List[List[ActionToTake]],
+                   score: Callable[[EntityFork], float] = EntityFork.net_balance,
+                   max_workers: Optional[int] = None) -> List[PlanResult]:
+    """
+    Execute every plan on a fresh fork of the snapshot and score the outcome.
+
+    Args:
+        snapshot (EntitySnapshot): State the plans start from
+        plans (List[List[ActionToTake]]): Candidate plans, each a list of actions in execution order
+        score (Callable[[EntityFork], float]): Score of a fork after its plan, the net balance by default
+        max_workers (Optional[int]): Evaluate the plans on a pool of this many threads, None evaluates them in order
+
+    Returns:
+        List[PlanResult]: One result per plan, in the plans' order. Plans whose execution raised have no score.
+    """
+    def evaluate(index: int) -> PlanResult:
+        fork = snapshot.fork()
+        try:
+            fork.execute(plans[index])
+        except Exception as e:
+            return PlanResult(index=index, score=None, error=e)
+        return PlanResult(index=index, score=score(fork))
+
+    if max_workers is None:
+        return [evaluate(index) for index in range(len(plans))]
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='plan-evaluation') as pool:
+        return list(pool.map(evaluate, range(len(plans))))
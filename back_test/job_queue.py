@@ -0,0 +1,437 @@
+"""
+Job Queue Module
+
+A durable queue of backtest jobs in a SQLite database, so that a large study can be spread over
+the workers of several machines that share a filesystem, and survives workers that crash.
+
+A job is a set of strategy parameter overrides, the seed of the loader's Monte Carlo simulation and
+the fingerprint of the observations they run on. Its identifier is a hash of these and of its study,
+so enqueuing the same job twice adds it once. Workers lease one job at a time and renew the lease
+with heartbeats while the backtest runs. A lease that is not renewed expires, and the job is leased
+again by the next worker, up to `max_attempts` times. The result is recorded in the run store under
+the job's identifier before the job is marked done, so a job that runs twice still stores one run.
+
+The database uses SQLite's default rollback journal, which works on shared filesystems with POSIX
+locks, unlike WAL. The lease expiry uses the wall clock, so the machines' clocks must be in sync.
+"""
+import argparse
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+from fractal.core.base import Observation
+
+DEFAULT_QUEUE_PATH = 'runs/jobs.db'
+STATUSES = ('pending', 'leased', 'done', 'failed')
+
+
+def observations_fingerprint(observations: List[Observation]) -> str:
+    """
+    Hash of the timestamps and states of the observations, to check that every worker runs a job
+    on the same data.
+    """
+    digest = hashlib.sha256()
+    for observation in observations:
+        digest.update(observation.timestamp.isoformat().encode())
+        for name, state in sorted(observation.states.items()):
+            digest.update(f"{name}:{sorted(vars(state).items())!r}".encode())
+    return digest.hexdigest()[:16]
+
+
+@dataclass
+class Job:
+    """
+    A leased job.
+
+    Attributes:
+        job_id (str): Identifier of the job, also the identifier of its recorded run
+        study (str): Name of the study the job belongs to
+        params (Dict[str, Any]): Strategy parameter overrides
+        seed (Optional[int]): Seed of the loader's Monte Carlo simulation, None for the loader's previous output
+        data_fingerprint (str): Fingerprint of the job's observations
+        attempts (int): Number of times the job was leased, including this lease
+        lease_token (str): Token of this lease, required to renew it and to commit the result
+    """
+    job_id: str
+    study: str
+    params: Dict[str, Any]
+    seed: Optional[int]
+    data_fingerprint: str
+    attempts: int
+    lease_token: str
+
+
+class JobQueue:
+    """
+    Args:
+        db_path (str): Path of the queue database
+        max_attempts (int): Leases of a job before it is marked failed
+    """
+
+    def __init__(self, db_path: str = DEFAULT_QUEUE_PATH, max_attempts: int = 3):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        # transactions are explicit, and the heartbeat thread shares the connection
+        self.connection = sqlite3.connect(db_path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._create_tables()
+
+    def _create_tables(self):
+        with self._transaction() as connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    study TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    seed INTEGER,
+                    data_fingerprint TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT,
+                    lease_token TEXT,
+                    lease_expires_at REAL,
+                    created_at TEXT NOT NULL,
+                    finished_at TEXT,
+                    metrics TEXT,
+                    error TEXT
+                )
+                """
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_expires_at)")
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Write transaction that takes the database's write lock up front, so that concurrent workers
+        never lease the same job.
+        """
+        with self._lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.connection
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+
+    @staticmethod
+    def job_id(study: str, params: Dict[str, Any], seed: Optional[int], data_fingerprint: str) -> str:
+        key = json.dumps({'study': study, 'params': params, 'seed': seed, 'data': data_fingerprint},
+                         sort_keys=True, default=str)
+        return hashlib.sha256(key.encode()).hexdigest()[:24]
+
+    def enqueue(self, study: str, params: Dict[str, Any], seed: Optional[int], data_fingerprint: str) -> str:
+        """
+        Add a job, unless the same job is already queued.
+
+        Returns:
+            str: Identifier of the job
+        """
+        job_id = self.job_id(study, params, seed, data_fingerprint)
+        with self._transaction() as connection:
+            connection.execute(
+                """
+                INSERT OR IGNORE INTO jobs (job_id, study, params, seed, data_fingerprint, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (job_id, study, json.dumps(params, default=str), seed, data_fingerprint, datetime.now(UTC).isoformat())
+            )
+        return job_id
+
+    def lease(self, worker: str, lease_seconds: float = 600) -> Optional[Job]:
+        """
+        Lease the oldest pending job, or a job whose lease expired. Expired jobs that used all their
+        attempts are marked failed instead.
+
+        Returns:
+            Optional[Job]: The leased job, None when no job is available
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                """
+                UPDATE jobs SET status = 'failed', lease_token = NULL, error = 'Lease expired after the last attempt'
+                WHERE status = 'leased' AND lease_expires_at < ? AND attempts >= ?
+                """,
+                (now, self.max_attempts)
+            )
+            row = connection.execute(
+                """
+                SELECT * FROM jobs
+                WHERE status = 'pending' OR (status = 'leased' AND lease_expires_at < ?)
+                ORDER BY created_at, job_id LIMIT 1
+                """,
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            token = uuid.uuid4().hex
+            connection.execute(
+                """
+                UPDATE jobs SET status = 'leased', attempts = attempts + 1, worker = ?, lease_token = ?, lease_expires_at = ?
+                WHERE job_id = ?
+                """,
+                (worker, token, now + lease_seconds, row['job_id'])
+            )
+        return Job(job_id=row['job_id'], study=row['study'], params=json.loads(row['params']), seed=row['seed'],
+                   data_fingerprint=row['data_fingerprint'], attempts=row['attempts'] + 1, lease_token=token)
+
+    def __update_leased(self, job: Job, assignments: str, values: tuple) -> bool:
+        """
+        Update the job if the lease is still held, returns whether it was.
+        """
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ? AND lease_token = ? AND status = 'leased'",
+                (*values, job.job_id, job.lease_token)
+            )
+        return cursor.rowcount == 1
+
+    def heartbeat(self, job: Job, lease_seconds: float = 600) -> bool:
+        """
+        Renew the lease. False when the lease was lost, i.e. it expired and the job was leased again.
+        """
+        return self.__update_leased(job, "lease_expires_at = ?", (time.time() + lease_seconds,))
+
+    def complete(self, job: Job, metrics: Dict[str, float]) -> bool:
+        """
+        Mark the job done with its metrics. False when the lease was lost, in which case the job's
+        result belongs to its current lease.
+        """
+        return self.__update_leased(
+            job, "status = 'done', lease_token = NULL, finished_at = ?, metrics = ?, error = NULL",
+            (datetime.now(UTC).isoformat(), json.dumps(metrics))
+        )
+
+    def fail(self, job: Job, error: str) -> bool:
+        """
+        Return the job to the queue, or mark it failed once it used all its attempts.
+        """
+        return self.__update_leased(
+            job, "status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, lease_token = NULL, error = ?",
+            (self.max_attempts, error)
+        )
+
+    def release(self, job: Job) -> bool:
+        """
+        Return the job to the queue without counting the attempt, e.g. when its worker is stopped.
+        """
+        return self.__update_leased(job, "status = 'pending', attempts = attempts - 1, lease_token = NULL", ())
+
+    def retry_failed(self, study: Optional[str] = None) -> int:
+        """
+        Return the failed jobs to the queue with their attempts reset.
+
+        Returns:
+            int: Number of jobs returned to the queue
+        """
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = 'pending', attempts = 0 WHERE status = 'failed' AND (? IS NULL OR study = ?)",
+                (study, study)
+            )
+        return cursor.rowcount
+
+    def counts(self, study: Optional[str] = None) -> Dict[str, int]:
+        """
+        Number of jobs in each status.
+        """
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT status, COUNT(*) AS n FROM jobs WHERE ? IS NULL OR study = ? GROUP BY status", (study, study)
+            ).fetchall()
+        return {**dict.fromkeys(STATUSES, 0), **{row['status']: row['n'] for row in rows}}
+
+    def results(self, study: Optional[str] = None) -> pd.DataFrame:
+        """
+        Parameters, seed and metrics of the done jobs, one row per job with the job's identifier as run id.
+        """
+        with self._lock:
+            rows = self.connection.execute(
+                """
+                SELECT job_id, study, params, seed, attempts, worker, finished_at, metrics FROM jobs
+                WHERE status = 'done' AND (? IS NULL OR study = ?) ORDER BY finished_at
+                """,
+                (study, study)
+            ).fetchall()
+        return pd.DataFrame([
+            {'run_id': row['job_id'], 'study': row['study'], **json.loads(row['params']), 'SEED': row['seed'],
+             'attempts': row['attempts'], 'worker': row['worker'], 'finished_at': row['finished_at'],
+             **json.loads(row['metrics'])}
+            for row in rows
+        ])
+
+    def close(self):
+        self.connection.close()
+
+
+def enqueue_study(queue: JobQueue, study: str, runs: List[Dict[str, Any]]) -> List[str]:
+    """
+    Enqueue one job per parameter overrides, with the `SEED` override as the job's seed. The
+    observations of every distinct vault set and seed are built once to fingerprint them.
+
+    Returns:
+        List[str]: Identifiers of the jobs, in the order of the runs
+    """
+    from back_test.sweep import SEED, build_sweep_observations, observations_key
+
+    observations = build_sweep_observations(runs)
+    fingerprints = {key: observations_fingerprint(key_observations) for key, key_observations in observations.items()}
+    return [
+        queue.enqueue(study, {key: value for key, value in overrides.items() if key != SEED}, overrides.get(SEED),
+                      fingerprints[observations_key(overrides)])
+        for overrides in runs
+    ]
+
+
+class _Heartbeat:
+    """
+    Renews a job's lease from a background thread while the backtest runs.
+    """
+
+    def __init__(self, queue: JobQueue, job: Job, lease_seconds: float):
+        self.lost = False
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self.__run, args=(queue, job, lease_seconds), daemon=True)
+
+    def __run(self, queue: JobQueue, job: Job, lease_seconds: float):
+        while not self._stopped.wait(lease_seconds / 3):
+            if not queue.heartbeat(job, lease_seconds):
+                self.lost = True
+                return
+
+    def __enter__(self) -> '_Heartbeat':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_):
+        self._stopped.set()
+        self._thread.join()
+
+
+def run_worker(queue: JobQueue, worker: Optional[str] = None, lease_seconds: float = 600, poll_interval: float = 5,
+               max_jobs: Optional[int] = None, wait: bool = False, record: bool = True) -> int:
+    """
+    Lease and run jobs until the queue is drained, i.e. no job is pending or leased by another worker.
+
+    Args:
+        queue (JobQueue): Queue to pull the jobs from
+        worker (Optional[str]): Name of the worker in the queue, the host name and process id by default
+        lease_seconds (float): Duration of a lease, renewed every third of it while a job runs
+        poll_interval (float): Seconds between two lease attempts while other workers hold all the jobs
+        max_jobs (Optional[int]): Stop after this many jobs
+        wait (bool): Keep polling for new jobs once the queue is drained
+        record (bool): Record the runs in the run store
+
+    Returns:
+        int: Number of jobs completed by this worker
+    """
+    from back_test.build_observations import build_observations
+    from back_test.curator_strategy import CuratorStrategyParams, run_backtest
+
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    observations: Dict[tuple, List[Observation]] = {}
+    completed = 0
+    while max_jobs is None or completed < max_jobs:
+        job = queue.lease(worker, lease_seconds)
+        if job is None:
+            counts = queue.counts()
+            if not wait and counts['pending'] == 0 and counts['leased'] == 0:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        name = f"{job.study}: " + ", ".join(f"{key}={value}" for key, value in job.params.items())
+        try:
+            params = CuratorStrategyParams(**job.params)
+            key = (tuple(params.VAULT_NAMES), job.seed)
+            if key not in observations:
+                if job.seed is None:
+                    observations[key] = build_observations(False, log_vault_names=params.VAULT_NAMES)
+                else:
+                    observations[key] = build_observations(True, log_vault_names=params.VAULT_NAMES, seed=job.seed)
+            fingerprint = observations_fingerprint(observations[key])
+            if fingerprint != job.data_fingerprint:
+                raise ValueError(f"Data fingerprint {fingerprint} of {worker} differs from the job's {job.data_fingerprint}")
+            with _Heartbeat(queue, job, lease_seconds) as heartbeat:
+                _, metrics = run_backtest(params, debug=False, record=record, result_path=None, name=name,
+                                          observations=observations[key], run_id=job.job_id)
+        except KeyboardInterrupt:
+            queue.release(job)
+            raise
+        except Exception as e:
+            queue.fail(job, f"{type(e).__name__}: {e}")
+            print(f"[{worker}] {job.job_id} failed (attempt {job.attempts}): {e}", flush=True)
+            continue
+
+        if heartbeat.lost or not queue.complete(job, metrics.__dict__):
+            print(f"[{worker}] {job.job_id} lost its lease, the result is left to the new lease", flush=True)
+            continue
+        completed += 1
+        print(f"[{worker}] {job.job_id} done: {name}: {metrics}", flush=True)
+    return completed
+
+
+def main(argv: Optional[List[str]] = None):
+    queue_parser = argparse.ArgumentParser(add_help=False)
+    queue_parser.add_argument('--queue', default=DEFAULT_QUEUE_PATH, help="Job queue database")
+    queue_parser.add_argument('--max-attempts', type=int, default=3, help="Leases of a job before it is marked failed")
+
+    parser = argparse.ArgumentParser(description="Queue backtest jobs and run them on workers.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    enqueue_parser = subparsers.add_parser('enqueue', parents=[queue_parser], help="Enqueue the jobs of a parameter grid")
+    enqueue_parser.add_argument('grid', nargs='+', help="Parameter values as NAME=v1,v2, SEED=1,2,3 for Monte Carlo seeds")
+    enqueue_parser.add_argument('--study', required=True, help="Name of the study")
+    enqueue_parser.add_argument('--samples', type=int, default=None, help="Enqueue this many random combinations of the grid")
+    enqueue_parser.add_argument('--sample-seed', type=int, default=0)
+    worker_parser = subparsers.add_parser('worker', parents=[queue_parser], help="Run jobs until the queue is drained")
+    worker_parser.add_argument('--name', default=None, help="Worker name, the host name and process id by default")
+    worker_parser.add_argument('--lease-seconds', type=float, default=600)
+    worker_parser.add_argument('--poll-interval', type=float, default=5)
+    worker_parser.add_argument('--max-jobs', type=int, default=None)
+    worker_parser.add_argument('--wait', action='store_true', help="Keep waiting for new jobs once the queue is drained")
+    worker_parser.add_argument('--no-record', action='store_true', help="Do not record the runs in the run store")
+    status_parser = subparsers.add_parser('status', parents=[queue_parser], help="Count the jobs in each status")
+    status_parser.add_argument('--study', default=None)
+    results_parser = subparsers.add_parser('results', parents=[queue_parser], help="Print the metrics of the done jobs")
+    results_parser.add_argument('--study', default=None)
+    retry_parser = subparsers.add_parser('retry', parents=[queue_parser], help="Return the failed jobs to the queue")
+    retry_parser.add_argument('--study', default=None)
+    args = parser.parse_args(argv)
+
+    queue = JobQueue(args.queue, max_attempts=args.max_attempts)
+    if args.command == 'enqueue':
+        from back_test.sweep import expand_grid, parse_grid, sample_grid
+        grid = parse_grid(args.grid)
+        runs = expand_grid(grid) if args.samples is None else sample_grid(grid, args.samples, args.sample_seed)
+        job_ids = enqueue_study(queue, args.study, runs)
+        print(f"{len(set(job_ids))} jobs in study {args.study}: {queue.counts(args.study)}")
+    elif args.command == 'worker':
+        completed = run_worker(queue, worker=args.name, lease_seconds=args.lease_seconds, poll_interval=args.poll_interval,
+                               max_jobs=args.max_jobs, wait=args.wait, record=not args.no_record)
+        print(f"{completed} jobs completed, queue: {queue.counts()}")
+    elif args.command == 'status':
+        print(queue.counts(args.study))
+    elif args.command == 'results':
+        print(queue.results(args.study).to_string(index=False))
+    else:
+        print(f"{queue.retry_failed(args.study)} failed jobs returned to the queue")
+    queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Synthetic Generator Module
+
+Generates a universe of any number of Logarithm vaults over any number of timestamps at a fixed
+frequency, to test the loader, `build_observations`, the entities and the dashboard at scale:
+- `write_backtest_data` writes a `strategy_backtest_data.csv` per vault with the `timestamp` and
+  `net_balance` columns the `VaultsLoader` reads, optionally gzip or zstandard compressed.
+- `write_simulated_data` writes the loader's simulated vault states directly, with the idle assets,
+  pending withdrawals and meta vault flows of the scenario, so that `build_observations(with_run=False)`
+  reads them without running the loader's Monte Carlo simulation.
+
+The share prices are geometric Brownian motions whose returns share one market factor, so every pair of
+vaults has the same return correlation. Every vault alternates between an idle assets regime and a pending
+withdrawals regime, a Markov chain that stays in its regime with `REGIME_PERSISTENCE`. The meta vault flows
+follow one of `FLOW_PATTERNS`. The series are generated vectorized over time, one vault at a time, and
+every vault draws from its own child of the seed, so a vault's series do not depend on the number of vaults.
+"""
+import argparse
+import math
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+from back_test.constants import META_VAULT_NAME
+from back_test.loader.simulations.vaults_loader import DATA_FILE_NAME, DEFAULT_SEED, VaultsLoader
+
+SECONDS_PER_YEAR = 365 * 24 * 60 * 60
+# meta vault flow patterns: flows of both signs, only deposits, only withdrawals, deposits and withdrawals
+# alternating over FLOW_CYCLE, or rare flows BURST_SIZE times larger
+FLOW_PATTERNS = ('random', 'inflow', 'outflow', 'cyclic', 'bursty')
+BURST_SIZE = 20
+# suffix of the backtest data files of each compression, the suffixes the loader reads
+COMPRESSIONS = {'none': '', 'gzip': '.gz', 'zstd': '.zst'}
+# columns of the loader's simulated vault states, in the order the loader writes them
+SIMULATED_COLUMNS = ['vault_name', 'timestamp', 'net_balance', 'share_price', 'idle_assets', 'pending_withdrawals',
+                     'deposits_withdrawals']
+
+
+@dataclass
+class SyntheticUniverseParams:
+    """
+    Parameters of a synthetic vault universe.
+
+    Attributes:
+        VAULTS (int): Number of Logarithm vaults, named vault0, vault1, ... (default: 500)
+        PERIODS (int): Number of timestamps (default: 43,800, 5 years of hours)
+        INTERVAL (str): Fixed frequency of the timestamps, like 'd', 'h' or '15min' (default: 'h')
+        START (str): First timestamp (default: '2024-01-01')
+        SEED (int): Seed of all random draws (default: DEFAULT_SEED)
+        INIT_BALANCE (float): Net balance of a vault at a share price of 1, like the loader's init balance (default: 1,000,000)
+        ANNUAL_RETURN (float): Mean of the vaults' expected annual log returns (default: 0.1)
+        RETURN_DISPERSION (float): Standard deviation of the vaults' expected annual log returns (default: 0.05)
+        VOLATILITY (float): Annualized volatility of the share prices (default: 0.2)
+        CORRELATION (float): Correlation of the returns of any two vaults, between 0 and 1 (default: 0.5)
+        IDLE_SCALE (float): Standard deviation of the idle assets and pending withdrawals relative to
+            INIT_BALANCE, like the loader's simulation (default: 0.001)
+        REGIME_PERSISTENCE (float): Probability that a vault stays in its idle assets or pending withdrawals
+            regime from one timestamp to the next, 0.5 draws the regimes independently like the loader (default: 0.5)
+        FLOW_PATTERN (str): Pattern of the meta vault flows, one of FLOW_PATTERNS (default: 'random')
+        FLOW_SCALE (float): Largest meta vault flow relative to INIT_BALANCE, like the loader's simulation (default: 0.005)
+        FLOW_PROBABILITY (float): Probability of a meta vault flow at a timestamp (default: 0.5)
+        FLOW_CYCLE (str): Period of the 'cyclic' flow pattern (default: '7d')
+    """
+    VAULTS: int = 500
+    PERIODS: int = 5 * 365 * 24
+    INTERVAL: str = 'h'
+    START: str = '2024-01-01'
+    SEED: int = DEFAULT_SEED
+    INIT_BALANCE: float = 1_000_000
+    ANNUAL_RETURN: float = 0.1
+    RETURN_DISPERSION: float = 0.05
+    VOLATILITY: float = 0.2
+    CORRELATION: float = 0.5
+    IDLE_SCALE: float = 0.001
+    REGIME_PERSISTENCE: float = 0.5
+    FLOW_PATTERN: str = 'random'
+    FLOW_SCALE: float = 0.005
+    FLOW_PROBABILITY: float = 0.5
+    FLOW_CYCLE: str = '7d'
+
+
+class SyntheticUniverse:
+    """
+    Seeded share prices, idle assets, pending withdrawals and meta vault flows of a synthetic universe.
+    """
+
+    def __init__(self, params: SyntheticUniverseParams):
+        if params.VAULTS < 1 or params.PERIODS < 1:
+            raise ValueError("A synthetic universe needs at least one vault and one timestamp")
+        if not 0 <= params.CORRELATION <= 1:
+            raise ValueError(f"Correlation must be between 0 and 1, got {params.CORRELATION}")
+        if not 0 <= params.REGIME_PERSISTENCE <= 1:
+            raise ValueError(f"Regime persistence must be between 0 and 1, got {params.REGIME_PERSISTENCE}")
+        if params.FLOW_PATTERN not in FLOW_PATTERNS:
+            raise ValueError(f"Unknown flow pattern {params.FLOW_PATTERN}, expected one of {FLOW_PATTERNS}")
+        self.params = params
+        self.timestamps = pd.date_range(params.START, periods=params.PERIODS, freq=params.INTERVAL, name='timestamp')
+        # fixed frequencies only, like the loader's intervals
+        self._step_years = to_offset(params.INTERVAL).nanos / 1e9 / SECONDS_PER_YEAR
+        rng = np.random.default_rng(self._seed_sequence(0))
+        self._market = rng.standard_normal(params.PERIODS)
+        self._annual_returns = rng.normal(params.ANNUAL_RETURN, params.RETURN_DISPERSION, params.VAULTS)
+        self._flows = self._meta_vault_flows(rng)
+        self._timestamp_strings: Optional[np.ndarray] = None
+
+    def _seed_sequence(self, key: int) -> np.random.SeedSequence:
+        # child 0 of the seed draws the universe's shared series, child i + 1 the series of vault i
+        return np.random.SeedSequence(self.params.SEED, spawn_key=(key,))
+
+    @property
+    def vault_names(self) -> List[str]:
+        return [f"vault{i}" for i in range(self.params.VAULTS)]
+
+    @property
+    def meta_vault_flows(self) -> np.ndarray:
+        """
+        Meta vault deposits (positive) and withdrawals (negative) at every timestamp.
+        """
+        return self._flows
+
+    def _meta_vault_flows(self, rng: np.random.Generator) -> np.ndarray:
+        params = self.params
+        scale = params.INIT_BALANCE * params.FLOW_SCALE
+        n = params.PERIODS
+        if params.FLOW_PATTERN == 'bursty':
+            # as many assets moved on average as 'random', in fewer and larger flows
+            active = rng.random(n) < params.FLOW_PROBABILITY / BURST_SIZE
+            return np.where(active, rng.uniform(-scale, scale, n) * BURST_SIZE, 0.0)
+        active = rng.random(n) < params.FLOW_PROBABILITY
+        if params.FLOW_PATTERN == 'random':
+            flows = rng.uniform(-scale, scale, n)
+        elif params.FLOW_PATTERN == 'inflow':
+            flows = rng.uniform(0, scale, n)
+        elif params.FLOW_PATTERN == 'outflow':
+            flows = rng.uniform(-scale, 0, n)
+        else:
+            cycle_steps = to_offset(params.FLOW_CYCLE).nanos / to_offset(params.INTERVAL).nanos
+            flows = np.sin(2 * math.pi * np.arange(n) / cycle_steps) * rng.uniform(0, scale, n)
+        return np.where(active, flows, 0.0)
+
+    def vault_data(self, index: int) -> pd.DataFrame:
+        """
+        Net balance, share price, idle assets and pending withdrawals of vault `index` at every timestamp.
+        """
+        params = self.params
+        rng = np.random.default_rng(self._seed_sequence(index + 1))
+        n = params.PERIODS
+        # one market factor shared by all vaults gives every pair the correlation of the params
+        shocks = math.sqrt(params.CORRELATION) * self._market + math.sqrt(1 - params.CORRELATION) * rng.standard_normal(n)
+        drift = (self._annual_returns[index] - params.VOLATILITY ** 2 / 2) * self._step_years
+        log_returns = drift + params.VOLATILITY * math.sqrt(self._step_years) * shocks
+        # the share price starts at 1
+        log_returns[0] = 0.0
+        share_price = np.exp(np.cumsum(log_returns))
+
+        # the regime flips whenever the chain leaves it, True is the idle assets regime
+        flips = rng.random(n) >= params.REGIME_PERSISTENCE
+        flips[0] = rng.random() < 0.5
+        idle_regime = np.cumsum(flips) % 2 == 1
+        amounts = np.abs(rng.normal(0, params.INIT_BALANCE * params.IDLE_SCALE, n))
+        return pd.DataFrame({
+            'net_balance': share_price * params.INIT_BALANCE,
+            'share_price': share_price,
+            'idle_assets': np.where(idle_regime, amounts, 0.0),
+            'pending_withdrawals': np.where(idle_regime, 0.0, amounts),
+        }, index=self.timestamps)
+
+    def _timestamp_column(self) -> np.ndarray:
+        # formatted once for all the vaults' files
+        if self._timestamp_strings is None:
+            self._timestamp_strings = self.timestamps.strftime('%Y-%m-%d %H:%M:%S').to_numpy()
+        return self._timestamp_strings
+
+    def write_backtest_data(self, base_path: str, compression: str = 'none', max_workers: Optional[int] = None) -> List[Path]:
+        """
+        Write the backtest data file of every vault under `base_path/<vault>/`, in the layout the loader reads.
+
+        Args:
+            base_path (str): Directory of the vaults' data, the loader's data base path
+            compression (str): One of COMPRESSIONS, 'zstd' requires the `zstandard` package
+            max_workers (Optional[int]): Threads writing the files concurrently
+
+        Returns:
+            List[Path]: The written files, in the order of the vault names
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression {compression}, expected one of {list(COMPRESSIONS)}")
+        if compression == 'zstd':
+            try:
+                import zstandard  # noqa: F401
+            except ImportError as e:
+                raise ImportError("Writing zstandard compressed backtest data requires zstandard") from e
+        timestamps = self._timestamp_column()
+
+        def write(index: int) -> Path:
+            path = Path(base_path) / self.vault_names[index] / (DATA_FILE_NAME + COMPRESSIONS[compression])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            net_balance = self.vault_data(index)['net_balance'].to_numpy()
+            pd.DataFrame({'timestamp': timestamps, 'net_balance': net_balance}).to_csv(
+                path, index=False, compression=None if compression == 'none' else compression
+            )
+            return path
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(write, range(self.params.VAULTS)))
+
+    def simulated_data_path(self, data_base_path: str) -> Path:
+        """
+        File the loader saves the simulated vault states of this universe's vaults and seed to.
+        """
+        loader = VaultsLoader(self.params.INIT_BALANCE, self.vault_names, META_VAULT_NAME, data_base_path,
+                              interval=self.params.INTERVAL, seed=self.params.SEED)
+        return loader.simulated_data_file()
+
+    def write_simulated_data(self, path: str) -> Path:
+        """
+        Write the simulated vault states in the loader's layout, one vault at a time, so that the file
+        can be larger than the memory. `VaultsLoader.read()` reads it like the loader's own output.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        timestamps = self._timestamp_column()
+        n = self.params.PERIODS
+        with open(path, 'w', newline='') as f:
+            pd.DataFrame(columns=SIMULATED_COLUMNS).to_csv(f)
+            for index, vault_name in enumerate(self.vault_names):
+                data = self.vault_data(index)
+                data.insert(0, 'timestamp', timestamps)
+                data.insert(0, 'vault_name', vault_name)
+                data['deposits_withdrawals'] = np.nan
+                data.index = pd.RangeIndex(index * n, (index + 1) * n)
+                data.to_csv(f, header=False)
+            meta_vault = pd.DataFrame({'vault_name': META_VAULT_NAME, 'timestamp': timestamps},
+                                      index=pd.RangeIndex(self.params.VAULTS * n, (self.params.VAULTS + 1) * n))
+            meta_vault = meta_vault.reindex(columns=SIMULATED_COLUMNS)
+            meta_vault['deposits_withdrawals'] = self._flows
+            meta_vault.to_csv(f, header=False)
+        return path
+
+
+def main(argv: Optional[List[str]] = None):
+    defaults = SyntheticUniverseParams()
+    parser = argparse.ArgumentParser(description="Generate the backtest data of a synthetic vault universe.")
+    parser.add_argument('--output', default='back_test/data/synthetic', help="Data base path of the vaults' files")
+    parser.add_argument('--vaults', type=int, default=defaults.VAULTS)
+    parser.add_argument('--periods', type=int, default=defaults.PERIODS)
+    parser.add_argument('--interval', default=defaults.INTERVAL)
+    parser.add_argument('--start', default=defaults.START)
+    parser.add_argument('--seed', type=int, default=defaults.SEED)
+    parser.add_argument('--correlation', type=float, default=defaults.CORRELATION)
+    parser.add_argument('--volatility', type=float, default=defaults.VOLATILITY)
+    parser.add_argument('--regime-persistence', type=float, default=defaults.REGIME_PERSISTENCE)
+    parser.add_argument('--flow-pattern', choices=FLOW_PATTERNS, default=defaults.FLOW_PATTERN)
+    parser.add_argument('--compression', choices=list(COMPRESSIONS), default='none')
+    parser.add_argument('--workers', type=int, default=None, help="Threads writing the vaults' files")
+    parser.add_argument('--simulated', action='store_true',
+                        help="Also write the loader's simulated vault states, to build observations without the loader")
+    parser.add_argument('--force', action='store_true', help="Replace existing simulated vault states of the seed")
+    args = parser.parse_args(argv)
+
+    universe = SyntheticUniverse(SyntheticUniverseParams(
+        VAULTS=args.vaults, PERIODS=args.periods, INTERVAL=args.interval, START=args.start, SEED=args.seed,
+        CORRELATION=args.correlation, VOLATILITY=args.volatility, REGIME_PERSISTENCE=args.regime_persistence,
+        FLOW_PATTERN=args.flow_pattern,
+    ))
+    # the loader keeps one simulation per seed, which may be the simulation of the shipped vaults
+    simulated_path = universe.simulated_data_path(args.output)
+    if args.simulated and simulated_path.exists() and not args.force:
+        parser.error(f"{simulated_path} exists, pass --force to replace it or choose another --seed")
+    files = universe.write_backtest_data(args.output, compression=args.compression, max_workers=args.workers)
+    print(f"{len(files)} vaults x {args.periods} timestamps written to {args.output}")
+    if args.simulated:
+        universe.write_simulated_data(simulated_path)
+        print(f"Simulated vault states written to {simulated_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import random
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List
 from uuid import uuid4
@@ -6,9 +7,17 @@ import numpy as np
 import pandas as pd
 from fractal.loaders.base_loader import Loader, LoaderType
 from fractal.loaders.structs import PriceHistory
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, UTC
 
+DEFAULT_SEED = 420
+DATA_FILE_NAME = 'strategy_backtest_data.csv'
+# suffixes of the data file, tried in order, compressed files are decompressed while they are read
+DATA_FILE_SUFFIXES = ('', '.gz', '.zst')
+# columns of the backtest data the simulation uses, the others are not read
+DATA_COLUMNS = {'timestamp': 'str', 'net_balance': 'float64'}
+CHUNK_ROWS = 500_000
+
 class VaultsLoader(Loader):
     """
     A class that represents a Vaults states loader.
@@ -19,8 +28,12 @@ class VaultsLoader(Loader):
         log_vault_names: The list of Logarithm vault names
         meta_vault_name: The name of meta vault
         data_base_path: The base path to the back tested vault data
-        interval: The interval of observations
-        seed (int): The seed value used for random number generation.
+        interval: The interval of observations, a fixed frequency like 'd', 'h' or '15min'. The backtest
+            data is aggregated to the last net balance of each interval
+        seed (int): The seed value used for random number generation. The output of other seeds than
+            DEFAULT_SEED is saved under its own file, so it does not replace the default simulation.
+        chunk_rows (int): Rows of the backtest data read at once
+        max_workers (Optional[int]): Threads reading the vaults' data files concurrently
 
     Methods:
         extract(): Extracts the vault states from the base loader.
@@ -39,7 +52,9 @@ class VaultsLoader(Loader):
         meta_vault_name: str,
         data_base_path: str,
         interval: str = 'd',
-        seed: int = 420,
+        seed: int = DEFAULT_SEED,
+        chunk_rows: int = CHUNK_ROWS,
+        max_workers: Optional[int] = None,
     ) -> None:
         super().__init__()
         self._data = None
@@ -48,24 +63,57 @@ class VaultsLoader(Loader):
         self.meta_vault_name = meta_vault_name
         self.data_base_path = data_base_path
         self.interval = interval
-        self._file_id = "simulated_data"
+        self._file_id = "simulated_data" if seed == DEFAULT_SEED else f"simulated_data_{seed}"
         self._random = random.Random()
         self._random.seed(seed)
-    
+        self.chunk_rows = chunk_rows
+        self.max_workers = max_workers
+
+    def data_file(self, vault_name: str) -> Path:
+        """
+        Backtest data file of a vault: the CSV, or else its gzip or zstandard compressed version.
+        Reading `.zst` files requires the `zstandard` package.
+        """
+        path = Path(self.data_base_path) / vault_name / DATA_FILE_NAME
+        for suffix in DATA_FILE_SUFFIXES:
+            candidate = path.with_name(path.name + suffix)
+            if candidate.exists():
+                return candidate
+        raise FileNotFoundError(f"No backtest data for {vault_name} at {path}[{'|'.join(DATA_FILE_SUFFIXES[1:])}]")
+
+    def read_vault_data(self, vault_name: str) -> pd.DataFrame:
+        """
+        Read the net balance of a vault in chunks of `chunk_rows` rows and keep the last value of each
+        interval, so that the memory used depends on the chunk size and the number of intervals rather
+        than on the size of the file.
+        """
+        path = self.data_file(vault_name)
+        if path.suffix == '.zst':
+            try:
+                import zstandard  # noqa: F401
+            except ImportError as e:
+                raise ImportError("Reading zstandard compressed backtest data requires zstandard") from e
+        last: Optional[pd.DataFrame] = None
+        for chunk in pd.read_csv(path, usecols=list(DATA_COLUMNS), dtype=DATA_COLUMNS, chunksize=self.chunk_rows):
+            # missing values are skipped, like by `resample(...).last()`
+            chunk = chunk.dropna(subset=['net_balance'])
+            chunk['timestamp'] = pd.to_datetime(chunk['timestamp'], format='ISO8601')
+            chunk['interval'] = chunk['timestamp'].dt.floor(self.interval)
+            if last is not None:
+                chunk = pd.concat([last, chunk])
+            # the latest row of each interval, the later row in the file for equal timestamps
+            last = chunk.sort_values('timestamp', kind='stable').groupby('interval').tail(1)
+
+        if last is None or last.empty:
+            return pd.DataFrame({'net_balance': pd.Series(dtype='float64')}, index=pd.DatetimeIndex([], name='timestamp'))
+        net_balance = last.set_index('interval')['net_balance'].sort_index()
+        # every interval between the first and the last one, empty intervals are missing values
+        index = pd.date_range(net_balance.index[0], net_balance.index[-1], freq=self.interval, name='timestamp')
+        return net_balance.reindex(index).to_frame()
+
     def get_data(self) -> Dict[str, pd.DataFrame]:
-        vault_data: Dict[str, pd.DataFrame] = {}
-        for vault_name in self.log_vault_names:
-            with open(f"{self.data_base_path}/{vault_name}/strategy_backtest_data.csv", "r") as f:
-                df = pd.read_csv(f)
-                # Convert timestamp to datetime and set as index
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                df.set_index('timestamp', inplace=True)
-                df = df.sort_index()
-                # Group by day and take the last value of each day
-                df = df.resample('d').last()
-                vault_data[vault_name] = df
-
-        return vault_data
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return dict(zip(self.log_vault_names, pool.map(self.read_vault_data, self.log_vault_names)))
     
     def get_dict_data(self, vault_names: List) -> Dict[str, pd.DataFrame]:
         return {
@@ -131,5 +179,11 @@ class VaultsLoader(Loader):
 
         return self.get_dict_data(self.log_vault_names + [self.meta_vault_name])
 
+    def simulated_data_file(self) -> Path:
+        """
+        File the simulated vault states are saved to and read from.
+        """
+        return Path(self.file_path(self._file_id) + '.csv')
+
     def delete_dump_file(self):
         Path(self.file_path(self._file_id)).unlink(missing_ok=True)
@@ -0,0 +1,175 @@
+"""
+Model Routing Module
+
+Per-agent model routing and a token and latency budget for the curator agents:
+- `BudgetGovernor` accounts the tokens and model latency of a run and of its current step.
+- `GovernedModelProvider` records every model response with the governor and, once a budget is
+  exhausted, answers with the fallback model.
+- `ModelRouter` picks the model of each agent run: the agent's own model, the escalation model after
+  a validation failure, the fallback model once a budget is exhausted, or None to let the
+  deterministic policy decide.
+"""
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Optional
+
+from agents import Model, ModelProvider, ModelResponse, OpenAIProvider, Usage
+from agents.items import TResponseStreamEvent
+from openai.types.responses import ResponseCompletedEvent
+
+
+@dataclass
+class ModelUsage:
+    requests: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    total_tokens: int = 0
+    seconds: float = 0.0
+
+    def add(self, usage: Usage, seconds: float):
+        self.requests += usage.requests or 1
+        self.input_tokens += usage.input_tokens or 0
+        self.output_tokens += usage.output_tokens or 0
+        self.total_tokens += usage.total_tokens or 0
+        self.seconds += seconds
+
+
+class BudgetGovernor:
+    """
+    Token and model latency budgets of a run and of each decision step. A budget of None is unlimited.
+    """
+
+    def __init__(self, run_tokens: Optional[int] = None, step_tokens: Optional[int] = None,
+                 run_seconds: Optional[float] = None, step_seconds: Optional[float] = None):
+        self.run_tokens = run_tokens
+        self.step_tokens = step_tokens
+        self.run_seconds = run_seconds
+        self.step_seconds = step_seconds
+        self.run_usage = ModelUsage()
+        self.step_usage = ModelUsage()
+        self.usage_by_model: Dict[str, ModelUsage] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return any(budget is not None for budget in
+                   (self.run_tokens, self.step_tokens, self.run_seconds, self.step_seconds))
+
+    def start_step(self):
+        """
+        Reset the step budgets, called before the agents of a step are consulted.
+        """
+        self.step_usage = ModelUsage()
+
+    def record(self, model_name: str, usage: Usage, seconds: float):
+        """
+        Account one model response.
+        """
+        self.run_usage.add(usage, seconds)
+        self.step_usage.add(usage, seconds)
+        self.usage_by_model.setdefault(model_name, ModelUsage()).add(usage, seconds)
+
+    def exhausted(self) -> Optional[str]:
+        """
+        Returns:
+            Optional[str]: The exhausted budget, None while all budgets have room left
+        """
+        for name, spent, budget in (
+            ('run tokens', self.run_usage.total_tokens, self.run_tokens),
+            ('step tokens', self.step_usage.total_tokens, self.step_tokens),
+            ('run latency', self.run_usage.seconds, self.run_seconds),
+            ('step latency', self.step_usage.seconds, self.step_seconds),
+        ):
+            if budget is not None and spent >= budget:
+                return f"{name} {spent:g} of {budget:g}"
+        return None
+
+    def report(self) -> str:
+        lines = [f"{'model':<32} {'requests':>9} {'input':>10} {'output':>10} {'total':>10} {'seconds':>10}"]
+        for name, u in sorted(self.usage_by_model.items()) + [('total', self.run_usage)]:
+            lines.append(f"{name:<32} {u.requests:>9} {u.input_tokens:>10} {u.output_tokens:>10} "
+                         f"{u.total_tokens:>10} {u.seconds:>10.3f}")
+        return "\n".join(lines)
+
+
+class GovernedModel(Model):
+    """
+    Model recording the usage and latency of its responses, streamed or not, with the governor. Once a
+    budget is exhausted, the remaining calls go to the fallback model, also within a running agent loop.
+    """
+
+    def __init__(self, model_name: str | None, provider: ModelProvider, governor: BudgetGovernor,
+                 fallback_model: Optional[str] = None):
+        self._model_name = model_name
+        self._provider = provider
+        self._governor = governor
+        self._fallback_model = fallback_model
+
+    def _route(self) -> str | None:
+        if self._fallback_model is not None and self._governor.exhausted() is not None:
+            return self._fallback_model
+        return self._model_name
+
+    async def get_response(self, *args, **kwargs) -> ModelResponse:
+        model_name = self._route()
+        start = time.perf_counter()
+        response = await self._provider.get_model(model_name).get_response(*args, **kwargs)
+        self._governor.record(str(model_name), response.usage, time.perf_counter() - start)
+        return response
+
+    async def stream_response(self, *args, **kwargs) -> AsyncIterator[TResponseStreamEvent]:
+        model_name = self._route()
+        start = time.perf_counter()
+        async for event in self._provider.get_model(model_name).stream_response(*args, **kwargs):
+            if isinstance(event, ResponseCompletedEvent):
+                # the usage of the completed response, like the Runner reads it
+                usage = event.response.usage
+                self._governor.record(str(model_name), Usage(
+                    requests=1,
+                    input_tokens=usage.input_tokens if usage else 0,
+                    output_tokens=usage.output_tokens if usage else 0,
+                    total_tokens=usage.total_tokens if usage else 0,
+                ), time.perf_counter() - start)
+            yield event
+
+
+class GovernedModelProvider(ModelProvider):
+
+    def __init__(self, governor: BudgetGovernor, provider: Optional[ModelProvider] = None,
+                 fallback_model: Optional[str] = None):
+        self._governor = governor
+        self._provider = provider if provider is not None else OpenAIProvider()
+        self._fallback_model = fallback_model
+
+    def get_model(self, model_name: str | None) -> Model:
+        return GovernedModel(model_name, self._provider, self._governor, self._fallback_model)
+
+
+class ModelRouter:
+    """
+    Picks the model of each agent run.
+
+    A retry after a validation failure runs on `escalation_model`, when set. Once a budget is exhausted,
+    the first attempt of an agent loop runs on `fallback_model`, and without a fallback model, or after
+    its prediction failed validation, the deterministic policy decides.
+    """
+
+    def __init__(self, governor: BudgetGovernor, escalation_model: Optional[str] = None,
+                 fallback_model: Optional[str] = None):
+        self.governor = governor
+        self.escalation_model = escalation_model
+        self.fallback_model = fallback_model
+
+    def route(self, model: str, attempt: int) -> Optional[str]:
+        """
+        Args:
+            model (str): Model of the agent
+            attempt (int): Number of failed validations in the current agent loop
+
+        Returns:
+            Optional[str]: Model of the run, None when the deterministic policy should decide
+        """
+        if self.governor.exhausted() is not None:
+            return self.fallback_model if self.fallback_model is not None and attempt == 0 else None
+        if attempt > 0 and self.escalation_model is not None:
+            return self.escalation_model
+        return model
@@ -0,0 +1,193 @@
+from dataclasses import fields
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Type
+
+import numpy as np
+from fractal.core.base.entity import GlobalState
+from fractal.core.base.observations import Observation, ObservationsStorage
+
+
+class ColumnarObservationsStorageException(Exception):
+    """
+    Exception raised for errors in the columnar observations storage.
+    """
+
+
+class _Column:
+    """
+    Append-only typed column with amortized O(1) appends.
+    The buffer grows by doubling, in memory or as a memory-mapped file when `path` is given.
+    """
+
+    def __init__(self, dtype: np.dtype, path: Optional[Path] = None, capacity: int = 1024):
+        self.dtype = np.dtype(dtype)
+        self.path = path
+        self.length = 0
+        self._buffer = self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> np.ndarray:
+        if self.path is None:
+            buffer = np.empty(capacity, dtype=self.dtype)
+            if self.length:
+                buffer[:self.length] = self._buffer[:self.length]
+            return buffer
+        # extend the backing file and map it again, the existing data stays on disk
+        with open(self.path, 'ab') as f:
+            f.truncate(capacity * self.dtype.itemsize)
+        return np.memmap(self.path, dtype=self.dtype, mode='r+', shape=(capacity,))
+
+    def append(self, value) -> None:
+        if self.length == len(self._buffer):
+            if isinstance(self._buffer, np.memmap):
+                self._buffer.flush()
+            self._buffer = self._allocate(2 * len(self._buffer))
+        self._buffer[self.length] = value
+        self.length += 1
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        View of the written values. The view is not copied and stays valid after later appends.
+        """
+        return self._buffer[:self.length]
+
+
+class ColumnarObservationsStorage(ObservationsStorage):
+    """
+    Observations storage that keeps each state field as an append-only NumPy column per entity.
+
+    Every entity has its own timestamp column, so the recent history of a single field
+    can be read as a zero-copy view without materializing observations.
+
+    Methods:
+        write(observation): Appends the states of the observation.
+        read(start_time, end_time): Rebuilds observations, for compatibility with other storages.
+        window(entity, field, n): View of the last `n` values of a field.
+        range(t0, t1, entities): Views of all fields of the entities between two timestamps.
+    """
+
+    TIMESTAMP = 'timestamp'
+
+    def __init__(self, spill_dir: Optional[str] = None, initial_capacity: int = 1024):
+        """
+        Args:
+            spill_dir (str | None): Directory for memory-mapped column files.
+                When None the columns are kept in memory.
+            initial_capacity (int): Initial number of rows of each column
+        """
+        self._spill_dir: Optional[Path] = None
+        if spill_dir is not None:
+            self._spill_dir = Path(spill_dir)
+            self._spill_dir.mkdir(parents=True, exist_ok=True)
+        self._initial_capacity = initial_capacity
+        self._timestamps = self._new_column('observations', self.TIMESTAMP, 'datetime64[ns]')
+        # per entity: state type, field columns and the observation row of every entry
+        self._state_types: Dict[str, Type[GlobalState]] = {}
+        self._columns: Dict[str, Dict[str, _Column]] = {}
+        self._rows: Dict[str, _Column] = {}
+        self._tz = UTC
+
+    def _new_column(self, entity_name: str, field_name: str, dtype) -> _Column:
+        path = None
+        if self._spill_dir is not None:
+            path = self._spill_dir / f"{entity_name}.{field_name}.bin"
+            path.unlink(missing_ok=True)
+        return _Column(dtype, path=path, capacity=self._initial_capacity)
+
+    @staticmethod
+    def _to_datetime64(timestamp: datetime) -> np.datetime64:
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(UTC).replace(tzinfo=None)
+        return np.datetime64(timestamp, 'ns')
+
+    def _register_entity(self, entity_name: str, state: GlobalState):
+        columns = {self.TIMESTAMP: self._new_column(entity_name, self.TIMESTAMP, 'datetime64[ns]')}
+        for state_field in fields(state):
+            dtype = np.asarray(getattr(state, state_field.name)).dtype
+            if dtype == object:
+                raise ColumnarObservationsStorageException(
+                    f"Field {state_field.name} of {entity_name} is not a numeric value"
+                )
+            columns[state_field.name] = self._new_column(entity_name, state_field.name, dtype)
+        self._state_types[entity_name] = type(state)
+        self._columns[entity_name] = columns
+        self._rows[entity_name] = self._new_column(entity_name, 'row', np.int64)
+
+    def write(self, observation: Observation):
+        timestamp = self._to_datetime64(observation.timestamp)
+        if self._timestamps.length == 0:
+            self._tz = observation.timestamp.tzinfo
+        elif timestamp < self._timestamps.values[-1]:
+            raise ColumnarObservationsStorageException("Observations must be written in timestamp order")
+
+        row = self._timestamps.length
+        self._timestamps.append(timestamp)
+        for entity_name, state in observation.states.items():
+            if entity_name not in self._columns:
+                self._register_entity(entity_name, state)
+            columns = self._columns[entity_name]
+            columns[self.TIMESTAMP].append(timestamp)
+            for field_name, value in state.__dict__.items():
+                columns[field_name].append(value)
+            self._rows[entity_name].append(row)
+
+    def __len__(self) -> int:
+        return self._timestamps.length
+
+    @property
+    def entities(self) -> List[str]:
+        return list(self._columns.keys())
+
+    def window(self, entity: str, field: str, n: int) -> np.ndarray:
+        """
+        Zero-copy view of the last `n` values of a field of an entity.
+        Use `field='timestamp'` to get the matching timestamps.
+        """
+        if entity not in self._columns:
+            raise ColumnarObservationsStorageException(f"Entity {entity} has no observations")
+        if field not in self._columns[entity]:
+            raise ColumnarObservationsStorageException(f"Entity {entity} has no field {field}")
+        values = self._columns[entity][field].values
+        return values[max(len(values) - n, 0):]
+
+    def range(self, t0: Optional[datetime] = None, t1: Optional[datetime] = None,
+              entities: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Zero-copy views of all fields of the entities with timestamps in [t0, t1].
+
+        Returns:
+            Dict[str, Dict[str, np.ndarray]]: Field views per entity, including `timestamp`.
+        """
+        views = {}
+        for entity_name in entities if entities is not None else self.entities:
+            columns = self._columns[entity_name]
+            timestamps = columns[self.TIMESTAMP].values
+            start = 0 if t0 is None else np.searchsorted(timestamps, self._to_datetime64(t0), side='left')
+            end = len(timestamps) if t1 is None else np.searchsorted(timestamps, self._to_datetime64(t1), side='right')
+            views[entity_name] = {name: column.values[start:end] for name, column in columns.items()}
+        return views
+
+    def read(self, start_time: Optional[datetime] = None,
+             end_time: Optional[datetime] = None) -> Sequence[Observation]:
+        timestamps = self._timestamps.values
+        start = 0 if start_time is None else np.searchsorted(timestamps, self._to_datetime64(start_time), side='left')
+        end = len(timestamps) if end_time is None else np.searchsorted(timestamps, self._to_datetime64(end_time), side='right')
+
+        states_by_row: Dict[int, Dict[str, GlobalState]] = {row: {} for row in range(start, end)}
+        for entity_name, columns in self._columns.items():
+            rows = self._rows[entity_name].values
+            first, last = np.searchsorted(rows, start, side='left'), np.searchsorted(rows, end, side='left')
+            state_type = self._state_types[entity_name]
+            field_values = {name: column.values[first:last].tolist()
+                            for name, column in columns.items() if name != self.TIMESTAMP}
+            for i, row in enumerate(rows[first:last].tolist()):
+                states_by_row[row][entity_name] = state_type(**{name: values[i] for name, values in field_values.items()})
+
+        observations = []
+        for row, states in states_by_row.items():
+            timestamp = timestamps[row].astype('datetime64[us]').item()
+            if self._tz is not None:
+                timestamp = timestamp.replace(tzinfo=UTC).astimezone(self._tz)
+            observations.append(Observation(timestamp=timestamp, states=states))
+        return observations
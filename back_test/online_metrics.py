@@ -0,0 +1,213 @@
+"""
+Online Metrics Module
+
+Performance metrics of a run, updated once per step in constant memory, so that they can be read
+while the strategy runs and without building the result frame.
+
+The metrics of the net balance (accumulated return, APY, Sharpe ratio, max drawdown) follow
+`StrategyResult.get_metrics`, and the APR of the meta vault's share price follows the dashboard.
+For every Logarithm vault, the flows and the entry and exit costs are read from the vault's counters.
+The price changes of the shares held between two updates are the vault's gains, and its contribution
+is the gains net of the costs.
+"""
+import math
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+import pandas as pd
+from fractal.core.base.strategy.result import StrategyMetrics
+
+from back_test.entities.logarithm_vault import LogarithmVault
+
+SECONDS_PER_YEAR = 365 * 24 * 60 * 60
+
+
+@dataclass
+class VaultMetrics:
+    """
+    Attributes:
+        shares (float): Shares held at the last update
+        share_price (float): Share price at the last update
+        traded (float): Assets deposited into and withdrawn from the vault
+        entry_costs (float): Entry costs paid on the deposits
+        exit_costs (float): Exit costs paid on the redeems and withdrawals
+        operations (int): Number of deposits, redeems and withdrawals
+        gains (float): Value change of the held shares from share price changes
+    """
+    shares: float = 0.0
+    share_price: float = 0.0
+    traded: float = 0.0
+    entry_costs: float = 0.0
+    exit_costs: float = 0.0
+    operations: int = 0
+    gains: float = 0.0
+
+    @property
+    def contribution(self) -> float:
+        return self.gains - self.entry_costs - self.exit_costs
+
+
+class OnlineMetrics:
+    """
+    Incremental metrics of a run, fed with the state of the entities after every step.
+    """
+
+    def __init__(self):
+        self.steps = 0
+        self.start: Optional[datetime] = None
+        self.timestamp: Optional[datetime] = None
+        self.initial_balance = math.nan
+        self.net_balance = math.nan
+        self.initial_share_price = math.nan
+        self.share_price = math.nan
+        self.peak = -math.inf
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+        self._balance_sum = 0.0
+        # Welford moments of the net balance returns
+        self._returns = 0
+        self._mean_return = 0.0
+        self._m2 = 0.0
+        self.vaults: Dict[str, VaultMetrics] = {}
+
+    def update(self, timestamp: datetime, net_balance: float, total_supply: float, vaults: Dict[str, LogarithmVault]):
+        """
+        Add the state after a step.
+
+        Args:
+            timestamp (datetime): Time of the step
+            net_balance (float): Sum of the entities' balances
+            total_supply (float): Shares of the meta vault
+            vaults (Dict[str, LogarithmVault]): Logarithm vaults by name
+        """
+        if self.steps == 0:
+            self.start = timestamp
+            self.initial_balance = net_balance
+        elif self.net_balance != 0:
+            step_return = net_balance / self.net_balance - 1
+            self._returns += 1
+            delta = step_return - self._mean_return
+            self._mean_return += delta / self._returns
+            self._m2 += delta * (step_return - self._mean_return)
+        self.steps += 1
+        self.timestamp = timestamp
+        self.net_balance = net_balance
+        self._balance_sum += net_balance
+        self.peak = max(self.peak, net_balance)
+        self.drawdown = net_balance / self.peak - 1 if self.peak > 0 else 0.0
+        self.max_drawdown = min(self.max_drawdown, self.drawdown)
+        self.share_price = net_balance / total_supply if total_supply > 0 else math.nan
+        if math.isnan(self.initial_share_price):
+            self.initial_share_price = self.share_price
+
+        for vault_name, vault in vaults.items():
+            share_price = vault.global_state.share_price
+            metrics = self.vaults.get(vault_name)
+            if metrics is None:
+                metrics = self.vaults[vault_name] = VaultMetrics(share_price=share_price)
+            metrics.gains += metrics.shares * (share_price - metrics.share_price)
+            counters = vault.internal_state
+            metrics.traded = counters.deposited + counters.withdrawn
+            metrics.entry_costs = counters.entry_costs
+            metrics.exit_costs = counters.exit_costs
+            metrics.operations = counters.entries + counters.exits
+            metrics.shares = vault.shares
+            metrics.share_price = share_price
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'OnlineMetrics':
+        """
+        Metrics of a stored result frame, fed row by row like a run. The frame has the `timestamp`,
+        `net_balance` and `meta_vault_total_supply` columns, the vaults are not read.
+        """
+        metrics = cls()
+        for timestamp, net_balance, total_supply in zip(pd.to_datetime(df['timestamp']), df['net_balance'],
+                                                        df['meta_vault_total_supply']):
+            metrics.update(timestamp.to_pydatetime(), net_balance, total_supply, vaults={})
+        return metrics
+
+    @property
+    def years(self) -> float:
+        return (self.timestamp - self.start).total_seconds() / SECONDS_PER_YEAR if self.steps else 0.0
+
+    @property
+    def accumulated_return(self) -> float:
+        return self.net_balance / self.initial_balance - 1 if self.steps else math.nan
+
+    @property
+    def apy(self) -> float:
+        return self.accumulated_return / self.years if self.years > 0 else math.nan
+
+    @property
+    def apr(self) -> float:
+        """
+        Annualized return of the meta vault's share price, which deposits and withdrawals do not change.
+        """
+        if self.years <= 0 or not self.initial_share_price > 0:
+            return math.nan
+        return (self.share_price / self.initial_share_price - 1) / self.years
+
+    @property
+    def return_std(self) -> float:
+        return math.sqrt(self._m2 / (self._returns - 1)) if self._returns > 1 else math.nan
+
+    @property
+    def volatility(self) -> float:
+        """
+        Annualized standard deviation of the net balance returns.
+        """
+        return self.return_std * math.sqrt(self.steps / self.years) if self.years > 0 else math.nan
+
+    @property
+    def sharpe(self) -> float:
+        if self.years <= 0 or self._returns < 2:
+            return math.nan
+        if self.return_std == 0:
+            return 0.0
+        return self._mean_return / self.return_std * math.sqrt(self.steps / self.years)
+
+    @property
+    def traded(self) -> float:
+        return sum(vault.traded for vault in self.vaults.values())
+
+    @property
+    def turnover(self) -> float:
+        """
+        Value traded relative to the average net balance.
+        """
+        return self.traded / (self._balance_sum / self.steps) if self._balance_sum > 0 else 0.0
+
+    @property
+    def entry_costs(self) -> float:
+        return sum(vault.entry_costs for vault in self.vaults.values())
+
+    @property
+    def exit_costs(self) -> float:
+        return sum(vault.exit_costs for vault in self.vaults.values())
+
+    @property
+    def operations(self) -> int:
+        return sum(vault.operations for vault in self.vaults.values())
+
+    def strategy_metrics(self) -> StrategyMetrics:
+        """
+        The default metrics of the run, as `StrategyResult.get_default_metrics` computes them from the result frame.
+        """
+        return StrategyMetrics(accumulated_return=self.accumulated_return, apy=self.apy, sharpe=self.sharpe,
+                               max_drawdown=self.max_drawdown)
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'steps': self.steps, 'net_balance': self.net_balance, 'share_price': self.share_price, 'apr': self.apr,
+            'accumulated_return': self.accumulated_return, 'apy': self.apy, 'sharpe': self.sharpe,
+            'volatility': self.volatility, 'max_drawdown': self.max_drawdown, 'drawdown': self.drawdown,
+            'traded': self.traded, 'turnover': self.turnover, 'entry_costs': self.entry_costs,
+            'exit_costs': self.exit_costs, 'operations': self.operations,
+        }
+
+    def vault_summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Metrics of every vault, with its contribution to the net balance.
+        """
+        return {vault_name: {**asdict(vault), 'contribution': vault.contribution} for vault_name, vault in self.vaults.items()}
@@ -0,0 +1,237 @@
+"""
+Profiling Module
+
+Opt-in instrumentation for strategy runs:
+- `PhaseProfiler` accumulates wall time per named phase with close to no overhead when disabled.
+- `timed_tool` records the invocations of a function tool as a phase.
+- `ProfiledModelProvider` attributes the time spent waiting for model responses to the `model` phase
+  (`analysis_model` for the trend analysis agent).
+- `SamplingProfiler` samples the main thread stack and writes folded stacks for flamegraph tools.
+- `profile_run` wraps a run in cProfile or the sampling profiler.
+"""
+import cProfile
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+from agents import FunctionTool, Model, ModelProvider, ModelResponse, OpenAIProvider
+from agents.items import TResponseStreamEvent
+
+PROFILE_MODES = ('phases', 'cprofile', 'sampling')
+# phases of the agent loops, and the phases within them that are not nested in each other
+# (the share price history tool and the `analysis_model` phase only run inside the trend analysis tool)
+LOOP_PHASES = ('reallocation', 'allocation', 'withdraw', 'decision')
+LEAF_PHASES = ('model', 'validation', 'action_construction',
+               'tool.get_logarithm_vault_infos', 'tool.share_price_trend_analysis')
+
+
+@dataclass
+class PhaseStats:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+
+class _Phase:
+    __slots__ = ('_profiler', '_name', '_start')
+
+    def __init__(self, profiler: 'PhaseProfiler', name: str):
+        self._profiler = profiler
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._profiler.record(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class PhaseProfiler:
+    """
+    Accumulates the wall time of named phases. Phases may be nested, times are inclusive.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._stats: Dict[str, PhaseStats] = {}
+        self._lock = threading.Lock()
+
+    def phase(self, name: str):
+        """
+        Context manager timing the enclosed block as `name`.
+        """
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            stats = self._stats.setdefault(name, PhaseStats())
+            stats.count += 1
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+
+    @property
+    def stats(self) -> Dict[str, PhaseStats]:
+        return dict(self._stats)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per phase count, total, mean and max seconds, plus the framework overhead of the agent
+        loops: loop time not spent waiting for the model, in tools, validation or action construction.
+        """
+        summary = {
+            name: {'count': s.count, 'total': s.total, 'mean': s.total / s.count, 'max': s.max}
+            for name, s in sorted(self._stats.items())
+        }
+        loops = sum(self._stats[name].total for name in LOOP_PHASES if name in self._stats)
+        if loops:
+            accounted = sum(self._stats[name].total for name in LEAF_PHASES if name in self._stats)
+            summary['framework_overhead'] = {'count': 0, 'total': loops - accounted, 'mean': 0.0, 'max': 0.0}
+        return summary
+
+    def report(self) -> str:
+        lines = [f"{'phase':<40} {'count':>7} {'total s':>10} {'mean s':>10} {'max s':>10}"]
+        for name, s in self.summary().items():
+            lines.append(f"{name:<40} {s['count']:>7} {s['total']:>10.4f} {s['mean']:>10.4f} {s['max']:>10.4f}")
+        return "\n".join(lines)
+
+    def write(self, path: Path):
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+def timed_tool(tool: FunctionTool, profiler: PhaseProfiler) -> FunctionTool:
+    """
+    Copy of a function tool whose invocations are recorded as the `tool.<name>` phase.
+    """
+    if not profiler.enabled:
+        return tool
+    on_invoke_tool = tool.on_invoke_tool
+    phase_name = f"tool.{tool.name}"
+
+    async def timed_on_invoke_tool(ctx, input: str):
+        with profiler.phase(phase_name):
+            return await on_invoke_tool(ctx, input)
+
+    return replace(tool, on_invoke_tool=timed_on_invoke_tool)
+
+
+class ProfiledModel(Model):
+    """
+    Model wrapper recording the time of every model call as the `model` phase, or `phase`.
+    """
+
+    def __init__(self, model: Model, profiler: PhaseProfiler, phase: str = 'model'):
+        self._model = model
+        self._profiler = profiler
+        self._phase = phase
+
+    async def get_response(self, *args, **kwargs) -> ModelResponse:
+        with self._profiler.phase(self._phase):
+            return await self._model.get_response(*args, **kwargs)
+
+    async def stream_response(self, *args, **kwargs) -> AsyncIterator[TResponseStreamEvent]:
+        with self._profiler.phase(self._phase):
+            async for event in self._model.stream_response(*args, **kwargs):
+                yield event
+
+
+class ProfiledModelProvider(ModelProvider):
+
+    def __init__(self, profiler: PhaseProfiler, provider: Optional[ModelProvider] = None, phase: str = 'model'):
+        self._profiler = profiler
+        self._provider = provider if provider is not None else OpenAIProvider()
+        self._phase = phase
+
+    def get_model(self, model_name: str | None) -> Model:
+        return ProfiledModel(self._provider.get_model(model_name), self._profiler, self._phase)
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of a thread at a fixed interval and counts folded stacks
+    (`frame;frame;frame count`), the input format of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def write_folded(self, path: Path):
+        with open(path, 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def profile_run(mode: Optional[str], output_dir: Path) -> Iterator[None]:
+    """
+    Wrap a run in cProfile (`profile.prof`) or the sampling profiler (`profile.folded`).
+    Other modes run the block unchanged.
+    """
+    if mode == 'cprofile':
+        output_dir.mkdir(parents=True, exist_ok=True)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(output_dir / 'profile.prof')
+    elif mode == 'sampling':
+        output_dir.mkdir(parents=True, exist_ok=True)
+        profiler = SamplingProfiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            profiler.write_folded(output_dir / 'profile.folded')
+    else:
+        yield
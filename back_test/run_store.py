@@ -0,0 +1,216 @@
+"""
+Run Store Module
+
+This module records backtest runs in a local SQLite database so that runs can be compared
+without re-parsing result files. Run metadata (strategy parameters, model names and summary
+metrics) lives in an indexed `runs` table, and each result column is stored as a compressed
+NumPy blob in `run_columns`, so readers fetch only the columns they need.
+"""
+import argparse
+import io
+import json
+import sqlite3
+import zlib
+from dataclasses import asdict, is_dataclass
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_STORE_PATH = 'runs/results.db'
+METRIC_NAMES = ['accumulated_return', 'apy', 'sharpe', 'max_drawdown']
+
+
+class RunStore:
+    """
+    Indexed local store of backtest runs.
+
+    Methods:
+        record_run(): Stores a result frame together with its parameters, models and metrics.
+        list_runs(): Returns run metadata without touching the column blobs.
+        read_columns(): Reads selected result columns of a run.
+        delete_run(): Removes a run and its columns.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_STORE_PATH):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        # the dashboard reads the store from its request threads, and sweep workers write to it concurrently
+        self.connection = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        self._create_tables()
+
+    def _create_tables(self):
+        metric_columns = ",\n".join(f"{metric} REAL" for metric in METRIC_NAMES)
+        self.connection.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                name TEXT,
+                created_at TEXT NOT NULL,
+                params TEXT NOT NULL,
+                models TEXT NOT NULL,
+                n_rows INTEGER NOT NULL,
+                log_path TEXT,
+                {metric_columns}
+            );
+            CREATE INDEX IF NOT EXISTS runs_created_at ON runs (created_at);
+            CREATE INDEX IF NOT EXISTS runs_apy ON runs (apy);
+            CREATE TABLE IF NOT EXISTS run_columns (
+                run_id TEXT NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+                column_name TEXT NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (run_id, column_name)
+            ) WITHOUT ROWID;
+            """
+        )
+        self.connection.commit()
+
+    @staticmethod
+    def _encode_column(values: pd.Series) -> bytes:
+        if isinstance(values.dtype, pd.DatetimeTZDtype):
+            # timestamps are stored as naive UTC datetimes
+            array = values.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy()
+        elif values.dtype == object:
+            array = values.astype(str).to_numpy().astype('U')
+        else:
+            array = values.to_numpy()
+        buffer = io.BytesIO()
+        np.save(buffer, array, allow_pickle=False)
+        return zlib.compress(buffer.getvalue(), 1)
+
+    @staticmethod
+    def _decode_column(data: bytes) -> np.ndarray:
+        return np.load(io.BytesIO(zlib.decompress(data)), allow_pickle=False)
+
+    def record_run(self, result_df: pd.DataFrame, params: Dict, models: Dict[str, str],
+                   metrics: Optional[object] = None, name: Optional[str] = None,
+                   log_path: Optional[str] = None, run_id: Optional[str] = None) -> str:
+        """
+        Store a run.
+
+        Args:
+            result_df (pd.DataFrame): Result frame as produced by `StrategyResult.to_dataframe()`
+            params (Dict): Strategy parameters
+            models (Dict[str, str]): Model name per agent
+            metrics (StrategyMetrics | Dict | None): Summary metrics of the run
+            name (str | None): Optional human readable name
+            log_path (str | None): Path of the run's log file
+            run_id (str | None): Identifier of the run, a new one when None. Recording a run again under
+                the same identifier replaces it
+
+        Returns:
+            str: Identifier of the stored run
+        """
+        run_id = run_id or str(uuid4())
+        metrics = asdict(metrics) if is_dataclass(metrics) else dict(metrics or {})
+        df = result_df.loc[:, [column for column in result_df.columns if not column.startswith('Unnamed')]]
+        if 'timestamp' in df.columns:
+            df = df.assign(timestamp=pd.to_datetime(df['timestamp'], utc=True))
+
+        with self.connection:
+            self.connection.execute("DELETE FROM run_columns WHERE run_id = ?", (run_id,))
+            self.connection.execute(
+                f"""
+                INSERT OR REPLACE INTO runs (run_id, name, created_at, params, models, n_rows, log_path, {', '.join(METRIC_NAMES)})
+                VALUES (?, ?, ?, ?, ?, ?, ?, {', '.join('?' for _ in METRIC_NAMES)})
+                """,
+                (
+                    run_id, name, datetime.now(UTC).isoformat(), json.dumps(params, default=str),
+                    json.dumps(models), len(df), log_path,
+                    *[float(metrics[metric]) if metrics.get(metric) is not None else None for metric in METRIC_NAMES]
+                )
+            )
+            self.connection.executemany(
+                "INSERT INTO run_columns (run_id, column_name, data) VALUES (?, ?, ?)",
+                ((run_id, column, self._encode_column(df[column])) for column in df.columns)
+            )
+        return run_id
+
+    def list_runs(self, limit: Optional[int] = None, order_by: str = 'created_at') -> pd.DataFrame:
+        """
+        Return the metadata of stored runs, newest first by default.
+        """
+        if order_by not in ['created_at', 'name'] + METRIC_NAMES:
+            raise ValueError(f"Cannot order runs by {order_by}")
+        query = f"SELECT run_id, name, created_at, params, models, n_rows, log_path, {', '.join(METRIC_NAMES)} FROM runs ORDER BY {order_by} DESC"
+        params = []
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        rows = self.connection.execute(query, params).fetchall()
+        return pd.DataFrame([dict(row) for row in rows], columns=[
+            'run_id', 'name', 'created_at', 'params', 'models', 'n_rows', 'log_path', *METRIC_NAMES
+        ])
+
+    def get_run(self, run_id: str) -> Dict:
+        row = self.connection.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Run {run_id} not found")
+        run = dict(row)
+        run['params'] = json.loads(run['params'])
+        run['models'] = json.loads(run['models'])
+        return run
+
+    def list_columns(self, run_id: str) -> List[str]:
+        rows = self.connection.execute(
+            "SELECT column_name FROM run_columns WHERE run_id = ?", (run_id,)
+        ).fetchall()
+        return [row['column_name'] for row in rows]
+
+    def read_columns(self, run_id: str, columns: List[str]) -> pd.DataFrame:
+        """
+        Read the given result columns of a run. Missing columns are skipped.
+        """
+        placeholders = ', '.join('?' for _ in columns)
+        rows = self.connection.execute(
+            f"SELECT column_name, data FROM run_columns WHERE run_id = ? AND column_name IN ({placeholders})",
+            (run_id, *columns)
+        ).fetchall()
+        data = {row['column_name']: self._decode_column(row['data']) for row in rows}
+        df = pd.DataFrame({column: data[column] for column in columns if column in data})
+        if 'timestamp' in df.columns:
+            df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+        return df
+
+    def delete_run(self, run_id: str):
+        with self.connection:
+            self.connection.execute("DELETE FROM run_columns WHERE run_id = ?", (run_id,))
+            self.connection.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+    def close(self):
+        self.connection.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Manage stored backtest runs.")
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH, help="Run store database")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    list_parser = subparsers.add_parser('list', help="List stored runs")
+    list_parser.add_argument('--limit', type=int, default=None)
+    list_parser.add_argument('--order-by', default='created_at')
+    import_parser = subparsers.add_parser('import', help="Store an existing result CSV")
+    import_parser.add_argument('result', help="Strategy result CSV")
+    import_parser.add_argument('--log', default=None, help="Strategy log file")
+    import_parser.add_argument('--name', default=None)
+    args = parser.parse_args(argv)
+
+    store = RunStore(args.store)
+    if args.command == 'list':
+        runs = store.list_runs(limit=args.limit, order_by=args.order_by)
+        print(runs.drop(columns=['params', 'models']).to_string(index=False))
+    else:
+        from back_test.online_metrics import OnlineMetrics
+        df = pd.read_csv(args.result)
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        # the metrics `run_backtest` records
+        metrics = OnlineMetrics.from_frame(df).strategy_metrics()
+        run_id = store.record_run(df, params={}, models={}, metrics=metrics, name=args.name or args.result, log_path=args.log)
+        print(run_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Parameter Sweep Module
+
+Runs the curator strategy over a grid of strategy parameters, or a random sample of it, and records
+every run in the run store, so that the runs can be compared in the dashboard's comparison view.
+
+Besides the strategy parameters, the grid can vary `SEED`, the seed of the loader's Monte Carlo
+simulation of the vault flows. The observations of every distinct set of vaults and seed are built
+once, before the runs start, and handed to each worker process when it starts. The runs execute in
+a process pool, and every finished run is printed and appended to the summary CSV as it completes.
+"""
+import ast
+import csv
+import itertools
+import math
+import random
+import time
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import fields
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+from fractal.core.base import Observation
+from fractal.core.base.strategy.result import StrategyMetrics
+
+from back_test.build_observations import build_observations
+from back_test.curator_strategy import CuratorStrategyParams, run_backtest
+
+# grid dimension of the loader's Monte Carlo seed, not a strategy parameter
+SEED = 'SEED'
+
+ObservationsKey = Tuple[Tuple[str, ...], Optional[int]]
+
+# observations of the runs, set in each worker process by `_init_worker`
+_observations: Dict[ObservationsKey, List[Observation]] = {}
+
+
+def _literal(value: str) -> Any:
+    """
+    Value of a parameter without a typed default, or of a list item: None, a number or a string.
+    """
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value
+
+
+def _flag(value: str) -> bool:
+    """
+    Value of a boolean parameter: true/false or 1/0, in any case.
+    """
+    flags = {'true': True, '1': True, 'false': False, '0': False}
+    if value.lower() not in flags:
+        raise ValueError(f"Invalid boolean value {value}, expected true, false, 1 or 0")
+    return flags[value.lower()]
+
+
+def parse_grid(specs: List[str]) -> Dict[str, List[Any]]:
+    """
+    Parse `NAME=v1,v2,...` specs into a parameter grid, casting the values to the type
+    of the parameter's default value. Boolean parameters take true/false or 1/0.
+    `SEED=1,2,3` varies the loader's Monte Carlo seed.
+    """
+    defaults = CuratorStrategyParams()
+    names = {f.name for f in fields(CuratorStrategyParams)}
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition('=')
+        if name not in names | {SEED} or not values:
+            raise ValueError(f"Invalid grid spec {spec}, expected NAME=v1,v2 with NAME one of {sorted(names | {SEED})}")
+        if name == SEED:
+            grid[name] = [int(value) for value in values.split(',')]
+            continue
+        default = getattr(defaults, name)
+        if isinstance(default, list):
+            # list parameters take '+' separated items, e.g. VAULT_NAMES=btc+eth,btc or FEATURE_WINDOWS=7+30
+            grid[name] = [[_literal(item) for item in value.split('+')] for value in values.split(',')]
+        elif isinstance(default, dict):
+            # dict parameters take '+' separated KEY:VALUE items, e.g. AGENT_MODELS=AnalysisAgent:gpt-4o-mini
+            grid[name] = [dict(item.split(':', 1) for item in value.split('+') if item) for value in values.split(',')]
+        elif default is None:
+            grid[name] = [_literal(value) for value in values.split(',')]
+        elif isinstance(default, bool):
+            grid[name] = [_flag(value) for value in values.split(',')]
+        else:
+            grid[name] = [type(default)(value) for value in values.split(',')]
+    return grid
+
+
+def expand_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """
+    Cartesian product of the grid as a list of parameter overrides.
+    """
+    return [dict(zip(grid.keys(), values)) for values in itertools.product(*grid.values())]
+
+
+def sample_grid(grid: Dict[str, List[Any]], samples: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Random search: `samples` distinct combinations of the grid, drawn without expanding it,
+    or the whole grid when it has no more combinations.
+    """
+    sizes = [len(values) for values in grid.values()]
+    total = math.prod(sizes)
+    if samples >= total:
+        return expand_grid(grid)
+    combinations = []
+    for index in random.Random(seed).sample(range(total), samples):
+        # decode the combination's index, the last parameter varying fastest like in `expand_grid`
+        overrides = {}
+        for (name, values), size in zip(reversed(grid.items()), reversed(sizes)):
+            index, position = divmod(index, size)
+            overrides[name] = values[position]
+        combinations.append({name: overrides[name] for name in grid})
+    return combinations
+
+
+def observations_key(overrides: Dict[str, Any]) -> ObservationsKey:
+    """
+    Vault names and seed of the observations a run's parameter overrides need.
+    """
+    vault_names = overrides.get('VAULT_NAMES', CuratorStrategyParams().VAULT_NAMES)
+    return tuple(vault_names), overrides.get(SEED)
+
+
+def build_sweep_observations(runs: List[Dict[str, Any]]) -> Dict[ObservationsKey, List[Observation]]:
+    """
+    Observations of every distinct set of vaults and seed of the runs, each built once.
+    """
+    observations = {}
+    for overrides in runs:
+        key = observations_key(overrides)
+        if key in observations:
+            continue
+        vault_names, seed = key
+        if seed is None:
+            # the loader's previous output, like `run_backtest`
+            observations[key] = build_observations(False, log_vault_names=list(vault_names))
+        else:
+            observations[key] = build_observations(True, log_vault_names=list(vault_names), seed=seed)
+    return observations
+
+
+def _init_worker(observations: Dict[ObservationsKey, List[Observation]]):
+    global _observations
+    _observations = observations
+
+
+def _run_name(overrides: Dict[str, Any]) -> str:
+    return ", ".join(f"{key}={value}" for key, value in overrides.items())
+
+
+def _run(index: int, overrides: Dict[str, Any], record: bool) -> Dict[str, Any]:
+    """
+    Run one combination on the shared observations. A failed run is reported in the `error` column
+    instead of stopping the sweep.
+    """
+    start = time.perf_counter()
+    observations = _observations[observations_key(overrides)]
+    params = CuratorStrategyParams(**{key: value for key, value in overrides.items() if key != SEED})
+    row = {'run': index, **overrides}
+    try:
+        _, metrics = run_backtest(params, debug=False, record=record, result_path=None,
+                                  name=_run_name(overrides), observations=observations)
+        row.update(metrics.__dict__)
+    except Exception as e:
+        row['error'] = f"{type(e).__name__}: {e}"
+    row.update({'steps': len(observations), 'seconds': time.perf_counter() - start})
+    return row
+
+
+def run_sweep(grid: Dict[str, List[Any]], record: bool = True, workers: int = 1, samples: Optional[int] = None,
+              sample_seed: int = 0, output: Optional[str] = None) -> pd.DataFrame:
+    """
+    Run one backtest per combination of the grid.
+
+    Args:
+        grid (Dict[str, List[Any]]): Values of each swept parameter
+        record (bool): Record the runs in the run store
+        workers (int): Number of worker processes, the runs execute in this process with 1
+        samples (Optional[int]): Run this many random combinations instead of the whole grid
+        sample_seed (int): Seed of the random combinations
+        output (Optional[str]): CSV file the summary rows are appended to as the runs finish
+
+    Returns:
+        pd.DataFrame: Parameter overrides, metrics, steps and duration of every run, in grid order
+    """
+    runs = expand_grid(grid) if samples is None else sample_grid(grid, samples, sample_seed)
+    observations = build_sweep_observations(runs)
+    columns = ['run', *grid, *(f.name for f in fields(StrategyMetrics)), 'steps', 'seconds', 'error']
+
+    rows = []
+    start = time.perf_counter()
+    with open(output, 'w', newline='') if output is not None else nullcontext() as summary_file:
+        writer = csv.DictWriter(summary_file, fieldnames=columns, restval='') if output is not None else None
+        if writer is not None:
+            writer.writeheader()
+
+        def report(row: Dict[str, Any]):
+            rows.append(row)
+            if writer is not None:
+                writer.writerow(row)
+                summary_file.flush()
+            elapsed = time.perf_counter() - start
+            outcome = row.get('error') or ", ".join(f"{f.name}={row[f.name]:.4g}" for f in fields(StrategyMetrics))
+            print(f"[{len(rows)}/{len(runs)}] {_run_name(runs[row['run']])}: {outcome} "
+                  f"({row['seconds']:.1f}s, {len(rows) / elapsed:.2f} runs/s)", flush=True)
+
+        if workers <= 1:
+            _init_worker(observations)
+            for index, overrides in enumerate(runs):
+                report(_run(index, overrides, record))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(observations,)) as pool:
+                futures = [pool.submit(_run, index, overrides, record) for index, overrides in enumerate(runs)]
+                for future in as_completed(futures):
+                    report(future.result())
+
+    elapsed = time.perf_counter() - start
+    busy = sum(row['seconds'] for row in rows)
+    steps = sum(row['steps'] for row in rows)
+    print(f"{len(rows)} runs in {elapsed:.1f}s: {len(rows) / elapsed:.2f} runs/s, {steps / elapsed:.1f} steps/s, "
+          f"{busy / elapsed:.1f} runs in flight on average with {max(workers, 1)} workers")
+    return pd.DataFrame(rows, columns=columns).sort_values('run').reset_index(drop=True)
@@ -0,0 +1,224 @@
+"""
+Trace Export Module
+
+Local, batched export of the openai-agents traces, for offline and air-gapped runs:
+- `LocalTraceProcessor` keeps the ended spans of the sampled traces in a bounded in-memory buffer and
+  writes them in batches on a background thread, one flat record per span with its timing, agent,
+  tool call and token usage.
+- `JsonlSpanWriter` and `ParquetSpanWriter` append the batches to a JSON lines or Parquet file.
+- `local_tracing` replaces the registered trace processors with a local one for the duration of a block.
+"""
+import json
+import threading
+import zlib
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+import agents.tracing
+from agents.tracing import Span, Trace, TracingProcessor, set_trace_processors
+from agents.tracing.processors import default_processor
+from agents.tracing.span_data import AgentSpanData, FunctionSpanData, GenerationSpanData, ResponseSpanData
+
+TRACE_FORMATS = ('jsonl', 'parquet')
+# columns of a span record
+SPAN_FIELDS = (
+    'trace_id', 'trace_name', 'span_id', 'parent_id', 'type', 'name', 'agent', 'started_at', 'ended_at',
+    'duration_ms', 'model', 'input_tokens', 'output_tokens', 'total_tokens', 'tool_input', 'tool_output', 'error',
+)
+
+
+class JsonlSpanWriter:
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def write(self, records: List[Dict[str, Any]]):
+        with open(self.path, 'a') as f:
+            f.writelines(json.dumps(record, separators=(',', ':')) + "\n" for record in records)
+
+    def close(self):
+        pass
+
+
+class ParquetSpanWriter:
+    """
+    Writes every batch as a row group of one Parquet file, which is readable once the writer is closed.
+    """
+
+    def __init__(self, path: Path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Exporting traces to Parquet requires pyarrow") from e
+        self._pa = pa
+        self._schema = pa.schema([
+            (name, pa.float64() if name == 'duration_ms' else pa.int64() if name.endswith('_tokens') else pa.string())
+            for name in SPAN_FIELDS
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self.path = path
+
+    def write(self, records: List[Dict[str, Any]]):
+        self._writer.write_table(self._pa.Table.from_pylist(records, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def _duration_ms(started_at: Optional[str], ended_at: Optional[str]) -> Optional[float]:
+    if started_at is None or ended_at is None:
+        return None
+    return (datetime.fromisoformat(ended_at) - datetime.fromisoformat(started_at)).total_seconds() * 1000
+
+
+class LocalTraceProcessor(TracingProcessor):
+    """
+    Trace processor writing the spans of a `sample_rate` fraction of the traces to a local file.
+
+    The tracing callbacks only sample and enqueue, the records are built and written by a background
+    thread every `flush_interval` seconds or `batch_size` spans. When more than `max_queue_size` spans
+    are waiting, new spans are dropped and counted in `dropped`. Sampling is deterministic per trace id,
+    so a trace is either written completely or not at all.
+    """
+
+    def __init__(self, path: Path, format: str = 'jsonl', sample_rate: float = 1.0, batch_size: int = 256,
+                 flush_interval: float = 1.0, max_queue_size: int = 100_000):
+        if format not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format {format}, expected one of {TRACE_FORMATS}")
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("The trace sample rate must be between 0 and 1")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = ParquetSpanWriter(self.path) if format == 'parquet' else JsonlSpanWriter(self.path)
+        self.sample_rate = sample_rate
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self.dropped = 0
+        self.written = 0
+
+        self._queue: Deque[Tuple[Span[Any], str, Optional[str]]] = deque()
+        # names of the running sampled traces and agent spans, to label the records of their spans
+        self._trace_names: Dict[str, str] = {}
+        self._agent_names: Dict[str, str] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._write_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='trace-export', daemon=True)
+        self._thread.start()
+
+    def _sampled(self, trace_id: str) -> bool:
+        if self.sample_rate >= 1:
+            return True
+        return zlib.crc32(trace_id.encode()) < self.sample_rate * 2 ** 32
+
+    def on_trace_start(self, trace: Trace) -> None:
+        if self._sampled(trace.trace_id):
+            self._trace_names[trace.trace_id] = trace.name
+
+    def on_trace_end(self, trace: Trace) -> None:
+        self._trace_names.pop(trace.trace_id, None)
+
+    def on_span_start(self, span: Span[Any]) -> None:
+        if span.trace_id in self._trace_names and isinstance(span.span_data, AgentSpanData):
+            self._agent_names[span.span_id] = span.span_data.name
+
+    def on_span_end(self, span: Span[Any]) -> None:
+        trace_name = self._trace_names.get(span.trace_id)
+        if trace_name is None:
+            return
+        # an agent span ends after the spans it contains
+        agent = self._agent_names.pop(span.span_id, None) or self._agent_names.get(span.parent_id)
+        if len(self._queue) >= self.max_queue_size:
+            self.dropped += 1
+            return
+        self._queue.append((span, trace_name, agent))
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+
+    def _record(self, span: Span[Any], trace_name: str, agent: Optional[str]) -> Dict[str, Any]:
+        data = span.span_data
+        record = dict.fromkeys(SPAN_FIELDS)
+        record.update(
+            trace_id=span.trace_id,
+            trace_name=trace_name,
+            span_id=span.span_id,
+            parent_id=span.parent_id,
+            type=data.type,
+            agent=agent,
+            started_at=span.started_at,
+            ended_at=span.ended_at,
+            duration_ms=_duration_ms(span.started_at, span.ended_at),
+            error=span.error['message'] if span.error else None,
+        )
+        if isinstance(data, AgentSpanData):
+            record['name'] = data.name
+        elif isinstance(data, FunctionSpanData):
+            record.update(name=data.name, tool_input=data.input,
+                          tool_output=str(data.output) if data.output is not None else None)
+        elif isinstance(data, ResponseSpanData) and data.response is not None:
+            usage = data.response.usage
+            record.update(name=data.response.model, model=data.response.model)
+            if usage is not None:
+                record.update(input_tokens=usage.input_tokens, output_tokens=usage.output_tokens,
+                              total_tokens=usage.total_tokens)
+        elif isinstance(data, GenerationSpanData):
+            usage = data.usage or {}
+            record.update(name=data.model, model=data.model, input_tokens=usage.get('input_tokens'),
+                          output_tokens=usage.get('output_tokens'),
+                          total_tokens=(usage.get('input_tokens') or 0) + (usage.get('output_tokens') or 0) if usage else None)
+        else:
+            record['name'] = getattr(data, 'name', None)
+        return record
+
+    def _export(self):
+        with self._write_lock:
+            while self._queue:
+                batch = []
+                while self._queue and len(batch) < self.batch_size:
+                    batch.append(self._record(*self._queue.popleft()))
+                self._writer.write(batch)
+                self.written += len(batch)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._export()
+
+    def force_flush(self) -> None:
+        self._export()
+
+    def shutdown(self) -> None:
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._export()
+        self._writer.close()
+
+
+@contextmanager
+def local_tracing(path: Path, format: str = 'jsonl', sample_rate: float = 1.0) -> Iterator[LocalTraceProcessor]:
+    """
+    Export the traces of the block with a `LocalTraceProcessor` instead of the hosted backend,
+    and restore the processors that were registered before afterwards.
+    """
+    # the provider exposes no getter, in openai-agents 0.0.9 its multi processor holds the registered
+    # processors, other versions restore the default processor
+    try:
+        previous = list(agents.tracing.GLOBAL_TRACE_PROVIDER._multi_processor._processors)
+    except AttributeError:
+        previous = [default_processor()]
+    processor = LocalTraceProcessor(path, format=format, sample_rate=sample_rate)
+    set_trace_processors([processor])
+    try:
+        yield processor
+    finally:
+        set_trace_processors(previous)
+        processor.shutdown()
@@ -38,6 +38,7 @@ You must recommend:
 - If `allocation > pending_withdrawals`: `entry_cost = (allocation - pending_withdrawals) * entry_cost_rate / (entry_cost_rate + 1)`
 
 ### Tools Available
+When the message contains vault cost quotes, use them instead of calling `get_logarithm_vault_infos`.
 - `get_logarithm_vault_infos`: retrieves current share price, pending withdrawals and cost info
 - `share_price_trend_analysis`: performance direction and forecast
 """
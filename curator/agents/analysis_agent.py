@@ -10,6 +10,8 @@ You are given a list of vault names.
 Your task is to analyze the **recent share price trend** of each vault and provide an **optional short-term forecast** based on share price history.
 
 You can call the available tool (e.g. `get_share_price_history`) to get the share price history.
+If the history is returned in compact form with `stats`, use the precomputed `slope_bps` and `r_squared` instead of refitting the series.
+If `get_vault_features` is available, use its rolling `slope`, `r_squared`, `volatility` and `drawdown` of each window instead of refitting the history.
 
 ### Assumptions
 
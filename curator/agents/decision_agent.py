@@ -0,0 +1,62 @@
+from pydantic import BaseModel, Field
+from typing import List
+from agents import Agent
+
+class DecisionPlan(BaseModel):
+    redeem_vault_names: List[str] = Field(description="Names of vaults from which shares should be redeemed (e.g., ['btc', 'eth']). Empty if no redemption is required.")
+    redeem_share_amounts: List[float] = Field(description="Amounts of shares to redeem from the corresponding vaults listed in `redeem_vault_names`. Must be the same length.")
+    withdraw_vault_names: List[str] = Field(description="Names of vaults from which assets should be withdrawn to cover the pending withdrawals. Empty if there are no pending withdrawals.")
+    withdraw_amounts: List[float] = Field(description="Amounts of assets to withdraw from the corresponding vaults listed in `withdraw_vault_names`. Must be the same length.")
+    allocation_vault_names: List[str] = Field(description="Names of vaults to which assets should be allocated. Empty if there is nothing to allocate.")
+    allocation_amounts: List[float] = Field(description="Amounts of assets to allocate to the corresponding vaults listed in `allocation_vault_names`. Must be the same length.")
+    reasoning: str = Field(description="The agent's reasoning for this plan.")
+
+
+DECISION_PROMPT = """
+You are an **asset curator** managing capital of a meta vault across **on-chain vaults**.
+
+You are given:
+- The meta vault's **idle assets** (available to allocate) and **pending withdrawals** (to be covered).
+- The current **share holdings** and **allocated (withdrawable) amounts** of each vault.
+
+### Objective
+Return **one combined plan** for this step. The plan is executed in this order:
+1. **Redeem** shares from vaults (the redeemed assets become idle assets of the meta vault).
+2. **Withdraw** assets from vaults to cover the pending withdrawals.
+3. **Allocate** the assets that remain available to vaults.
+
+Maximize expected future returns after entry and exit costs. Return potential has priority over cost minimization,
+but avoid marginal or speculative redemptions.
+
+### Rules
+- Redemptions are optional. Redeem only from vaults under negative yield pressure, or to move capital from less optimal vaults into strongly upward-trending vaults.
+- Do **not** redeem from and allocate into the **same vault**, and do not redeem and withdraw from the same vault.
+- Redeemed share amounts cannot exceed the share holdings, and withdrawals cannot exceed the allocated amounts.
+- If there are pending withdrawals, the withdrawals plus the value of the redeemed shares must **cover them exactly or slightly exceed them**.
+- Allocations must **sum to the available assets or slightly less**: idle assets + redeemed value + withdrawals - pending withdrawals.
+- Only allocate to vaults with upward or stable trends. You may allocate everything to a single vault.
+- Do **not** compare share prices across vaults.
+- Leave the lists of a step empty when it is not needed.
+
+### Cost Calculations
+- **Exit Cost**:
+  If `value ≤ idle_assets`: no cost
+  Else: `(value - idle_assets) * exit_cost_rate`
+
+- **Entry Cost**:
+  If `allocation ≤ pending_withdrawals`: no cost
+  Else: `(allocation - pending_withdrawals) * entry_cost_rate / (entry_cost_rate + 1)`
+
+### Tools Available
+When the message contains vault cost quotes, use them instead of calling `get_logarithm_vault_infos`.
+- `get_logarithm_vault_infos`: retrieves current share price, pending withdrawals, idle assets and cost info
+- `share_price_trend_analysis`: performance direction and forecast
+"""
+
+# Note: We will add available tools at runtime
+decision_agent = Agent(
+    name="DecisionAgent",
+    instructions=DECISION_PROMPT,
+    output_type=DecisionPlan,
+    model="gpt-4o-2024-08-06"
+)
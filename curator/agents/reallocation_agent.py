@@ -44,6 +44,7 @@ Your task is to **analyze current holdings and vault performance**, and recommen
   Else: `(allocation - pending_withdrawals) * entry_cost_rate / (entry_cost_rate + 1)`
 
 ### Tools Available
+When the message contains vault cost quotes, use them instead of calling `get_logarithm_vault_infos`.
 - `get_logarithm_vault_infos`: retrieves current share price, pending withdrawals, idle assets and cost info
 - `share_price_trend_analysis`: performance direction and forecast
 """
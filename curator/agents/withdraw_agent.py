@@ -36,6 +36,7 @@ Your goal is to:
 - If `withdrawal > idle_assets`: `exit_cost = (withdrawal - idle_assets) * exit_cost_rate`
 
 ### Tools Available
+When the message contains vault cost quotes, use them instead of calling `get_logarithm_vault_infos`.
 - `get_logarithm_vault_infos`: retrieves current share price, idle_assets and cost info.
 - `share_price_trend_analysis`: performance direction and forecast
 """
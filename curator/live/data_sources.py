@@ -0,0 +1,223 @@
+"""
+Live data sources.
+
+A data source reads the state of the meta vault and of its target Logarithm vaults.
+The remote sources share one pooled `httpx.AsyncClient`, fetch the vaults concurrently and
+bound every request by the source's timeout.
+
+State payloads:
+- meta vault: `{"idle_assets": float, "pending_withdrawals": float}`
+- vault: `{"share_price": float, "idle_assets": float, "pending_withdrawals": float, "shares": float}`,
+  where `shares` are the shares held by the meta vault
+
+- tenant: `{"idle_assets": float, "pending_withdrawals": float, "shares": {vault_name: float}}`, the state of
+  one of many meta vaults over a shared vault universe, whose vault payloads may then omit `shares`
+
+HTTP sources serve them at `GET {base_url}/meta_vault`, `GET {base_url}/vaults/{vault_name}` and
+`GET {base_url}/meta_vaults/{tenant_id}`, JSON-RPC 2.0 sources answer the methods `curator_getMetaVault`,
+`curator_getVault` (params `[vault_name]`) and `curator_getTenant` (params `[tenant_id]`).
+"""
+import asyncio
+from dataclasses import dataclass, replace
+from datetime import datetime, UTC
+from typing import Any, Dict, List
+
+import httpx
+
+JSONRPC_META_VAULT_METHOD = "curator_getMetaVault"
+JSONRPC_VAULT_METHOD = "curator_getVault"
+JSONRPC_TENANT_METHOD = "curator_getTenant"
+
+
+class DataSourceError(Exception):
+    """
+    Exception raised when a data source cannot provide a valid state.
+    """
+
+
+@dataclass
+class VaultSnapshot:
+    share_price: float
+    idle_assets: float
+    pending_withdrawals: float
+    shares: float
+
+
+@dataclass
+class CuratorSnapshot:
+    """
+    State of the meta vault and its target vaults at one poll.
+    """
+    timestamp: datetime
+    idle_assets: float
+    pending_withdrawals: float
+    vaults: Dict[str, VaultSnapshot]
+
+
+def _float_fields(payload: Dict[str, Any], names: List[str], source: str) -> Dict[str, float]:
+    try:
+        return {name: float(payload[name]) for name in names}
+    except (KeyError, TypeError, ValueError) as e:
+        raise DataSourceError(f"Invalid {source} state {payload}: {e}") from e
+
+
+class DataSource:
+    """
+    Base class of the data sources, fetching the vaults concurrently.
+    """
+    timeout: float = 10.0
+
+    async def fetch_meta_vault(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def fetch_vault(self, vault_name: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def fetch_tenant(self, tenant_id: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def fetch(self, vault_names: List[str]) -> CuratorSnapshot:
+        """
+        Fetch the meta vault and all vaults concurrently.
+
+        Raises:
+            DataSourceError: When a fetch fails, times out or returns an invalid state
+        """
+        try:
+            meta_vault, *vaults = await asyncio.gather(
+                self.fetch_meta_vault(), *(self.fetch_vault(vault_name) for vault_name in vault_names)
+            )
+        except (httpx.HTTPError, asyncio.TimeoutError) as e:
+            raise DataSourceError(f"Failed to fetch the vault states: {e!r}") from e
+        meta_state = _float_fields(meta_vault, ['idle_assets', 'pending_withdrawals'], 'meta vault')
+        return CuratorSnapshot(
+            timestamp=datetime.now(UTC),
+            vaults={
+                vault_name: VaultSnapshot(**_float_fields(
+                    vault, ['share_price', 'idle_assets', 'pending_withdrawals', 'shares'], vault_name))
+                for vault_name, vault in zip(vault_names, vaults)
+            },
+            **meta_state
+        )
+
+    async def fetch_market(self, vault_names: List[str]) -> Dict[str, VaultSnapshot]:
+        """
+        Fetch the states shared by all tenants, i.e. the vaults without the holdings of a meta vault.
+
+        Raises:
+            DataSourceError: When a fetch fails, times out or returns an invalid state
+        """
+        try:
+            vaults = await asyncio.gather(*(self.fetch_vault(vault_name) for vault_name in vault_names))
+        except (httpx.HTTPError, asyncio.TimeoutError) as e:
+            raise DataSourceError(f"Failed to fetch the vault states: {e!r}") from e
+        return {
+            vault_name: VaultSnapshot(shares=0.0, **_float_fields(
+                vault, ['share_price', 'idle_assets', 'pending_withdrawals'], vault_name))
+            for vault_name, vault in zip(vault_names, vaults)
+        }
+
+    async def fetch_tenant_snapshot(self, tenant_id: str, market: Dict[str, VaultSnapshot],
+                                    timestamp: datetime) -> CuratorSnapshot:
+        """
+        Fetch the state of the tenant's meta vault and combine it with the shared market states.
+
+        Raises:
+            DataSourceError: When the fetch fails, times out or returns an invalid state
+        """
+        try:
+            tenant = await self.fetch_tenant(tenant_id)
+        except (httpx.HTTPError, asyncio.TimeoutError) as e:
+            raise DataSourceError(f"Failed to fetch the state of {tenant_id}: {e!r}") from e
+        meta_state = _float_fields(tenant, ['idle_assets', 'pending_withdrawals'], tenant_id)
+        shares = tenant.get('shares') or {}
+        try:
+            vaults = {vault_name: replace(vault, shares=float(shares.get(vault_name, 0.0)))
+                      for vault_name, vault in market.items()}
+        except (AttributeError, TypeError, ValueError) as e:
+            raise DataSourceError(f"Invalid {tenant_id} shares {shares}: {e}") from e
+        return CuratorSnapshot(timestamp=timestamp, vaults=vaults, **meta_state)
+
+    async def aclose(self):
+        pass
+
+
+class HttpDataSource(DataSource):
+    """
+    Reads the states from a JSON HTTP API.
+
+    Args:
+        base_url (str): Base URL of the API
+        timeout (float): Seconds allowed for each request
+        max_connections (int): Size of the connection pool
+    """
+
+    def __init__(self, base_url: str, timeout: float = 10.0, max_connections: int = 16,
+                 client: httpx.AsyncClient | None = None):
+        self.timeout = timeout
+        self._client = client or httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def _get(self, path: str) -> Dict[str, Any]:
+        response = await self._client.get(path)
+        response.raise_for_status()
+        return response.json()
+
+    async def fetch_meta_vault(self) -> Dict[str, Any]:
+        return await self._get("/meta_vault")
+
+    async def fetch_vault(self, vault_name: str) -> Dict[str, Any]:
+        return await self._get(f"/vaults/{vault_name}")
+
+    async def fetch_tenant(self, tenant_id: str) -> Dict[str, Any]:
+        return await self._get(f"/meta_vaults/{tenant_id}")
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+class JsonRpcDataSource(DataSource):
+    """
+    Reads the states from a JSON-RPC 2.0 endpoint.
+
+    Args:
+        url (str): URL of the endpoint
+        timeout (float): Seconds allowed for each request
+        max_connections (int): Size of the connection pool
+    """
+
+    def __init__(self, url: str, timeout: float = 10.0, max_connections: int = 16,
+                 client: httpx.AsyncClient | None = None):
+        self.url = url
+        self.timeout = timeout
+        self._client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self._request_id = 0
+
+    async def _call(self, method: str, params: List[Any]) -> Dict[str, Any]:
+        self._request_id += 1
+        response = await self._client.post(self.url, json={
+            "jsonrpc": "2.0", "id": self._request_id, "method": method, "params": params
+        })
+        response.raise_for_status()
+        payload = response.json()
+        if "error" in payload:
+            raise DataSourceError(f"{method} failed: {payload['error']}")
+        return payload["result"]
+
+    async def fetch_meta_vault(self) -> Dict[str, Any]:
+        return await self._call(JSONRPC_META_VAULT_METHOD, [])
+
+    async def fetch_vault(self, vault_name: str) -> Dict[str, Any]:
+        return await self._call(JSONRPC_VAULT_METHOD, [vault_name])
+
+    async def fetch_tenant(self, tenant_id: str) -> Dict[str, Any]:
+        return await self._call(JSONRPC_TENANT_METHOD, [tenant_id])
+
+    async def aclose(self):
+        await self._client.aclose()
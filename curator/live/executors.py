@@ -0,0 +1,172 @@
+"""
+Live action executors.
+
+An executor submits the actions decided by the curator, in execution order. Actions are serialized as
+`{"entity_name": str, "action": str, "targets": [vault_name, ...], "amounts": [float, ...]}`.
+
+`BatchedExecutor` coalesces the actions of a decision into vault calls (see `curator.utils.action_batching`)
+and submits them as one batch to a multicall backend. Calls are serialized as
+`{"operation": "redeem" | "withdraw" | "deposit", "vault_name": str, "amount": float}`.
+"""
+import logging
+from dataclasses import asdict
+from typing import Any, Dict, List
+
+import httpx
+from fractal.core.base import ActionToTake
+
+from back_test.entities.logarithm_vault import LogarithmVault
+from back_test.entities.meta_vault import DUST, MetaVault
+from curator.utils.action_batching import VaultCall, calls_to_actions, coalesce_actions, count_legs
+
+logger = logging.getLogger(__name__)
+
+
+def serialize_action(action: ActionToTake) -> Dict[str, Any]:
+    args = action.action.args
+    return {
+        "entity_name": action.entity_name,
+        "action": action.action.action,
+        "targets": [target.entity_name for target in args['targets']],
+        "amounts": [float(amount) for amount in args['amounts']],
+    }
+
+
+class Executor:
+    """
+    Base class of the executors.
+    """
+
+    async def submit(self, actions: List[ActionToTake]) -> None:
+        raise NotImplementedError
+
+    async def aclose(self):
+        pass
+
+
+class LoggingExecutor(Executor):
+    """
+    Dry run executor, logging the actions without submitting them.
+    """
+
+    def __init__(self):
+        self.submitted: List[Dict[str, Any]] = []
+
+    async def submit(self, actions: List[ActionToTake]) -> None:
+        for action in map(serialize_action, actions):
+            logger.info(f"Dry run action: {action}")
+            self.submitted.append(action)
+
+
+class HttpExecutor(Executor):
+    """
+    Submits the actions of a decision in one `POST {base_url}{path}` request with body `{"actions": [...]}`.
+    The tenants of a scheduler share the client of one executor through `for_path`.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 30.0, client: httpx.AsyncClient | None = None,
+                 path: str = "/actions"):
+        self._client = client or httpx.AsyncClient(base_url=base_url, timeout=httpx.Timeout(timeout))
+        self.path = path
+        self._owns_client = True
+
+    def for_path(self, path: str) -> 'HttpExecutor':
+        """
+        Executor posting to `path` through this executor's client, which stays owned by this executor.
+        """
+        executor = HttpExecutor(base_url='', client=self._client, path=path)
+        executor._owns_client = False
+        return executor
+
+    async def submit(self, actions: List[ActionToTake]) -> None:
+        response = await self._client.post(self.path, json={"actions": [serialize_action(action) for action in actions]})
+        response.raise_for_status()
+
+    async def aclose(self):
+        if self._owns_client:
+            await self._client.aclose()
+
+
+class MulticallBackend:
+    """
+    Base class of the backends executing a batch of vault calls at once.
+    """
+
+    async def submit(self, calls: List[VaultCall]) -> None:
+        raise NotImplementedError
+
+    async def aclose(self):
+        pass
+
+
+class EntityBackend(MulticallBackend):
+    """
+    Reference backend, executing the calls on in-process entities with one meta vault action per operation.
+    """
+
+    def __init__(self, meta_vault: MetaVault, vaults: Dict[str, LogarithmVault]):
+        self.meta_vault = meta_vault
+        self.vaults = vaults
+
+    async def submit(self, calls: List[VaultCall]) -> None:
+        for action in calls_to_actions(calls, self.vaults.__getitem__):
+            self.meta_vault.execute(action.action)
+
+
+class HttpMulticallBackend(MulticallBackend):
+    """
+    Submits a batch in one `POST {base_url}{path}` request with body `{"calls": [...]}`,
+    executed atomically by the server.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 30.0, client: httpx.AsyncClient | None = None,
+                 path: str = "/multicall"):
+        self._client = client or httpx.AsyncClient(base_url=base_url, timeout=httpx.Timeout(timeout))
+        self.path = path
+        self._owns_client = True
+
+    def for_path(self, path: str) -> 'HttpMulticallBackend':
+        """
+        Backend posting to `path` through this backend's client, which stays owned by this backend.
+        """
+        backend = HttpMulticallBackend(base_url='', client=self._client, path=path)
+        backend._owns_client = False
+        return backend
+
+    async def submit(self, calls: List[VaultCall]) -> None:
+        response = await self._client.post(self.path, json={"calls": [asdict(call) for call in calls]})
+        response.raise_for_status()
+
+    async def aclose(self):
+        if self._owns_client:
+            await self._client.aclose()
+
+
+class BatchedExecutor(Executor):
+    """
+    Nets the vault operations of a decision and submits what is left as one batch.
+
+    Args:
+        backend (MulticallBackend): Receiver of the batches
+        dust (float): Calls worth at most this many assets are dropped
+    """
+
+    def __init__(self, backend: MulticallBackend, dust: float = DUST):
+        self.backend = backend
+        self.dust = dust
+        self.batches = 0
+        self.legs = 0
+        self.calls = 0
+
+    async def submit(self, actions: List[ActionToTake]) -> None:
+        calls = coalesce_actions(actions, self.dust)
+        self.legs += count_legs(actions)
+        if not calls:
+            return
+        await self.backend.submit(calls)
+        self.batches += 1
+        self.calls += len(calls)
+        logger.debug(f"Submitted {len(calls)} calls for {count_legs(actions)} vault operations")
+
+    async def aclose(self):
+        await self.backend.aclose()
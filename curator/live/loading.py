@@ -0,0 +1,51 @@
+"""
+Loading of live snapshots into the strategy's entities.
+"""
+from fractal.core.base import NamedEntity
+from fractal.core.base.observations import Observation
+
+from back_test.constants import META_VAULT_NAME
+from back_test.curator_strategy import CuratorStrategy
+from back_test.entities.logarithm_vault import LogarithmVault, LogarithmVaultGlobalState
+from back_test.entities.meta_vault import MetaVault, MetaVaultGlobalState
+from curator.live.data_sources import CuratorSnapshot
+
+
+def snapshot_observation(snapshot: CuratorSnapshot) -> Observation:
+    return Observation(
+        timestamp=snapshot.timestamp,
+        states={
+            META_VAULT_NAME: MetaVaultGlobalState(),
+            **{vault_name: LogarithmVaultGlobalState(share_price=vault.share_price, idle_assets=vault.idle_assets,
+                                                     pending_withdrawals=vault.pending_withdrawals)
+               for vault_name, vault in snapshot.vaults.items()}
+        }
+    )
+
+
+def load_snapshot(strategy: CuratorStrategy, snapshot: CuratorSnapshot, write_observation: bool = True):
+    """
+    Load the snapshot into the strategy's entities and add their state to the strategy's online metrics.
+
+    Args:
+        strategy (CuratorStrategy): Strategy to load
+        snapshot (CuratorSnapshot): State of the meta vault and its target vaults
+        write_observation (bool): Record the snapshot in the strategy's observations storage
+            and the features, disabled when they are shared and the observation was already recorded
+    """
+    observation = snapshot_observation(snapshot)
+    if write_observation:
+        strategy.observations_storage.write(observation)
+        strategy.update_features(observation)
+
+    allocated_vaults = []
+    for vault_name, state in observation.states.items():
+        entity = strategy.get_entity(vault_name)
+        entity.update_state(state)
+        if isinstance(entity, LogarithmVault):
+            entity.load_shares(snapshot.vaults[vault_name].shares)
+            if entity.shares > 0:
+                allocated_vaults.append(NamedEntity(entity_name=vault_name, entity=entity))
+    meta_vault: MetaVault = strategy.get_entity(META_VAULT_NAME)
+    meta_vault.load_assets(snapshot.idle_assets, snapshot.pending_withdrawals, allocated_vaults)
+    strategy.update_metrics(snapshot.timestamp)
@@ -0,0 +1,259 @@
+"""
+Multi-tenant curator scheduler.
+
+Hosts many meta vaults (tenants) over one shared vault universe in one process. Every poll fetches the
+shared vault states once, records them in one observations storage (and feature store) read by all
+tenants, and starts a new version of the shared analysis cache, so equal trend analyses run once per poll for all tenants. Then
+it fetches the holdings of the tenants and queues a decision job for each tenant whose decision schedule
+is due.
+
+A pool of asyncio workers runs the decision jobs in start-time fair order: a job's start tag is the
+later of the current virtual time and the finish tag of the tenant's previous job, and each job
+advances the tenant's finish tag by `1 / weight`. Busy workers therefore serve the tenants in proportion
+to their weights, however many jobs a tenant is due. A tenant has at most one decision queued or running,
+and skips the polls until it completes, so its entities never change under a running decision.
+The model requests of a tenant are limited to `tenant_max_requests` at a time.
+"""
+import asyncio
+import itertools
+import logging
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime, UTC
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from agents import Model, ModelProvider, ModelResponse, OpenAIProvider
+from agents.items import TResponseStreamEvent
+
+from back_test.curator_strategy import CuratorStrategy, CuratorStrategyParams
+from back_test.observations.columnar_storage import ColumnarObservationsStorage
+from curator.live.data_sources import CuratorSnapshot, DataSource, DataSourceError, VaultSnapshot
+from curator.live.executors import Executor
+from curator.live.loading import load_snapshot, snapshot_observation
+from curator.utils.feature_store import FeatureStore
+from curator.utils.shared_cache import VersionedCache
+
+logger = logging.getLogger(__name__)
+
+
+class _LimitedModel(Model):
+    """
+    Model wrapper allowing at most as many concurrent calls as the semaphore.
+    """
+
+    def __init__(self, model: Model, semaphore: asyncio.Semaphore):
+        self._model = model
+        self._semaphore = semaphore
+
+    async def get_response(self, *args, **kwargs) -> ModelResponse:
+        async with self._semaphore:
+            return await self._model.get_response(*args, **kwargs)
+
+    async def stream_response(self, *args, **kwargs) -> AsyncIterator[TResponseStreamEvent]:
+        async with self._semaphore:
+            async for event in self._model.stream_response(*args, **kwargs):
+                yield event
+
+
+class _LimitedModelProvider(ModelProvider):
+
+    def __init__(self, provider: ModelProvider, max_requests: int):
+        self._provider = provider
+        self._semaphore = asyncio.Semaphore(max_requests)
+
+    def get_model(self, model_name: str | None) -> Model:
+        return _LimitedModel(self._provider.get_model(model_name), self._semaphore)
+
+
+@dataclass
+class Tenant:
+    """
+    A meta vault hosted by the scheduler.
+
+    Attributes:
+        tenant_id (str): Id of the meta vault at the data source
+        strategy (CuratorStrategy): Decision pipeline and entities of the meta vault
+        executor (Executor): Receiver of the meta vault's actions
+        weight (float): Share of the workers when they are busy, relative to the other tenants (default: 1.0)
+    """
+    tenant_id: str
+    strategy: CuratorStrategy
+    executor: Executor
+    weight: float = 1.0
+    busy: bool = False
+    finish_tag: float = 0.0
+    decisions: int = 0
+    timeouts: int = 0
+    failures: int = 0
+    skipped_polls: int = 0
+
+
+class CuratorScheduler:
+    """
+    Args:
+        data_source (DataSource): Source of the shared vault states and of the tenants' holdings
+        vault_names (List[str]): Shared vault universe
+        workers (int): Number of decisions running at a time
+        poll_interval (float): Seconds between the starts of two polls
+        decision_timeout (float): Seconds after which a decision is abandoned without actions
+        tenant_max_requests (int): Model requests of a tenant running at a time
+        model_provider (ModelProvider | None): Provider of the agents' models shared by the tenants,
+            defaults to the OpenAI provider
+        feature_windows (Sequence[int]): Window lengths of the vault features shared by the tenants,
+            including the `TREND_WINDOW` of tenants with event triggers, empty for none
+    """
+
+    def __init__(self, data_source: DataSource, vault_names: List[str], workers: int = 8,
+                 poll_interval: float = 60.0, decision_timeout: float = 120.0, tenant_max_requests: int = 2,
+                 model_provider: ModelProvider | None = None, feature_windows: Sequence[int] = ()):
+        if workers < 1 or tenant_max_requests < 1:
+            raise ValueError("workers and tenant_max_requests must be positive")
+        self.data_source = data_source
+        self.vault_names = list(vault_names)
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.decision_timeout = decision_timeout
+        self.tenant_max_requests = tenant_max_requests
+        self._model_provider = model_provider if model_provider is not None else OpenAIProvider()
+        self.storage = ColumnarObservationsStorage()
+        self.cache = VersionedCache()
+        self.features = FeatureStore(feature_windows) if feature_windows else None
+        self.market: Dict[str, VaultSnapshot] = {}
+        self.tenants: Dict[str, Tenant] = {}
+        self.polls = 0
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._virtual_time = 0.0
+
+    def add_tenant(self, tenant_id: str, executor: Executor, params: CuratorStrategyParams | None = None,
+                   weight: float = 1.0, model_provider: ModelProvider | None = None) -> Tenant:
+        """
+        Host a meta vault. Its strategy shares the scheduler's vault universe, observations and analysis cache,
+        and the scheduler's model provider unless `model_provider` is given.
+        """
+        if tenant_id in self.tenants:
+            raise ValueError(f"Tenant {tenant_id} already exists")
+        if weight <= 0:
+            raise ValueError(f"Tenant weight must be positive, got {weight}")
+        params = replace(params or CuratorStrategyParams(), VAULT_NAMES=self.vault_names)
+        strategy = CuratorStrategy(
+            params=params, observations_storage=self.storage, analysis_cache=self.cache, feature_store=self.features,
+            model_provider=_LimitedModelProvider(model_provider or self._model_provider, self.tenant_max_requests),
+        )
+        tenant = Tenant(tenant_id=tenant_id, strategy=strategy, executor=executor, weight=weight)
+        self.tenants[tenant_id] = tenant
+        return tenant
+
+    async def poll(self) -> int:
+        """
+        Fetch the shared and the tenants' states and queue the due decisions. Tenants whose state
+        cannot be fetched are skipped for this poll.
+
+        Returns:
+            int: Number of queued decisions
+        """
+        self.polls += 1
+        timestamp = datetime.now(UTC)
+        self.market = await self.data_source.fetch_market(self.vault_names)
+        self.storage.write(snapshot_observation(
+            CuratorSnapshot(timestamp=timestamp, idle_assets=0.0, pending_withdrawals=0.0, vaults=self.market)
+        ))
+        if self.features is not None:
+            self.features.update(timestamp, {vault_name: vault.share_price for vault_name, vault in self.market.items()})
+        self.cache.bump()
+
+        idle_tenants = []
+        for tenant in self.tenants.values():
+            if tenant.busy:
+                tenant.skipped_polls += 1
+            else:
+                idle_tenants.append(tenant)
+        snapshots = await asyncio.gather(
+            *(self.data_source.fetch_tenant_snapshot(tenant.tenant_id, self.market, timestamp) for tenant in idle_tenants),
+            return_exceptions=True
+        )
+        queued = 0
+        for tenant, snapshot in zip(idle_tenants, snapshots):
+            if isinstance(snapshot, DataSourceError):
+                logger.warning(f"Tenant {tenant.tenant_id} skipped: {snapshot}")
+                continue
+            if isinstance(snapshot, BaseException):
+                logger.error(f"Tenant {tenant.tenant_id} failed to load", exc_info=snapshot)
+                continue
+            load_snapshot(tenant.strategy, snapshot, write_observation=False)
+            if tenant.strategy.should_decide():
+                self.__enqueue(tenant)
+                queued += 1
+        return queued
+
+    def __enqueue(self, tenant: Tenant):
+        start_tag = max(self._virtual_time, tenant.finish_tag)
+        tenant.finish_tag = start_tag + 1 / tenant.weight
+        tenant.busy = True
+        self._queue.put_nowait((start_tag, next(self._sequence), tenant.tenant_id))
+
+    async def _worker(self):
+        while True:
+            start_tag, _, tenant_id = await self._queue.get()
+            self._virtual_time = max(self._virtual_time, start_tag)
+            tenant = self.tenants[tenant_id]
+            try:
+                await self.__decide(tenant)
+            finally:
+                tenant.busy = False
+                self._queue.task_done()
+
+    async def __decide(self, tenant: Tenant):
+        tenant.decisions += 1
+        start = time.perf_counter()
+        try:
+            actions = await asyncio.wait_for(tenant.strategy.decide(), self.decision_timeout)
+            if actions:
+                await tenant.executor.submit(actions)
+        except asyncio.TimeoutError:
+            tenant.timeouts += 1
+            logger.warning(f"Decision of {tenant.tenant_id} abandoned after {self.decision_timeout}s")
+            return
+        except Exception:
+            tenant.failures += 1
+            logger.exception(f"Decision of {tenant.tenant_id} failed")
+            return
+        logger.info(f"Decided {len(actions)} actions for {tenant.tenant_id} in {time.perf_counter() - start:.2f}s")
+
+    async def run(self, max_polls: Optional[int] = None):
+        """
+        Poll until cancelled or `max_polls` polls, then wait for the queued decisions. Failed polls are
+        logged and retried at the next interval.
+        """
+        workers = [asyncio.create_task(self._worker(), name=f"curator-worker-{i}") for i in range(self.workers)]
+        next_poll = time.monotonic()
+        try:
+            while max_polls is None or self.polls < max_polls:
+                try:
+                    queued = await self.poll()
+                    logger.debug(f"Poll {self.polls}: {queued} decisions queued, {self._queue.qsize()} waiting")
+                except DataSourceError as e:
+                    logger.warning(f"Poll {self.polls} skipped: {e}")
+                except Exception:
+                    logger.exception(f"Poll {self.polls} failed")
+                next_poll += self.poll_interval
+                await asyncio.sleep(max(next_poll - time.monotonic(), 0))
+            await self._queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await self.data_source.aclose()
+            for tenant in self.tenants.values():
+                await tenant.executor.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'polls': self.polls,
+            'tenants': len(self.tenants),
+            'decisions': sum(tenant.decisions for tenant in self.tenants.values()),
+            'timeouts': sum(tenant.timeouts for tenant in self.tenants.values()),
+            'failures': sum(tenant.failures for tenant in self.tenants.values()),
+            'skipped_polls': sum(tenant.skipped_polls for tenant in self.tenants.values()),
+            'analysis_cache': self.cache.stats(),
+        }
@@ -0,0 +1,221 @@
+"""
+Local stand-in server.
+
+Serves the HTTP and JSON-RPC state API of `curator.live.data_sources` and accepts the actions of
+`curator.live.executors.HttpExecutor` for simulated meta vaults (tenants) over one shared vault universe,
+backed by the backtest entities. The single meta vault endpoints serve the first tenant, and its actions
+are accepted at `POST /actions`, those of any tenant at `POST /meta_vaults/{tenant_id}/actions`. Batches of
+`curator.live.executors.HttpMulticallBackend` are executed atomically at `POST /multicall` and
+`POST /meta_vaults/{tenant_id}/multicall`.
+Every read of the first vault's state, once per poll, advances the simulation by one observation: the
+share prices follow a seeded geometric random walk, and the idle assets or pending withdrawals of the
+vaults change.
+It lets the live service run end to end without chain access, e.g. in tests.
+"""
+import copy
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from fractal.core.base import Action, NamedEntity
+
+from back_test.constants import META_VAULT_NAME
+from back_test.entities.logarithm_vault import LogarithmVault, LogarithmVaultGlobalState
+from back_test.entities.meta_vault import MetaVault
+from curator.live.data_sources import JSONRPC_META_VAULT_METHOD, JSONRPC_TENANT_METHOD, JSONRPC_VAULT_METHOD
+from curator.utils.action_batching import VaultCall, calls_to_actions
+
+
+class StandInServer:
+    """
+    Args:
+        vault_names (List[str]): Names of the simulated Logarithm vaults
+        init_balance (float): Idle assets of each meta vault at start
+        seed (int): Seed of the simulation
+        drift (float): Mean daily log return of the share prices
+        volatility (float): Standard deviation of the daily log returns
+        flow_scale (float): Typical size of the vaults' idle assets and pending withdrawals
+        host (str): Interface to listen on
+        port (int): Port to listen on, 0 picks a free port
+        tenants (List[str] | None): Ids of the simulated meta vaults, defaults to a single one
+    """
+
+    def __init__(self, vault_names: List[str], init_balance: float = 100_000, seed: int = 0,
+                 drift: float = 0.0003, volatility: float = 0.002, flow_scale: float = 1_000,
+                 host: str = '127.0.0.1', port: int = 0, tenants: List[str] | None = None):
+        self.vault_names = list(vault_names)
+        self._rng = np.random.default_rng(seed)
+        self._drift = drift
+        self._volatility = volatility
+        self._flow_scale = flow_scale
+        self._lock = threading.Lock()
+        # every tenant holds its own vault entities, which all follow the same global states
+        self.tenants: Dict[str, Tuple[MetaVault, Dict[str, LogarithmVault]]] = {}
+        for tenant_id in tenants or [META_VAULT_NAME]:
+            meta_vault = MetaVault()
+            meta_vault.action_deposit(init_balance)
+            self.tenants[tenant_id] = (meta_vault, {vault_name: LogarithmVault() for vault_name in self.vault_names})
+        self.default_tenant = next(iter(self.tenants))
+        self.meta_vault, self.vaults = self.tenants[self.default_tenant]
+        self.observations = 0
+        self.submitted: List[Dict[str, Any]] = []
+        self.batches: List[List[Dict[str, Any]]] = []
+
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'StandInServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='stand-in-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'StandInServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def advance(self):
+        """
+        Move the simulation to the next observation.
+        """
+        with self._lock:
+            returns = self._rng.normal(self._drift, self._volatility, len(self.vault_names))
+            flows = self._rng.normal(0, self._flow_scale, len(self.vault_names))
+            for vault_name, log_return, flow in zip(self.vault_names, returns, flows):
+                state = LogarithmVaultGlobalState(
+                    share_price=self.vaults[vault_name].global_state.share_price * float(np.exp(log_return)),
+                    idle_assets=float(max(flow, 0)),
+                    pending_withdrawals=float(max(-flow, 0)),
+                )
+                for _, vaults in self.tenants.values():
+                    vaults[vault_name].update_state(state)
+            self.observations += 1
+
+    def meta_vault_state(self) -> Dict[str, float]:
+        with self._lock:
+            return {"idle_assets": self.meta_vault.idle_assets, "pending_withdrawals": self.meta_vault.pending_withdrawals}
+
+    def tenant_state(self, tenant_id: str) -> Dict[str, Any]:
+        with self._lock:
+            meta_vault, vaults = self.tenants[tenant_id]
+            return {"idle_assets": meta_vault.idle_assets, "pending_withdrawals": meta_vault.pending_withdrawals,
+                    "shares": {vault_name: vault.shares for vault_name, vault in vaults.items()}}
+
+    def read_vault(self, vault_name: str) -> Dict[str, float]:
+        # every poll reads the first vault once, however many tenants it serves
+        if vault_name == self.vault_names[0]:
+            self.advance()
+        return self.vault_state(vault_name)
+
+    def vault_state(self, vault_name: str) -> Dict[str, float]:
+        with self._lock:
+            vault = self.vaults[vault_name]
+            state = vault.global_state
+            return {"share_price": state.share_price, "idle_assets": state.idle_assets,
+                    "pending_withdrawals": state.pending_withdrawals, "shares": vault.shares}
+
+    def execute(self, actions: List[Dict[str, Any]], tenant_id: str | None = None):
+        """
+        Execute serialized actions on the meta vault of the tenant, the first one by default, in order.
+        """
+        with self._lock:
+            meta_vault, vaults = self.tenants[tenant_id or self.default_tenant]
+            for action in actions:
+                targets = [NamedEntity(entity_name=name, entity=vaults[name]) for name in action['targets']]
+                meta_vault.execute(Action(action['action'], {'targets': targets, 'amounts': list(action['amounts'])}))
+                self.submitted.append(action)
+
+    def multicall(self, calls: List[Dict[str, Any]], tenant_id: str | None = None):
+        """
+        Execute serialized vault calls on the meta vault of the tenant, the first one by default.
+        Either all calls succeed or none is applied.
+        """
+        vault_calls = [VaultCall(call['operation'], call['vault_name'], float(call['amount'])) for call in calls]
+        with self._lock:
+            tenant = self.tenants[tenant_id or self.default_tenant]
+            # dry run on a copy, so a failing call leaves the entities unchanged
+            for entities in (copy.deepcopy(tenant), tenant):
+                meta_vault, vaults = entities
+                for action in calls_to_actions(vault_calls, vaults.__getitem__):
+                    meta_vault.execute(action.action)
+            self.batches.append(calls)
+
+    def _rpc(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        response = {"jsonrpc": "2.0", "id": request.get("id")}
+        method, params = request.get("method"), request.get("params") or []
+        if method == JSONRPC_META_VAULT_METHOD:
+            response["result"] = self.meta_vault_state()
+        elif method == JSONRPC_VAULT_METHOD and params and params[0] in self.vaults:
+            response["result"] = self.read_vault(params[0])
+        elif method == JSONRPC_VAULT_METHOD:
+            response["error"] = {"code": -32602, "message": f"Unknown vault {params}"}
+        elif method == JSONRPC_TENANT_METHOD and params and params[0] in self.tenants:
+            response["result"] = self.tenant_state(params[0])
+        elif method == JSONRPC_TENANT_METHOD:
+            response["error"] = {"code": -32602, "message": f"Unknown tenant {params}"}
+        else:
+            response["error"] = {"code": -32601, "message": f"Method {method} not found"}
+        return response
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # keep the connections alive for the pooled clients
+            protocol_version = 'HTTP/1.1'
+
+            def _reply(self, status: int, payload: Any):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == '/meta_vault':
+                    return self._reply(200, server.meta_vault_state())
+                prefix, _, name = self.path.rpartition('/')
+                if prefix == '/vaults' and name in server.vaults:
+                    return self._reply(200, server.read_vault(name))
+                if prefix == '/meta_vaults' and name in server.tenants:
+                    return self._reply(200, server.tenant_state(name))
+                self._reply(404, {"error": f"Not found: {self.path}"})
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                prefix, _, endpoint = self.path.rpartition('/')
+                tenant_id = prefix[len('/meta_vaults/'):] if prefix.startswith('/meta_vaults/') else None
+                if (prefix == '' or tenant_id in server.tenants) and endpoint in ('actions', 'multicall'):
+                    try:
+                        if endpoint == 'actions':
+                            server.execute(request.get('actions', []), tenant_id)
+                        else:
+                            server.multicall(request.get('calls', []), tenant_id)
+                    except Exception as e:
+                        return self._reply(400, {"error": str(e)})
+                    return self._reply(200, {"status": "ok"})
+                if self.path in ('/', '/rpc'):
+                    return self._reply(200, server._rpc(request))
+                self._reply(404, {"error": f"Not found: {self.path}"})
+
+            def log_message(self, format: str, *args: Tuple[Any, ...]):
+                # keep the service logs readable
+                pass
+
+        return Handler
@@ -0,0 +1,214 @@
+"""
+Live Curation Service
+
+Runs the curator on live vault states: every `poll_interval` seconds the service fetches the state of
+the meta vault and its target vaults from a data source, feeds it to the decision pipeline of
+`CuratorStrategy` (the same agents, validation and decision schedule as the backtest), and submits the
+resulting actions through an executor. Each decision is bounded by `decision_timeout`.
+
+With `--tenants` or `--tenant-count`, a `CuratorScheduler` hosts many meta vaults over the shared
+vaults in one process instead.
+
+Usage:
+    python -m curator.main --stand-in --polls 20 --poll-interval 1
+    python -m curator.main --source-url https://... --protocol jsonrpc --executor log
+    python -m curator.main --stand-in --tenant-count 200 --workers 16 --polls 20 --poll-interval 1
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+from agents import ModelProvider
+from fractal.core.base import ActionToTake
+
+from back_test.curator_strategy import CuratorStrategy, CuratorStrategyParams
+from back_test.observations.columnar_storage import ColumnarObservationsStorage
+from curator.live.data_sources import (CuratorSnapshot, DataSource, DataSourceError, HttpDataSource,
+                                       JsonRpcDataSource)
+from curator.live.executors import BatchedExecutor, Executor, HttpExecutor, HttpMulticallBackend, LoggingExecutor
+from curator.live.loading import load_snapshot
+from curator.live.scheduler import CuratorScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class CuratorService:
+    """
+    Long running live curation loop.
+
+    Args:
+        data_source (DataSource): Source of the vault states
+        executor (Executor): Receiver of the decided actions
+        params (CuratorStrategyParams | None): Parameters of the decision pipeline, `INIT_BALANCE` is unused
+        poll_interval (float): Seconds between the starts of two polls
+        decision_timeout (float): Seconds after which a decision is abandoned without actions
+        model_provider (ModelProvider | None): Provider of the agents' models, defaults to the OpenAI provider
+    """
+
+    def __init__(self, data_source: DataSource, executor: Executor, params: CuratorStrategyParams | None = None,
+                 poll_interval: float = 60.0, decision_timeout: float = 120.0,
+                 model_provider: ModelProvider | None = None):
+        self.data_source = data_source
+        self.executor = executor
+        self.poll_interval = poll_interval
+        self.decision_timeout = decision_timeout
+        params = params or CuratorStrategyParams()
+        self.strategy = CuratorStrategy(params=params, observations_storage=ColumnarObservationsStorage(),
+                                        model_provider=model_provider)
+        self.vault_names: List[str] = list(params.VAULT_NAMES)
+        self.polls = 0
+        self.decisions = 0
+        self.timeouts = 0
+
+    def load(self, snapshot: CuratorSnapshot):
+        """
+        Record the snapshot as an observation and load it into the strategy's entities.
+        """
+        load_snapshot(self.strategy, snapshot)
+
+    async def poll(self) -> List[ActionToTake]:
+        """
+        Fetch the states, decide when the decision schedule is due, and submit the actions.
+
+        Returns:
+            List[ActionToTake]: Submitted actions
+        """
+        self.polls += 1
+        snapshot = await self.data_source.fetch(self.vault_names)
+        self.load(snapshot)
+        logger.debug(f"Metrics: {self.strategy.metrics.summary()}")
+        if not self.strategy.should_decide():
+            return []
+
+        self.decisions += 1
+        start = time.perf_counter()
+        try:
+            actions = await asyncio.wait_for(self.strategy.decide(), self.decision_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(f"Decision abandoned after {self.decision_timeout}s")
+            return []
+        logger.info(f"Decided {len(actions)} actions in {time.perf_counter() - start:.2f}s")
+        if actions:
+            await self.executor.submit(actions)
+        return actions
+
+    async def run(self, max_polls: Optional[int] = None):
+        """
+        Poll until cancelled or `max_polls` polls. Failed polls are logged and retried at the next interval.
+        """
+        next_poll = time.monotonic()
+        try:
+            while max_polls is None or self.polls < max_polls:
+                try:
+                    await self.poll()
+                except DataSourceError as e:
+                    logger.warning(f"Poll {self.polls} skipped: {e}")
+                except Exception:
+                    logger.exception(f"Poll {self.polls} failed")
+                next_poll += self.poll_interval
+                await asyncio.sleep(max(next_poll - time.monotonic(), 0))
+        finally:
+            await self.data_source.aclose()
+            await self.executor.aclose()
+
+
+async def _run_scheduler(data_source: DataSource, executor: Executor, params: CuratorStrategyParams,
+                         tenant_ids: List[str], args: argparse.Namespace):
+    scheduler = CuratorScheduler(
+        data_source, params.VAULT_NAMES, workers=args.workers, poll_interval=args.poll_interval,
+        decision_timeout=args.decision_timeout, tenant_max_requests=args.tenant_max_requests,
+        feature_windows=params.FEATURE_WINDOWS,
+    )
+    for tenant_id in tenant_ids:
+        # the tenants post through the pooled client of the shared executor
+        tenant_executor = LoggingExecutor()
+        if isinstance(executor, HttpExecutor):
+            tenant_executor = executor.for_path(f"/meta_vaults/{tenant_id}/actions")
+        elif isinstance(executor, BatchedExecutor):
+            tenant_executor = BatchedExecutor(executor.backend.for_path(f"/meta_vaults/{tenant_id}/multicall"))
+        scheduler.add_tenant(tenant_id, tenant_executor, params)
+    try:
+        await scheduler.run(max_polls=args.polls)
+    finally:
+        await executor.aclose()
+        logger.info(f"Scheduler stats: {scheduler.stats()}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run the curator on live vault states")
+    parser.add_argument('--stand-in', action='store_true',
+                        help="Poll and execute against a local stand-in server instead of --source-url")
+    parser.add_argument('--source-url', default=None, help="URL of the state API")
+    parser.add_argument('--protocol', choices=['http', 'jsonrpc'], default='http')
+    parser.add_argument('--source-timeout', type=float, default=10.0, help="Seconds allowed for each state request")
+    parser.add_argument('--max-connections', type=int, default=16)
+    parser.add_argument('--executor', choices=['log', 'http', 'multicall'], default='log',
+                        help="Dry run, POST the actions, or POST them netted as one batch of vault calls")
+    parser.add_argument('--executor-url', default=None, help="Base URL of the action API")
+    parser.add_argument('--vaults', nargs='+', default=None, help="Logarithm vault names")
+    parser.add_argument('--window-size', type=int, default=7)
+    parser.add_argument('--decision-trigger', choices=['window', 'event'], default='window')
+    parser.add_argument('--decision-mode', choices=['sequential', 'speculative', 'unified'], default='sequential')
+    parser.add_argument('--feature-windows', nargs='+', type=int, default=[],
+                        help="Window lengths of the rolling vault features served to the analysis agent")
+    parser.add_argument('--poll-interval', type=float, default=60.0)
+    parser.add_argument('--decision-timeout', type=float, default=120.0)
+    parser.add_argument('--polls', type=int, default=None, help="Stop after this many polls")
+    parser.add_argument('--tenants', nargs='+', default=None, help="Ids of the meta vaults to host")
+    parser.add_argument('--tenant-count', type=int, default=None,
+                        help="Host this many meta vaults, with ids meta_vault_0, meta_vault_1, ...")
+    parser.add_argument('--workers', type=int, default=8, help="Decisions running at a time across the tenants")
+    parser.add_argument('--tenant-max-requests', type=int, default=2,
+                        help="Model requests of a tenant running at a time")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    params = CuratorStrategyParams(
+        WINDOW_SIZE=args.window_size, DECISION_TRIGGER=args.decision_trigger, DECISION_MODE=args.decision_mode,
+        FEATURE_WINDOWS=args.feature_windows,
+        **({'VAULT_NAMES': args.vaults} if args.vaults else {})
+    )
+    tenant_ids = args.tenants
+    if args.tenant_count is not None:
+        tenant_ids = [f"meta_vault_{i}" for i in range(args.tenant_count)]
+    server = None
+    source_url, executor_url = args.source_url, args.executor_url
+    if args.stand_in:
+        from curator.live.stand_in_server import StandInServer
+        server = StandInServer(params.VAULT_NAMES, tenants=tenant_ids).start()
+        source_url = server.url + ('/rpc' if args.protocol == 'jsonrpc' else '')
+        executor_url = executor_url or server.url
+    if source_url is None:
+        parser.error("--source-url is required without --stand-in")
+    if args.executor != 'log' and executor_url is None:
+        parser.error(f"--executor-url is required for the {args.executor} executor")
+
+    source_class = JsonRpcDataSource if args.protocol == 'jsonrpc' else HttpDataSource
+    data_source = source_class(source_url, timeout=args.source_timeout, max_connections=args.max_connections)
+    executor = LoggingExecutor()
+    if args.executor == 'http':
+        executor = HttpExecutor(executor_url)
+    elif args.executor == 'multicall':
+        executor = BatchedExecutor(HttpMulticallBackend(executor_url))
+    try:
+        if tenant_ids:
+            asyncio.run(_run_scheduler(data_source, executor, params, tenant_ids, args))
+        else:
+            service = CuratorService(
+                data_source=data_source, executor=executor, params=params,
+                poll_interval=args.poll_interval, decision_timeout=args.decision_timeout,
+            )
+            asyncio.run(service.run(max_polls=args.polls))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Batching of the meta vault actions.
+
+Coalesces the `redeem_allocations`, `withdraw_allocations` and `allocate_assets` actions of a decision
+into vault calls that can be submitted as one multicall. Opposing flows on the same vault are netted,
+valuing redeemed shares with the vault's `preview_redeem`, so a vault that is both redeemed from and
+allocated to receives a single call and pays the entry or exit cost of the net flow only. Calls worth
+at most `dust` assets are dropped. The calls are ordered outflows first, so that the deposits can use
+the assets freed by the same batch.
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+from fractal.core.base import Action, ActionToTake, NamedEntity
+
+from back_test.constants import META_VAULT_NAME
+from back_test.entities.logarithm_vault import LogarithmVault
+from back_test.entities.meta_vault import DUST
+
+# execution order of the operations in a batch
+OPERATIONS = ('redeem', 'withdraw', 'deposit')
+ACTION_OPERATIONS = {'redeem_allocations': 'redeem', 'withdraw_allocations': 'withdraw', 'allocate_assets': 'deposit'}
+OPERATION_ACTIONS = {operation: action for action, operation in ACTION_OPERATIONS.items()}
+
+
+@dataclass
+class VaultCall:
+    """
+    One operation on a Logarithm vault: redeem `amount` shares, or withdraw or deposit `amount` assets.
+    """
+    operation: str
+    vault_name: str
+    amount: float
+
+
+def count_legs(actions: List[ActionToTake]) -> int:
+    """
+    Number of vault operations the actions apply one by one.
+    """
+    return sum(len(action.action.args['targets']) for action in actions if action.action.action in ACTION_OPERATIONS)
+
+
+def coalesce_actions(actions: List[ActionToTake], dust: float = DUST) -> List[VaultCall]:
+    """
+    Net the vault operations of the meta vault actions into at most one call per vault and operation.
+
+    Args:
+        actions (List[ActionToTake]): Meta vault actions in execution order
+        dust (float): Calls worth at most this many assets are dropped
+
+    Returns:
+        List[VaultCall]: Redeem calls, then withdraw calls, then deposit calls
+
+    Raises:
+        ValueError: For actions that are not vault operations of the meta vault
+    """
+    vaults: Dict[str, LogarithmVault] = {}
+    totals: Dict[str, Dict[str, float]] = {}
+    for action in actions:
+        if action.entity_name != META_VAULT_NAME or action.action.action not in ACTION_OPERATIONS:
+            raise ValueError(f"Cannot batch action {action.action.action} on {action.entity_name}")
+        operation = ACTION_OPERATIONS[action.action.action]
+        for target, amount in zip(action.action.args['targets'], action.action.args['amounts']):
+            vaults.setdefault(target.entity_name, target.entity)
+            vault_totals = totals.setdefault(target.entity_name, dict.fromkeys(OPERATIONS, 0.0))
+            vault_totals[operation] += amount
+
+    calls: List[VaultCall] = []
+    for vault_name, vault_totals in totals.items():
+        vault = vaults[vault_name]
+        redeemed, withdrawn, deposited = (vault_totals[operation] for operation in OPERATIONS)
+        redeemed_value = vault.preview_redeem(redeemed) if redeemed > 0 else 0.0
+        if deposited == 0:
+            # nothing to net against, one call per outflow
+            if redeemed_value > dust:
+                calls.append(VaultCall('redeem', vault_name, redeemed))
+            if withdrawn > dust:
+                calls.append(VaultCall('withdraw', vault_name, withdrawn))
+            continue
+        outflow = redeemed_value + withdrawn
+        net = deposited - outflow
+        if net > dust:
+            calls.append(VaultCall('deposit', vault_name, net))
+        elif net < -dust and withdrawn == 0:
+            # keep the redemption in shares, only the shares previewing to the net outflow are needed,
+            # `preview_withdraw` inverts `preview_redeem`, whose exit cost only applies above the idle assets
+            calls.append(VaultCall('redeem', vault_name, min(vault.preview_withdraw(-net), redeemed)))
+        elif net < -dust:
+            calls.append(VaultCall('withdraw', vault_name, -net))
+    calls.sort(key=lambda call: OPERATIONS.index(call.operation))
+    return calls
+
+
+def calls_to_actions(calls: List[VaultCall], get_vault: Callable[[str], LogarithmVault]) -> List[ActionToTake]:
+    """
+    One meta vault action per operation of the calls, in the calls' order.
+    """
+    actions = []
+    for operation in OPERATIONS:
+        operation_calls = [call for call in calls if call.operation == operation]
+        if not operation_calls:
+            continue
+        actions.append(ActionToTake(
+            entity_name=META_VAULT_NAME,
+            action=Action(
+                action=OPERATION_ACTIONS[operation],
+                args={
+                    'targets': [NamedEntity(entity_name=call.vault_name, entity=get_vault(call.vault_name)) for call in operation_calls],
+                    'amounts': [call.amount for call in operation_calls]
+                }
+            )
+        ))
+    return actions
+
+
+def batch_actions(actions: List[ActionToTake], get_vault: Callable[[str], LogarithmVault],
+                  dust: float = DUST) -> List[ActionToTake]:
+    """
+    The actions with their vault operations coalesced, as at most one action per operation.
+    """
+    return calls_to_actions(coalesce_actions(actions, dust), get_vault)
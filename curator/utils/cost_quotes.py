@@ -0,0 +1,40 @@
+from dataclasses import dataclass, fields
+
+COST_QUOTES_HEADER = "Vault cost quotes (asset amounts, computed from the current vault states):"
+
+@dataclass
+class CostQuote:
+    """
+    Precomputed prices and costs of one vault.
+
+    Attributes:
+        vault_name (str): Name of the vault
+        share_price (float): Current price per share
+        idle_assets (float): Idle assets of the vault, withdrawable without exit cost
+        pending_withdrawals (float): Pending withdrawals of the vault, depositable without entry cost
+        shares (float): Shares held by the meta vault
+        holding_value (float): Assets received for redeeming all held shares
+        full_exit_cost (float): Exit cost of redeeming all held shares
+        entry_cost_per_unit (float): Entry cost per asset deposited above the pending withdrawals
+        exit_cost_per_unit (float): Exit cost per asset withdrawn above the idle assets
+    """
+    vault_name: str
+    share_price: float
+    idle_assets: float
+    pending_withdrawals: float
+    shares: float
+    holding_value: float
+    full_exit_cost: float
+    entry_cost_per_unit: float
+    exit_cost_per_unit: float
+
+def format_cost_quotes(quotes: list[CostQuote]) -> str:
+    """
+    Format quotes as a compact pipe separated table for an agent message.
+    """
+    columns = [f.name for f in fields(CostQuote)]
+    lines = [COST_QUOTES_HEADER, " | ".join(columns)]
+    for quote in quotes:
+        values = [getattr(quote, column) for column in columns]
+        lines.append(" | ".join(value if isinstance(value, str) else f"{value:.8g}" for value in values))
+    return "\n".join(lines)
@@ -0,0 +1,191 @@
+"""
+Rolling feature store.
+
+Keeps per vault share price features over several window lengths, updated in O(1) per observation:
+the OLS slope and r² of the prices, the mean, EWMA and volatility of the simple returns, and the
+drawdown from the window's peak. Every update is recorded under its timestamp, so features can be
+queried as they were at any past timestamp and never include later observations.
+"""
+import bisect
+import math
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# features of every window, as `{name}_{window}` columns
+WINDOW_FEATURES = ('slope', 'r_squared', 'mean_return', 'ewma_return', 'volatility', 'drawdown')
+# features over the whole history, `observations` counts the updates so far
+GLOBAL_FEATURES = ('share_price', 'return', 'drawdown', 'observations')
+
+
+class _RollingWindow:
+    """
+    Sufficient statistics of the last `length` prices and returns. The OLS sums use the positions
+    inside the window as x, so they stay small, and are recomputed from the window every `length`
+    updates to bound the rounding drift of the incremental updates.
+    """
+
+    def __init__(self, length: int):
+        self.length = length
+        self.alpha = 2 / (length + 1)
+        self.prices: Deque[float] = deque()
+        self.returns: Deque[float] = deque()
+        # (index, price) of the decreasing prices, the first one is the window's peak
+        self.peaks: Deque[Tuple[int, float]] = deque()
+        self.count = 0
+        self.sum_y = self.sum_xy = self.sum_yy = 0.0
+        self.sum_r = self.sum_rr = 0.0
+        self.ewma: Optional[float] = None
+
+    def update(self, price: float, simple_return: Optional[float]):
+        if len(self.prices) == self.length:
+            removed = self.prices.popleft()
+            self.sum_y -= removed
+            self.sum_yy -= removed * removed
+            # every remaining price moves one position to the front
+            self.sum_xy -= self.sum_y
+        x = len(self.prices)
+        self.prices.append(price)
+        self.sum_y += price
+        self.sum_xy += x * price
+        self.sum_yy += price * price
+
+        while self.peaks and self.peaks[-1][1] <= price:
+            self.peaks.pop()
+        self.peaks.append((self.count, price))
+        if self.peaks[0][0] <= self.count - self.length:
+            self.peaks.popleft()
+
+        if simple_return is not None:
+            if len(self.returns) == self.length:
+                removed = self.returns.popleft()
+                self.sum_r -= removed
+                self.sum_rr -= removed * removed
+            self.returns.append(simple_return)
+            self.sum_r += simple_return
+            self.sum_rr += simple_return * simple_return
+            self.ewma = simple_return if self.ewma is None else self.alpha * simple_return + (1 - self.alpha) * self.ewma
+
+        self.count += 1
+        if self.count % self.length == 0:
+            self.__resum()
+
+    def __resum(self):
+        self.sum_y = math.fsum(self.prices)
+        self.sum_xy = math.fsum(x * y for x, y in enumerate(self.prices))
+        self.sum_yy = math.fsum(y * y for y in self.prices)
+        self.sum_r = math.fsum(self.returns)
+        self.sum_rr = math.fsum(r * r for r in self.returns)
+
+    def features(self) -> List[float]:
+        n = len(self.prices)
+        slope = r_squared = math.nan
+        if n >= 2:
+            sum_x = n * (n - 1) / 2
+            var_x = n * (n - 1) * (2 * n - 1) / 6 * n - sum_x * sum_x
+            cov_xy = n * self.sum_xy - sum_x * self.sum_y
+            var_y = max(n * self.sum_yy - self.sum_y * self.sum_y, 0.0)
+            # the slope per observation, relative to the mean price
+            slope = cov_xy / var_x / (self.sum_y / n)
+            r_squared = min(cov_xy * cov_xy / (var_x * var_y), 1.0) if var_y > 1e-12 * self.sum_yy * n else 1.0
+        mean_return = volatility = math.nan
+        m = len(self.returns)
+        if m >= 1:
+            mean_return = self.sum_r / m
+            volatility = math.sqrt(max(self.sum_rr / m - mean_return * mean_return, 0.0))
+        ewma = self.ewma if self.ewma is not None else math.nan
+        drawdown = 1 - self.prices[-1] / self.peaks[0][1]
+        return [slope, r_squared, mean_return, ewma, volatility, drawdown]
+
+
+class _VaultFeatures:
+
+    def __init__(self, windows: Sequence[int], columns: int):
+        self.windows = [_RollingWindow(window) for window in windows]
+        self.last_price: Optional[float] = None
+        self.peak = 0.0
+        self.timestamps: List[datetime] = []
+        self.rows = np.empty((16, columns))
+
+    def update(self, timestamp: datetime, price: float):
+        simple_return = price / self.last_price - 1 if self.last_price else None
+        self.last_price = price
+        self.peak = max(self.peak, price)
+        row = [price, simple_return if simple_return is not None else math.nan, 1 - price / self.peak,
+               len(self.timestamps) + 1]
+        for window in self.windows:
+            window.update(price, simple_return)
+            row.extend(window.features())
+
+        size = len(self.timestamps)
+        if size == len(self.rows):
+            self.rows = np.resize(self.rows, (2 * size, self.rows.shape[1]))
+        self.rows[size] = row
+        self.timestamps.append(timestamp)
+
+
+class FeatureStore:
+    """
+    Args:
+        windows (Sequence[int]): Window lengths in observations, at least 2
+    """
+
+    def __init__(self, windows: Sequence[int] = (7, 30, 90)):
+        if not windows or min(windows) < 2:
+            raise ValueError(f"Feature windows must be at least 2 observations, got {list(windows)}")
+        self.windows = sorted(set(windows))
+        self.columns = list(GLOBAL_FEATURES) + [f"{name}_{window}" for window in self.windows for name in WINDOW_FEATURES]
+        self._vaults: Dict[str, _VaultFeatures] = {}
+
+    @property
+    def vault_names(self) -> List[str]:
+        return list(self._vaults)
+
+    def update(self, timestamp: datetime, share_prices: Dict[str, float]):
+        """
+        Add the share prices observed at `timestamp`.
+
+        Raises:
+            ValueError: When a vault was already updated at or after `timestamp`, or a price is not positive
+        """
+        # validate all vaults first, so a rejected update leaves the store unchanged
+        for vault_name, share_price in share_prices.items():
+            vault = self._vaults.get(vault_name)
+            if vault is not None and vault.timestamps[-1] >= timestamp:
+                raise ValueError(f"Features of {vault_name} are already at {vault.timestamps[-1]}, cannot add {timestamp}")
+            if share_price <= 0:
+                raise ValueError(f"Share price of {vault_name} must be positive, got {share_price}")
+        for vault_name, share_price in share_prices.items():
+            vault = self._vaults.get(vault_name)
+            if vault is None:
+                vault = self._vaults[vault_name] = _VaultFeatures(self.windows, len(self.columns))
+            vault.update(timestamp, float(share_price))
+
+    def at(self, vault_name: str, timestamp: Optional[datetime] = None) -> Optional[Dict[str, float]]:
+        """
+        Features of a vault as of `timestamp`, i.e. after its latest update at or before it, the latest
+        features without a timestamp. None when the vault has no update at or before `timestamp`.
+        """
+        vault = self._vaults.get(vault_name)
+        if vault is None or not vault.timestamps:
+            return None
+        index = len(vault.timestamps) - 1 if timestamp is None else bisect.bisect_right(vault.timestamps, timestamp) - 1
+        if index < 0:
+            return None
+        return {"timestamp": vault.timestamps[index], **dict(zip(self.columns, vault.rows[index].tolist()))}
+
+    def latest(self, vault_name: str) -> Optional[Dict[str, float]]:
+        return self.at(vault_name)
+
+    def frame(self, vault_name: str) -> pd.DataFrame:
+        """
+        Feature history of a vault, indexed by timestamp.
+        """
+        vault = self._vaults.get(vault_name)
+        if vault is None:
+            return pd.DataFrame(columns=self.columns)
+        size = len(vault.timestamps)
+        return pd.DataFrame(vault.rows[:size], columns=self.columns, index=pd.Index(vault.timestamps, name='timestamp'))
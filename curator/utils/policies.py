@@ -0,0 +1,81 @@
+"""
+Deterministic policies.
+
+Rule based stand-ins for the curator agents, deciding when the model budget of a run is exhausted.
+Their outputs pass the same validation as the agents' predictions, unless the vaults' balances together
+fall short of the pending withdrawals.
+"""
+import math
+from typing import Dict, List, Tuple
+
+
+def _pro_rata(total: float, balances: Dict[str, float]) -> Tuple[List[str], List[float]]:
+    """
+    Split `total` over the vaults in proportion to their balances, evenly when no vault has a balance.
+    """
+    weights = {vault_name: balance for vault_name, balance in balances.items() if balance > 0}
+    if not weights:
+        weights = {vault_name: 1.0 for vault_name in balances}
+    if not weights or total <= 0:
+        return [], []
+    weight_sum = sum(weights.values())
+    vault_names = list(weights)
+    amounts = [total * weight / weight_sum for weight in weights.values()]
+    return vault_names, amounts
+
+
+def _cover(total: float, amounts: List[float], caps: List[float]) -> List[float]:
+    """
+    Raise the amounts, from the last one backwards and each up to its cap, until their sum is at least `total`.
+    The last amount first absorbs the rounding remainder, then steps up one ulp at a time, since the
+    validation compares the left to right float sum.
+    """
+    amounts = list(amounts)
+    for i in reversed(range(len(amounts))):
+        if sum(amounts) >= total:
+            break
+        amounts[i] = min(max(total - math.fsum(amounts[:i] + amounts[i + 1:]), amounts[i]), caps[i])
+        while sum(amounts) < total and amounts[i] < caps[i]:
+            amounts[i] = min(math.nextafter(amounts[i], math.inf), caps[i])
+    return amounts
+
+
+def _limit(total: float, amounts: List[float]) -> List[float]:
+    """
+    Lower the amounts, from the last one backwards and not below 0, until their sum is at most `total`.
+    """
+    amounts = list(amounts)
+    for i in reversed(range(len(amounts))):
+        if sum(amounts) <= total:
+            break
+        amounts[i] = max(min(total - math.fsum(amounts[:i] + amounts[i + 1:]), amounts[i]), 0.0)
+        while sum(amounts) > total and amounts[i] > 0:
+            amounts[i] = max(math.nextafter(amounts[i], -math.inf), 0.0)
+    return amounts
+
+
+def allocation_policy(idle_assets: float, balances: Dict[str, float]) -> Tuple[List[str], List[float]]:
+    """
+    Allocate the idle assets in proportion to the current allocations, keeping the agents' last mix,
+    or evenly when nothing is allocated.
+
+    Returns:
+        Tuple[List[str], List[float]]: Vault names and asset amounts to allocate
+    """
+    vault_names, amounts = _pro_rata(idle_assets, balances)
+    return vault_names, _limit(idle_assets, amounts)
+
+
+def withdraw_policy(pending_withdrawals: float, balances: Dict[str, float]) -> Tuple[List[str], List[float]]:
+    """
+    Withdraw the pending withdrawals in proportion to the current allocations, capped by each vault's balance.
+    The amounts cover the pending withdrawals unless the balances together fall short of them.
+
+    Returns:
+        Tuple[List[str], List[float]]: Vault names and asset amounts to withdraw
+    """
+    vault_names, amounts = _pro_rata(pending_withdrawals, {k: v for k, v in balances.items() if v > 0})
+    caps = [balances[vault_name] for vault_name in vault_names]
+    # capped before covering, so that rounding up the sum never exceeds a balance
+    amounts = [min(amount, cap) for amount, cap in zip(amounts, caps)]
+    return vault_names, _cover(pending_withdrawals, amounts, caps)
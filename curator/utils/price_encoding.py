@@ -0,0 +1,72 @@
+import json
+import math
+from datetime import datetime
+from typing import Sequence
+
+import numpy as np
+
+def _iso_duration(seconds: float) -> str:
+    """
+    ISO 8601 duration of a step, e.g. 'P1D' or 'PT1H'.
+    """
+    seconds = int(round(seconds))
+    if seconds % 86400 == 0:
+        return f"P{seconds // 86400}D"
+    if seconds % 3600 == 0:
+        return f"PT{seconds // 3600}H"
+    if seconds % 60 == 0:
+        return f"PT{seconds // 60}M"
+    return f"PT{seconds}S"
+
+def share_price_stats(prices: np.ndarray) -> dict:
+    """
+    Summary statistics of a share price series, returns in basis points per step.
+    """
+    if len(prices) < 2:
+        return {}
+    returns = np.diff(prices) / prices[:-1]
+    steps = np.arange(len(prices))
+    slope, intercept = np.polyfit(steps, prices, 1)
+    fitted = slope * steps + intercept
+    total = np.sum((prices - prices.mean()) ** 2)
+    r_squared = 1 - np.sum((prices - fitted) ** 2) / total if total > 0 else 1.0
+    drawdown = 1 - prices / np.maximum.accumulate(prices)
+    return {
+        "mean_return_bps": round(float(returns.mean()) * 1e4, 2),
+        "volatility_bps": round(float(returns.std()) * 1e4, 2),
+        "slope_bps": round(float(slope / prices.mean()) * 1e4, 2),
+        "r_squared": round(float(r_squared), 3),
+        "max_drawdown_bps": round(float(drawdown.max()) * 1e4, 1),
+        "total_return_bps": round(float(prices[-1] / prices[0] - 1) * 1e4, 1),
+    }
+
+def encode_share_price_history(timestamps: Sequence[datetime], prices: Sequence[float],
+                               max_points: int = 60, with_stats: bool = True, precision: int = 1) -> str:
+    """
+    Encode a share price history compactly as JSON.
+
+    The series is downsampled uniformly to at most `max_points` points, keeping the latest one,
+    and given as the start date, the step between points, the first price and the return of each
+    following point in basis points rounded to `precision` decimals. The statistics are computed
+    on the full series.
+
+    Returns:
+        str: JSON object with `start`, `step`, `start_price`, `returns_bps` and optionally `stats`
+    """
+    if len(prices) == 0:
+        return json.dumps({"points": 0})
+    values = np.asarray(prices, dtype=float)
+    stride = max(math.ceil(len(values) / max(max_points, 1)), 1)
+    indices = np.arange(len(values) - 1, -1, -stride)[::-1]
+    sampled = values[indices]
+
+    encoded = {
+        "start": timestamps[indices[0]].isoformat(),
+        "step": _iso_duration((timestamps[indices[1]] - timestamps[indices[0]]).total_seconds()) if len(indices) > 1 else None,
+        "points": len(indices),
+        "start_price": float(f"{sampled[0]:.8g}"),
+        "returns_bps": [round(float(r), precision) for r in (sampled[1:] / sampled[:-1] - 1) * 1e4],
+    }
+    if with_stats:
+        encoded["stats"] = share_price_stats(values)
+    return json.dumps(encoded, separators=(',', ':'))
@@ -0,0 +1,49 @@
+"""
+Shared async cache.
+
+One cache serves every tenant of a process. Its entries are valid for the current version of the
+market data, and concurrent requests of a missing key share a single computation.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar('T')
+
+
+class VersionedCache:
+
+    def __init__(self):
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Hashable, asyncio.Future] = {}
+
+    def bump(self):
+        """
+        Start a new version, e.g. after new market data arrived, and drop the entries of the previous one.
+        """
+        self.version += 1
+        self._entries.clear()
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[T]]) -> T:
+        """
+        Value of `key` in the current version, computed with `compute` once for all concurrent callers.
+        A failed computation is not cached, and a caller that is cancelled does not cancel it for the others.
+        """
+        future = self._entries.get(key)
+        if future is None:
+            self.misses += 1
+            future = asyncio.ensure_future(compute())
+            self._entries[key] = future
+            version = self.version
+            future.add_done_callback(lambda f: self.__discard_failed(key, version, f))
+        else:
+            self.hits += 1
+        return await asyncio.shield(future)
+
+    def __discard_failed(self, key: Hashable, version: int, future: asyncio.Future):
+        if version == self.version and (future.cancelled() or future.exception() is not None):
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'version': self.version, 'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
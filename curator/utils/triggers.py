@@ -0,0 +1,155 @@
+"""
+Decision triggers.
+
+Cheap numerical detectors evaluated on every observation to decide when the curator agents
+should be consulted, instead of calling them on a fixed schedule.
+"""
+import math
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from curator.utils.feature_store import FeatureStore
+
+
+@dataclass
+class TriggerSnapshot:
+    """
+    State of the meta vault and its target vaults at one observation.
+    """
+    idle_assets: float
+    pending_withdrawals: float
+    total_assets: float
+    share_prices: Dict[str, float]
+    balances: Dict[str, float]
+
+
+class Detector:
+    """
+    Base class of the detectors. `check` is called once per observation and returns
+    the reason to decide, or None.
+    """
+
+    def check(self, snapshot: TriggerSnapshot) -> Optional[str]:
+        raise NotImplementedError
+
+
+@dataclass
+class FlowThresholdDetector(Detector):
+    """
+    Fires while idle assets or pending withdrawals of the meta vault exceed `threshold`
+    as a fraction of its total assets, or `min_amount` in absolute terms.
+    """
+    threshold: float = 0.01
+    min_amount: float = 0.000001
+
+    def check(self, snapshot: TriggerSnapshot) -> Optional[str]:
+        limit = max(self.threshold * snapshot.total_assets, self.min_amount)
+        if snapshot.idle_assets > limit:
+            return f"idle assets {snapshot.idle_assets:.2f} above {limit:.2f}"
+        if snapshot.pending_withdrawals > limit:
+            return f"pending withdrawals {snapshot.pending_withdrawals:.2f} above {limit:.2f}"
+        return None
+
+
+@dataclass
+class TrendBreakDetector(Detector):
+    """
+    Fires when the latest return of a vault's share price is more than `z_score` standard deviations
+    away from the mean of the `window` returns before it. The returns and their rolling mean and
+    volatility are read from `features`, which must keep a `window` observations window and be
+    updated with the share prices before the detector is checked.
+    """
+    features: FeatureStore
+    window: int = 14
+    z_score: float = 3.0
+    _checked: Dict[str, datetime] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        if self.window not in self.features.windows:
+            raise ValueError(f"The trend break window {self.window} is not one of the feature windows {self.features.windows}")
+
+    def check(self, snapshot: TriggerSnapshot) -> Optional[str]:
+        breaks = []
+        for vault_name in snapshot.share_prices:
+            latest = self.features.latest(vault_name)
+            # every update of the vault's features is checked once
+            if latest is None or self._checked.get(vault_name) == latest['timestamp'] or math.isnan(latest['return']):
+                continue
+            self._checked[vault_name] = latest['timestamp']
+            trailing = self.features.at(vault_name, latest['timestamp'] - timedelta.resolution)
+            # a full window of returns takes one more observation
+            if trailing is None or trailing['observations'] <= self.window:
+                continue
+            mean, std = trailing[f"mean_return_{self.window}"], trailing[f"volatility_{self.window}"]
+            if std > 0 and abs(latest['return'] - mean) > self.z_score * std:
+                breaks.append(f"{vault_name} return {latest['return']:.4%} ({(latest['return'] - mean) / std:+.1f} std)")
+        return f"trend break: {', '.join(breaks)}" if breaks else None
+
+
+@dataclass
+class DrawdownDetector(Detector):
+    """
+    Fires when the share price of a vault with a balance falls more than `threshold`
+    below its running peak. It fires once per drawdown and re-arms after the price recovers
+    above the threshold.
+    """
+    threshold: float = 0.05
+    _peaks: Dict[str, float] = field(default_factory=dict, repr=False)
+    _in_drawdown: Dict[str, bool] = field(default_factory=dict, repr=False)
+
+    def check(self, snapshot: TriggerSnapshot) -> Optional[str]:
+        drawdowns = []
+        for vault_name, share_price in snapshot.share_prices.items():
+            peak = max(self._peaks.get(vault_name, share_price), share_price)
+            self._peaks[vault_name] = peak
+            drawdown = 1 - share_price / peak if peak > 0 else 0.0
+            if drawdown < self.threshold:
+                self._in_drawdown[vault_name] = False
+            elif not self._in_drawdown.get(vault_name) and snapshot.balances.get(vault_name, 0) > 0:
+                self._in_drawdown[vault_name] = True
+                drawdowns.append(f"{vault_name} {drawdown:.2%}")
+        return f"drawdown: {', '.join(drawdowns)}" if drawdowns else None
+
+
+class TriggerEngine:
+    """
+    Evaluates the detectors on every observation and decides whether to consult the agents.
+
+    A decision is taken when a detector fires and at least `min_interval` observations passed
+    since the previous decision, or when `max_interval` observations passed without one.
+    The first observation can always trigger a decision.
+    """
+
+    def __init__(self, detectors: List[Detector], min_interval: int = 1, max_interval: Optional[int] = None):
+        if min_interval < 1:
+            raise ValueError("The minimum interval must be at least one observation")
+        if max_interval is not None and max_interval < min_interval:
+            raise ValueError("The maximum interval cannot be smaller than the minimum interval")
+        self.detectors = detectors
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._since_decision = 0
+        self._decided = False
+
+    def update(self, snapshot: TriggerSnapshot) -> List[str]:
+        """
+        Feed one observation to the detectors.
+
+        Returns:
+            List[str]: Reasons to decide now, empty when the agents should not be called
+        """
+        # every detector sees every observation, so their rolling state stays current
+        reasons = [reason for reason in (detector.check(snapshot) for detector in self.detectors) if reason]
+        self._since_decision += 1
+
+        allowed = self._since_decision >= self.min_interval or not self._decided
+        due = self.max_interval is not None and self._since_decision >= self.max_interval
+        if not (reasons and allowed or due):
+            return []
+        if not reasons:
+            reasons = [f"no decision for {self._since_decision} observations"]
+
+        self._since_decision = 0
+        self._decided = True
+        return reasons
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Literal
+from typing import Callable, Literal
 
 @dataclass
 class ValidationFeedback:
@@ -111,4 +111,74 @@ def validate_reallocation(vault_names: list[str], weights: list[float]) -> Valid
     return ValidationFeedback(
         feedback='',
         result='pass'
-    )
\ No newline at end of file
+    )
+# relative tolerance on the redeemed assets of a combined plan, whose value the agent can only estimate
+PLAN_TOLERANCE = 0.01
+
+def validate_decision(idle_assets: float, pending_withdrawals: float,
+                      redeem_vault_names: list[str], redeem_shares: list[float],
+                      withdraw_vault_names: list[str], withdrawals: list[float],
+                      allocation_vault_names: list[str], allocations: list[float],
+                      share_balances: dict[str, float], asset_balances: dict[str, float],
+                      preview_redeem: Callable[[str, float], float]) -> ValidationFeedback:
+    """
+    Validate a combined plan, executed as redemptions, then withdrawals, then allocations.
+    `preview_redeem` returns the assets received for redeeming shares of a vault.
+    """
+    for vault_name in redeem_vault_names + withdraw_vault_names + allocation_vault_names:
+        if vault_name not in share_balances:
+            return ValidationFeedback(
+                feedback=f'Unknown vault {vault_name}, use one of {list(share_balances.keys())}.',
+                result='fail'
+            )
+    validation_result = validate_redeem(redeem_vault_names, redeem_shares, share_balances)
+    if validation_result.result == 'fail':
+        return validation_result
+    if len(withdraw_vault_names) != len(withdrawals) or len(allocation_vault_names) != len(allocations):
+        return ValidationFeedback(
+            feedback='The lengths of vault names and amounts should match.',
+            result='fail'
+        )
+    for amount in withdrawals + allocations:
+        if amount < 0:
+            return ValidationFeedback(
+                feedback=f'The amount {amount} cannot be negative.',
+                result='fail'
+            )
+    redeemed = {vault_name for vault_name, share in zip(redeem_vault_names, redeem_shares) if share > 0}
+    for vault_name, amount in zip(withdraw_vault_names, withdrawals):
+        if amount > 0 and vault_name in redeemed:
+            return ValidationFeedback(
+                feedback=f'Cannot both redeem from and withdraw from {vault_name}.',
+                result='fail'
+            )
+        if amount > asset_balances[vault_name]:
+            return ValidationFeedback(
+                feedback=f'The withdrawal amount ({amount}) of {vault_name} cannot exceed the balance ({asset_balances[vault_name]})',
+                result='fail'
+            )
+    for vault_name, amount in zip(allocation_vault_names, allocations):
+        if amount > 0 and vault_name in redeemed:
+            return ValidationFeedback(
+                feedback=f'Cannot both redeem from and allocate to {vault_name}.',
+                result='fail'
+            )
+
+    redeemed_assets = sum(preview_redeem(vault_name, share) for vault_name, share in zip(redeem_vault_names, redeem_shares))
+    # the withdrawals are exact amounts, only the redeemed assets are estimates
+    covered = sum(withdrawals) + redeemed_assets * (1 + PLAN_TOLERANCE)
+    if covered < pending_withdrawals:
+        return ValidationFeedback(
+            feedback=f'Withdrawals ({sum(withdrawals)}) plus redeemed assets ({redeemed_assets}) must cover the pending withdrawals ({pending_withdrawals}).',
+            result='fail'
+        )
+    available = idle_assets + (covered - pending_withdrawals)
+    if sum(allocations) > available:
+        return ValidationFeedback(
+            feedback=f'Sum of allocations ({sum(allocations)}) cannot exceed the available assets ({available}).',
+            result='fail'
+        )
+    return ValidationFeedback(
+        feedback='',
+        result='pass'
+    )
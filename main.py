@@ -1,12 +1,175 @@
 """
 Main entry point for the agentic-curator application.
-This module serves as the starting point for the application execution.
+
+Subcommands:
+    build       Build the observations from the back tested vault data
+    generate    Generate the backtest data of a synthetic vault universe
+    backtest    Run the curator strategy and record the run
+    sweep       Run the strategy over a grid of parameters
+    queue       Enqueue backtest jobs in the shared job queue and inspect it
+    worker      Run backtest jobs from the shared job queue
+    dashboard   Start the results dashboard
+    bench       Run the benchmark suite
+    live        Run the live curation service
+
+Heavy dependencies (pandas, fractal, openai-agents, dash) are imported only by the subcommand
+that needs them, and the time until a subcommand is ready is reported on stderr.
 """
+import argparse
+import sys
+import time
+from contextlib import contextmanager
+
+_START = time.perf_counter()
+
+
+@contextmanager
+def cold_start(command: str):
+    """
+    Time the imports of a subcommand and report its cold start time.
+    """
+    start = time.perf_counter()
+    yield
+    now = time.perf_counter()
+    print(f"[{command}] ready in {now - _START:.3f}s (imports {now - start:.3f}s)", file=sys.stderr)
+
+
+def build(args: argparse.Namespace, _):
+    with cold_start('build'):
+        from back_test.build_observations import build_observations, DATA_BASE_PATH
+        from back_test.constants import LOG_VAULT_NAMES
+    observations = build_observations(
+        with_run=not args.cached, log_vault_names=args.vaults or LOG_VAULT_NAMES,
+        data_base_path=args.data_path or DATA_BASE_PATH
+    )
+    if observations:
+        print(f"{len(observations)} observations from {observations[0].timestamp} to {observations[-1].timestamp}")
+    else:
+        print("No observations")
+
+
+def generate(_, argv):
+    with cold_start('generate'):
+        from back_test.loader.simulations.synthetic_generator import main as generate_main
+    generate_main(argv)
+
+
+def backtest(args: argparse.Namespace, _):
+    with cold_start('backtest'):
+        from back_test.curator_strategy import CuratorStrategyParams, run_backtest
+    params = CuratorStrategyParams(
+        INIT_BALANCE=args.init_balance, WINDOW_SIZE=args.window_size, REQUEST_INTERVAL=args.request_interval,
+        DECISION_MODE=args.decision_mode, DECISION_TRIGGER=args.decision_trigger, PROFILE=args.profile,
+        TRACING=args.tracing, TRACE_FORMAT=args.trace_format,
+        AGENT_MODELS=dict(item.split('=', 1) for item in args.agent_model), ESCALATION_MODEL=args.escalation_model,
+        FALLBACK_MODEL=args.fallback_model, RUN_TOKEN_BUDGET=args.run_token_budget, STEP_TOKEN_BUDGET=args.step_token_budget,
+        BATCH_ACTIONS=args.batch_actions, FEATURE_WINDOWS=args.feature_windows,
+        **({'VAULT_NAMES': args.vaults} if args.vaults else {})
+    )
+    _, metrics = run_backtest(params, record=not args.no_record, name=args.name)
+    print(metrics)
+
+
+def sweep(args: argparse.Namespace, _):
+    with cold_start('sweep'):
+        from back_test.sweep import parse_grid, run_sweep
+    summary = run_sweep(parse_grid(args.grid), record=not args.no_record, workers=args.workers,
+                        samples=args.samples, sample_seed=args.sample_seed, output=args.output)
+    print(summary.to_string(index=False))
+
+
+def queue(_, argv):
+    with cold_start('queue'):
+        from back_test.job_queue import main as queue_main
+    queue_main(argv)
+
+
+def worker(_, argv):
+    with cold_start('worker'):
+        from back_test.job_queue import main as queue_main
+    queue_main(['worker', *argv])
+
+
+def dashboard(_, argv):
+    with cold_start('dashboard'):
+        from back_test.dashboard import main as dashboard_main
+    dashboard_main(argv)
+
+
+def bench(_, argv):
+    with cold_start('bench'):
+        from back_test.benchmarks.__main__ import main as bench_main
+    bench_main(argv)
+
+
+def live(_, argv):
+    with cold_start('live'):
+        from curator.main import main as live_main
+    live_main(argv)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Agentic curator tools.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Build observations from the vault data")
+    build_parser.add_argument('--vaults', nargs='+', default=None, help="Logarithm vault names")
+    build_parser.add_argument('--data-path', default=None, help="Base path of the back tested vault data")
+    build_parser.add_argument('--cached', action='store_true', help="Read the loader's previous output instead of running it")
+    build_parser.set_defaults(handler=build)
+
+    backtest_parser = subparsers.add_parser('backtest', help="Run the curator strategy")
+    backtest_parser.add_argument('--vaults', nargs='+', default=None, help="Logarithm vault names")
+    backtest_parser.add_argument('--init-balance', type=float, default=100_000)
+    backtest_parser.add_argument('--window-size', type=int, default=7)
+    backtest_parser.add_argument('--request-interval', type=float, default=1)
+    backtest_parser.add_argument('--decision-mode', choices=['sequential', 'speculative', 'unified'], default='sequential',
+                                 help="Separate agents run in sequence or concurrently, or one combined decision agent")
+    backtest_parser.add_argument('--decision-trigger', choices=['window', 'event'], default='window',
+                                 help="Consult the agents on a fixed schedule or when a trigger fires")
+    backtest_parser.add_argument('--profile', choices=['phases', 'cprofile', 'sampling'], default=None)
+    backtest_parser.add_argument('--tracing', choices=['hosted', 'local', 'off'], default='hosted',
+                                 help="Send the agent traces to the hosted backend, write them to the run directory, or disable them")
+    backtest_parser.add_argument('--trace-format', choices=['jsonl', 'parquet'], default='jsonl')
+    backtest_parser.add_argument('--agent-model', action='append', default=[], metavar='AGENT=MODEL',
+                                 help="Model of an agent, e.g. AnalysisAgent=gpt-4o-mini (repeatable)")
+    backtest_parser.add_argument('--escalation-model', default=None, help="Model of the retries after a validation failure")
+    backtest_parser.add_argument('--fallback-model', default=None,
+                                 help="Model used once a budget is exhausted, the deterministic policies decide without one")
+    backtest_parser.add_argument('--run-token-budget', type=int, default=None)
+    backtest_parser.add_argument('--step-token-budget', type=int, default=None)
+    backtest_parser.add_argument('--batch-actions', action='store_true',
+                                 help="Net opposing flows on the same vault and drop dust operations")
+    backtest_parser.add_argument('--feature-windows', nargs='+', type=int, default=[],
+                                 help="Window lengths of the rolling vault features served to the analysis agent")
+    backtest_parser.add_argument('--name', default=None, help="Name of the recorded run")
+    backtest_parser.add_argument('--no-record', action='store_true', help="Do not record the run in the run store")
+    backtest_parser.set_defaults(handler=backtest)
+
+    sweep_parser = subparsers.add_parser('sweep', help="Run the strategy over a parameter grid")
+    sweep_parser.add_argument('grid', nargs='+',
+                              help="Parameter values as NAME=v1,v2, e.g. WINDOW_SIZE=3,7,14, SEED=1,2,3 for Monte Carlo seeds")
+    sweep_parser.add_argument('--workers', type=int, default=1, help="Number of worker processes")
+    sweep_parser.add_argument('--samples', type=int, default=None,
+                              help="Run this many random combinations of the grid instead of all of them")
+    sweep_parser.add_argument('--sample-seed', type=int, default=0, help="Seed of the random combinations")
+    sweep_parser.add_argument('--output', default=None, help="CSV file the summary rows are streamed to")
+    sweep_parser.add_argument('--no-record', action='store_true', help="Do not record the runs in the run store")
+    sweep_parser.set_defaults(handler=sweep)
+
+    # the remaining arguments are passed on to the generator, job queue, dashboard, benchmark and live service parsers
+    subparsers.add_parser('generate', help="Generate synthetic vault data, see `generate -h`", add_help=False).set_defaults(handler=generate)
+    subparsers.add_parser('queue', help="Manage the job queue, see `queue -h`", add_help=False).set_defaults(handler=queue)
+    subparsers.add_parser('worker', help="Run queued jobs, see `worker -h`", add_help=False).set_defaults(handler=worker)
+    subparsers.add_parser('dashboard', help="Start the dashboard, see `dashboard -h`", add_help=False).set_defaults(handler=dashboard)
+    subparsers.add_parser('bench', help="Run the benchmark suite, see `bench -h`", add_help=False).set_defaults(handler=bench)
+    subparsers.add_parser('live', help="Run the live curation service, see `live -h`", add_help=False).set_defaults(handler=live)
 
-def main():
-    print("Hello from agentic-curator!")
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.handler not in (generate, queue, worker, dashboard, bench, live):
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    args.handler(args, extra)
 
 
 if __name__ == "__main__":
-    # Execute the main function when this script is run directly
     main()
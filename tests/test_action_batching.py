@@ -0,0 +1,120 @@
+from dataclasses import asdict
+
+import pytest
+from fractal.core.base import Action, ActionToTake, NamedEntity
+
+from back_test.constants import META_VAULT_NAME
+from back_test.entities.logarithm_vault import LogarithmVault, LogarithmVaultGlobalState
+from back_test.entities.meta_vault import DUST, MetaVault, MetaVaultEntityException
+from curator.live.stand_in_server import StandInServer
+from curator.utils.action_batching import VaultCall, coalesce_actions
+
+VAULT_NAMES = ['btc', 'eth']
+# the exit costs only apply to the redeemed assets above the idle assets
+VAULT_STATE = LogarithmVaultGlobalState(share_price=1.2, idle_assets=5_000, pending_withdrawals=0)
+
+
+def action(name, vaults, vault_names, amounts):
+    return ActionToTake(entity_name=META_VAULT_NAME, action=Action(name, {
+        'targets': [NamedEntity(entity_name=vault_name, entity=vaults[vault_name]) for vault_name in vault_names],
+        'amounts': amounts,
+    }))
+
+
+def allocate(meta_vault, vaults):
+    for vault in vaults.values():
+        vault.update_state(VAULT_STATE)
+    meta_vault.execute(action('allocate_assets', vaults, VAULT_NAMES, [20_000, 20_000]).action)
+
+
+@pytest.fixture
+def vaults():
+    meta_vault = MetaVault()
+    meta_vault.action_deposit(100_000)
+    vaults = {vault_name: LogarithmVault() for vault_name in VAULT_NAMES}
+    allocate(meta_vault, vaults)
+    return vaults
+
+
+def test_dust_is_dropped(vaults):
+    assert coalesce_actions([action('allocate_assets', vaults, ['btc'], [DUST / 2])]) == []
+    assert coalesce_actions([action('withdraw_allocations', vaults, ['btc'], [DUST])]) == []
+
+
+def test_redeem_and_deposit_net_to_partial_redeem(vaults):
+    shares = vaults['btc'].shares
+    calls = coalesce_actions([
+        action('redeem_allocations', vaults, ['btc'], [shares]),
+        action('allocate_assets', vaults, ['btc'], [5_000]),
+    ])
+    assert [(call.operation, call.vault_name) for call in calls] == [('redeem', 'btc')]
+    assert vaults['btc'].preview_redeem(calls[0].amount) == pytest.approx(vaults['btc'].preview_redeem(shares) - 5_000)
+
+
+def test_redeem_and_deposit_net_to_deposit(vaults):
+    shares = vaults['btc'].shares / 4
+    calls = coalesce_actions([
+        action('redeem_allocations', vaults, ['btc'], [shares]),
+        action('allocate_assets', vaults, ['btc'], [10_000]),
+    ])
+    assert calls == [VaultCall('deposit', 'btc', pytest.approx(10_000 - vaults['btc'].preview_redeem(shares)))]
+
+
+def test_withdraw_and_deposit_net(vaults):
+    assert coalesce_actions([
+        action('withdraw_allocations', vaults, ['btc'], [3_000]),
+        action('allocate_assets', vaults, ['btc'], [1_000]),
+    ]) == [VaultCall('withdraw', 'btc', 2_000)]
+    assert coalesce_actions([
+        action('withdraw_allocations', vaults, ['btc'], [1_000]),
+        action('allocate_assets', vaults, ['btc'], [3_000]),
+    ]) == [VaultCall('deposit', 'btc', 2_000)]
+    assert coalesce_actions([
+        action('withdraw_allocations', vaults, ['btc'], [1_000]),
+        action('allocate_assets', vaults, ['btc'], [1_000]),
+    ]) == []
+
+
+def test_calls_are_ordered_outflows_first(vaults):
+    calls = coalesce_actions([
+        action('allocate_assets', vaults, ['btc'], [1_000]),
+        action('withdraw_allocations', vaults, ['eth'], [1_000]),
+        action('redeem_allocations', vaults, ['eth'], [1_000]),
+    ])
+    assert [call.operation for call in calls] == ['redeem', 'withdraw', 'deposit']
+
+
+def test_stand_in_multicall_delivers_the_netted_flow():
+    with StandInServer(VAULT_NAMES) as sequential, StandInServer(VAULT_NAMES) as batched:
+        for server in (sequential, batched):
+            allocate(server.meta_vault, server.vaults)
+        shares = batched.vaults['btc'].shares
+        actions = [
+            action('redeem_allocations', batched.vaults, ['btc'], [shares]),
+            action('allocate_assets', batched.vaults, ['btc', 'eth'], [4_000, 1_000]),
+        ]
+        calls = coalesce_actions(actions)
+        batched.multicall([asdict(call) for call in calls])
+        for batch_action in actions:
+            sequential.meta_vault.execute(Action(batch_action.action.action, {
+                'targets': [NamedEntity(entity_name=target.entity_name, entity=sequential.vaults[target.entity_name])
+                            for target in batch_action.action.args['targets']],
+                'amounts': batch_action.action.args['amounts'],
+            }))
+        assert batched.batches == [[asdict(call) for call in calls]]
+        # the redeem and the deposit on btc cancel out, so the meta vault ends up with the same idle assets
+        assert batched.meta_vault.idle_assets == pytest.approx(sequential.meta_vault.idle_assets)
+        assert batched.vaults['eth'].shares == pytest.approx(sequential.vaults['eth'].shares)
+
+
+def test_stand_in_multicall_is_atomic():
+    with StandInServer(VAULT_NAMES) as server:
+        allocate(server.meta_vault, server.vaults)
+        idle_assets, shares = server.meta_vault.idle_assets, server.vaults['btc'].shares
+        # the redemption succeeds before the withdrawal fails
+        with pytest.raises(MetaVaultEntityException):
+            server.multicall([asdict(VaultCall('redeem', 'btc', 1_000)),
+                              asdict(VaultCall('withdraw', 'eth', 1e12))])
+        assert server.meta_vault.idle_assets == idle_assets
+        assert server.vaults['btc'].shares == shares
+        assert server.batches == []
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from agents import ModelSettings, set_tracing_disabled
+from agents.models.interface import ModelTracing
+
+from back_test.benchmarks.stub_model import StubModel, StubModelProvider
+from back_test.benchmarks.suite import build_stub_strategy, synthetic_observations, vault_names
+from back_test.model_routing import BudgetGovernor, GovernedModelProvider
+from back_test.profiling import PhaseProfiler, ProfiledModelProvider
+
+set_tracing_disabled(True)
+
+NAMES = vault_names(3)
+STEPS = 20
+
+
+def run(**params):
+    strategy = build_stub_strategy(NAMES, **params)
+    result = strategy.run(synthetic_observations(NAMES, STEPS))
+    assert len(result.to_dataframe()) == STEPS
+    return strategy.governor
+
+
+@pytest.fixture(scope='module')
+def unlimited():
+    # an unreachable budget, so that the governor accounts the usage
+    return run(RUN_LATENCY_BUDGET=1e9)
+
+
+def test_stub_usage_counts_tokens(unlimited):
+    assert unlimited.run_usage.requests > 0
+    assert unlimited.run_usage.total_tokens > 0
+    assert unlimited.exhausted() is None
+
+
+def test_run_token_budget_falls_back_to_policy(unlimited):
+    budget = unlimited.run_usage.total_tokens // 4
+    governor = run(RUN_TOKEN_BUDGET=budget)
+    assert governor.exhausted().startswith('run tokens')
+    assert budget <= governor.run_usage.total_tokens < unlimited.run_usage.total_tokens
+    assert governor.run_usage.requests < unlimited.run_usage.requests
+
+
+def test_run_token_budget_falls_back_to_model(unlimited):
+    budget = unlimited.run_usage.total_tokens // 4
+    governor = run(RUN_TOKEN_BUDGET=budget, FALLBACK_MODEL='fallback')
+    assert governor.usage_by_model['fallback'].requests > 0
+    assert governor.run_usage.requests == unlimited.run_usage.requests
+
+
+def test_step_token_budget_falls_back_to_policy(unlimited):
+    governor = run(STEP_TOKEN_BUDGET=1)
+    assert governor.exhausted().startswith('step tokens')
+    assert 0 < governor.run_usage.requests < unlimited.run_usage.requests
+
+
+def test_step_token_budget_falls_back_to_model(unlimited):
+    governor = run(STEP_TOKEN_BUDGET=1, FALLBACK_MODEL='fallback')
+    assert governor.usage_by_model['fallback'].requests > 0
+    assert governor.run_usage.requests == unlimited.run_usage.requests
+
+
+def stream(model):
+    async def collect():
+        return [event async for event in model.stream_response(
+            None, 'hello', ModelSettings(), [], None, [], ModelTracing.DISABLED)]
+    return asyncio.run(collect())
+
+
+def test_streamed_responses_are_governed():
+    governor = BudgetGovernor(run_tokens=1)
+    provider = GovernedModelProvider(governor, StubModelProvider(StubModel(lambda *_: {}, NAMES)), 'fallback')
+    events = stream(provider.get_model('model'))
+    assert [event.type for event in events] == ['response.completed']
+    assert governor.usage_by_model['model'].requests == 1
+    assert governor.run_usage.total_tokens == events[0].response.usage.total_tokens > 0
+    stream(provider.get_model('model'))
+    assert governor.usage_by_model['fallback'].requests == 1
+
+
+def test_streamed_responses_are_profiled():
+    profiler = PhaseProfiler(enabled=True)
+    provider = ProfiledModelProvider(profiler, StubModelProvider(StubModel(lambda *_: {}, NAMES)))
+    stream(provider.get_model('model'))
+    assert profiler.stats['model'].count == 1
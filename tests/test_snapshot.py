@@ -0,0 +1,90 @@
+import copy
+
+import pytest
+from fractal.core.base import Action, ActionToTake, NamedEntity
+
+from back_test.constants import META_VAULT_NAME
+from back_test.entities.logarithm_vault import LogarithmVault, LogarithmVaultGlobalState
+from back_test.entities.meta_vault import MetaVault
+from back_test.entities.snapshot import EntitySnapshot, evaluate_plans
+
+VAULT_NAMES = ['btc', 'eth', 'doge']
+
+
+def action(entities, name, vault_names, amounts):
+    return ActionToTake(entity_name=META_VAULT_NAME, action=Action(name, {
+        'targets': [NamedEntity(entity_name=vault_name, entity=entities[vault_name]) for vault_name in vault_names],
+        'amounts': amounts,
+    }))
+
+
+@pytest.fixture
+def entities():
+    meta_vault = MetaVault()
+    meta_vault.action_deposit(100_000)
+    entities = {META_VAULT_NAME: meta_vault}
+    for vault_name in VAULT_NAMES:
+        entities[vault_name] = LogarithmVault()
+        entities[vault_name].update_state(LogarithmVaultGlobalState(share_price=1.1, idle_assets=1_000))
+    meta_vault.execute(action(entities, 'allocate_assets', ['btc', 'eth'], [30_000, 30_000]).action)
+    return entities
+
+
+def state(entities):
+    """
+    Everything the actions can change on the entities, with the identity of the referenced entities.
+    """
+    return {
+        name: (copy.copy(entity.internal_state), {name: value for name, value in vars(entity).items() if isinstance(value, float)},
+               [(item.entity_name, id(item.entity)) for item in getattr(entity, '_allocated_vaults', [])])
+        for name, entity in entities.items()
+    }
+
+
+def plan(entities, shares):
+    return [
+        action(entities, 'redeem_allocations', ['btc'], [shares]),
+        action(entities, 'withdraw_allocations', ['eth'], [10_000]),
+        action(entities, 'allocate_assets', ['doge'], [20_000]),
+    ]
+
+
+def test_fork_leaves_live_entities_unchanged(entities):
+    before = state(entities)
+    snapshot = EntitySnapshot.capture(entities)
+    fork = snapshot.fork()
+    fork.execute(plan(entities, entities['btc'].shares))
+
+    assert state(entities) == before
+    assert fork.get_entity('btc').shares == 0
+    assert fork.get_entity('doge').shares > 0
+    assert fork.net_balance() != pytest.approx(sum(entity.balance for entity in entities.values()))
+    # the fork's meta vault references the fork's vaults, not the live ones
+    allocated = fork.get_entity(META_VAULT_NAME)._allocated_vaults
+    assert {item.entity_name for item in allocated} == {'eth', 'doge'}
+    assert all(item.entity is fork.get_entity(item.entity_name) for item in allocated)
+
+
+def test_forks_do_not_see_each_other(entities):
+    snapshot = EntitySnapshot.capture(entities)
+    first, second = snapshot.fork(), snapshot.fork()
+    first.execute(plan(entities, entities['btc'].shares))
+    assert second.get_entity('btc').shares == entities['btc'].shares
+    assert second.get_entity(META_VAULT_NAME).idle_assets == entities[META_VAULT_NAME].idle_assets
+
+
+def test_threaded_evaluation_matches_sequential(entities):
+    before = state(entities)
+    snapshot = EntitySnapshot.capture(entities)
+    snapshot_before = state({name: snapshot.get_entity(name) for name in snapshot.entity_names})
+    plans = [plan(entities, entities['btc'].shares * i / 64) for i in range(65)]
+    plans.append([action(entities, 'withdraw_allocations', ['doge'], [1])])
+
+    sequential = evaluate_plans(snapshot, plans)
+    threaded = evaluate_plans(snapshot, plans, max_workers=8)
+
+    assert [result.score for result in threaded] == [result.score for result in sequential]
+    assert all(result.score is not None for result in threaded[:-1])
+    assert threaded[-1].score is None and threaded[-1].error is not None
+    assert state(entities) == before
+    assert state({name: snapshot.get_entity(name) for name in snapshot.entity_names}) == snapshot_before
@@ -0,0 +1,50 @@
+import pytest
+
+from back_test.sweep import SEED, parse_grid
+
+
+def test_parse_grid_bool():
+    assert parse_grid(['COST_QUOTES=False,True']) == {'COST_QUOTES': [False, True]}
+    assert parse_grid(['BATCH_ACTIONS=false,TRUE']) == {'BATCH_ACTIONS': [False, True]}
+    assert parse_grid(['PRICE_HISTORY_STATS=0,1']) == {'PRICE_HISTORY_STATS': [False, True]}
+
+
+def test_parse_grid_bool_invalid():
+    with pytest.raises(ValueError):
+        parse_grid(['COST_QUOTES=no'])
+
+
+def test_parse_grid_int():
+    assert parse_grid(['WINDOW_SIZE=3,7']) == {'WINDOW_SIZE': [3, 7]}
+
+
+def test_parse_grid_float():
+    assert parse_grid(['ENTRY_COST_RATE=0.002,0.0035']) == {'ENTRY_COST_RATE': [0.002, 0.0035]}
+
+
+def test_parse_grid_str():
+    assert parse_grid(['DECISION_MODE=sequential,unified']) == {'DECISION_MODE': ['sequential', 'unified']}
+
+
+def test_parse_grid_optional():
+    assert parse_grid(['RUN_TOKEN_BUDGET=None,2000000']) == {'RUN_TOKEN_BUDGET': [None, 2000000]}
+    assert parse_grid(['FALLBACK_MODEL=gpt-4o-mini']) == {'FALLBACK_MODEL': ['gpt-4o-mini']}
+
+
+def test_parse_grid_list():
+    assert parse_grid(['VAULT_NAMES=btc+eth,btc']) == {'VAULT_NAMES': [['btc', 'eth'], ['btc']]}
+    assert parse_grid(['FEATURE_WINDOWS=7+30,90']) == {'FEATURE_WINDOWS': [[7, 30], [90]]}
+
+
+def test_parse_grid_dict():
+    assert parse_grid(['AGENT_MODELS=AnalysisAgent:gpt-4o-mini+WithdrawAgent:gpt-4o,']) == {
+        'AGENT_MODELS': [{'AnalysisAgent': 'gpt-4o-mini', 'WithdrawAgent': 'gpt-4o'}, {}]}
+
+
+def test_parse_grid_seed():
+    assert parse_grid(['SEED=1,2']) == {SEED: [1, 2]}
+
+
+def test_parse_grid_invalid_name():
+    with pytest.raises(ValueError):
+        parse_grid(['UNKNOWN=1'])
@@ -0,0 +1,33 @@
+from curator.utils.validate_actions import PLAN_TOLERANCE, validate_decision
+
+SHARE_BALANCES = {'btc': 10.0, 'eth': 10.0}
+ASSET_BALANCES = {'btc': 1000.0, 'eth': 1000.0}
+
+
+def preview_redeem(vault_name: str, shares: float) -> float:
+    return shares * 100.0
+
+
+def validate(redeem_shares=0.0, withdrawal=0.0, allocation=0.0):
+    return validate_decision(
+        100.0, 500.0,
+        ['eth'] if redeem_shares else [], [redeem_shares] if redeem_shares else [],
+        ['btc'] if withdrawal else [], [withdrawal] if withdrawal else [],
+        ['btc'] if allocation else [], [allocation] if allocation else [],
+        SHARE_BALANCES, ASSET_BALANCES, preview_redeem,
+    ).result
+
+
+def test_withdrawals_cover_pending_exactly():
+    assert validate(withdrawal=500.0) == 'pass'
+    assert validate(withdrawal=500.0 * (1 - PLAN_TOLERANCE)) == 'fail'
+
+
+def test_tolerance_applies_to_redeemed_assets():
+    assert validate(redeem_shares=5.0 / (1 + PLAN_TOLERANCE)) == 'pass'
+    assert validate(redeem_shares=4.9) == 'fail'
+
+
+def test_allocations_limited_to_available_assets():
+    assert validate(withdrawal=600.0, allocation=200.0) == 'pass'
+    assert validate(withdrawal=600.0, allocation=200.1) == 'fail'